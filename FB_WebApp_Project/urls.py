@@ -27,8 +27,10 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('create-group/', views.page_campaign_dashboard, name='create_group'),
     path('add-page/<int:group_id>/', views.add_page, name='add_page'),
+    path('add-page/<int:group_id>/bulk/', views.bulk_add_pages, name='bulk_add_pages'),
     path('group/<int:group_id>/', views.group_detail, name='group_detail'),
     path('page/<int:page_id>/', views.pageview, name='pageview'),
+    path('page/<int:page_id>/bucket-posts/', views.pageview_bucket_posts, name='pageview_bucket_posts'),
     path('add-comment-url/', views.add_comment_url, name='add_comment_url'),
     path("comment-dashboard/", views.comment_dashboard_view, name="comment_dashboard"),
     path('add-activity-dashboard/', views.add_activity_dashboard, name='add_activity_dashboard'),
@@ -37,7 +39,10 @@ urlpatterns = [
     path('comment-dashboard/<str:group_name>/', views.comment_dashboard_detail, name='comment_dashboard'),
     path('comment-campaign/<int:pk>/', views.comment_campaign_detail, name='comment_campaign_detail'),
     path('dashboard/<int:dashboard_id>/', views.comment_dashboard_detail, name='comment_dashboard_detail'),
+    path('dashboard/<int:dashboard_id>/refresh/', views.refresh_comment_dashboard, name='refresh_comment_dashboard'),
     path('posts-campaign/<str:group_name>/', views.posts_campaign, name='posts_campaign'),
+    path('search/', views.search_content, name='search_content'),
+    path('thumb/<str:token>/', views.thumbnail, name='thumbnail'),
     path('accounts/', include('accounts.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -1,5 +1,39 @@
+from django import forms
 from django.contrib import admin
 from . models import *
+from .seeding_utils import normalize_author
 
 admin.site.register(PageGroup)
 
+
+@admin.register(CommentCampaignGroup)
+class CommentCampaignGroupAdmin(admin.ModelAdmin):
+    list_display = ('group_name', 'fuzzy_seeding_match', 'created_at')
+    list_editable = ('fuzzy_seeding_match',)
+    search_fields = ('group_name',)
+
+
+class SeedingAuthorForm(forms.ModelForm):
+    class Meta:
+        model = SeedingAuthor
+        fields = ('name', 'campaign_group')
+
+    def clean(self):
+        # normalized_name แก้ไม่ได้ใน admin จึงไม่ถูก validate_unique: เช็กเองแทน IntegrityError (500)
+        cleaned = super().clean()
+        name = cleaned.get('name')
+        if name:
+            duplicates = SeedingAuthor.objects.filter(
+                normalized_name=normalize_author(name), campaign_group=cleaned.get('campaign_group'),
+            ).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise forms.ValidationError(f'"{name}" มีอยู่แล้วใน {cleaned.get("campaign_group") or "global"}')
+        return cleaned
+
+
+@admin.register(SeedingAuthor)
+class SeedingAuthorAdmin(admin.ModelAdmin):
+    form = SeedingAuthorForm
+    list_display = ('name', 'campaign_group', 'created_at')
+    list_filter = ('campaign_group',)
+    search_fields = ('name', 'normalized_name')
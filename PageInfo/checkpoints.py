@@ -0,0 +1,152 @@
+# PageInfo/checkpoints.py
+"""
+Resumable checkpoints for long page crawls.
+
+FBPostScraperAsync.run and TikTokPostScraper.scrape_posts_from_profile write
+what they have collected to a small JSON file after every batch: the results
+so far, the ids already handled (``seen_ids``) and where the crawl was
+(scroll position / post list). If the process dies halfway through a large
+page, the next run of the same scraper on the same page loads the file,
+skips the posts it already has and carries on. The full result list is still
+returned at the end, and the file is deleted once the crawl finishes.
+
+The job parameters that shape the results (``lookback_days`` of the crawl
+window, TikTok's ``max_posts`` / ``scroll_rounds``) are part of the file name
+and are stored in the file. A 14-day ``refresh_posts`` run therefore never
+resumes what a crashed 30-day ``import_pages`` crawl left behind, and the
+two can run on the same page at once without overwriting each other.
+
+A checkpoint older than ``max_age_hours`` is ignored, because its counts
+would be stale by then.
+
+Defaults can be overridden in settings::
+
+    SCRAPE_CHECKPOINTS = {'enabled': True, 'dir': BASE_DIR / 'PageInfo' / 'checkpoints', 'max_age_hours': 12}
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULTS = {
+    'enabled': True,
+    'dir': None,  # None = <BASE_DIR>/PageInfo/checkpoints
+    'max_age_hours': 12,
+}
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    if settings.configured:
+        conf.update(getattr(settings, 'SCRAPE_CHECKPOINTS', {}) or {})
+    if not conf['dir']:
+        base_dir = Path(getattr(settings, 'BASE_DIR', '.')) if settings.configured else Path('.')
+        conf['dir'] = base_dir / 'PageInfo' / 'checkpoints'
+    return conf
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if len(obj) == 1 and '$dt' in obj:
+        return datetime.fromisoformat(obj['$dt'])
+    return obj
+
+
+def lookback_days(cutoff_dt):
+    """Whole days between ``cutoff_dt`` and now (None for no cutoff), stable across restarts of a job."""
+    if cutoff_dt is None:
+        return None
+    now = datetime.now(timezone.utc) if cutoff_dt.tzinfo else datetime.now()
+    return round((now - cutoff_dt).total_seconds() / 86400)
+
+
+class ScrapeCheckpoint:
+    def __init__(self, path, max_age_hours=12, params=None):
+        self.path = Path(path)
+        self.max_age_hours = max_age_hours
+        self.params = params or {}
+        self.results = []
+        self.seen_ids = set()
+        self.position = {}
+        self.resumed = False
+
+    @classmethod
+    def for_job(cls, scraper, url, **params):
+        """
+        Checkpoint of one scraper on one page with these job ``params``
+        (JSON values, e.g. ``lookback_days=30``), or None when checkpoints are disabled.
+        """
+        conf = _config()
+        if not conf['enabled'] or not url:
+            return None
+        key = json.dumps([url.strip().rstrip('/').lower(), params], sort_keys=True)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return cls(Path(conf['dir']) / f"{scraper}-{digest}.json", conf['max_age_hours'], params)
+
+    def load(self):
+        """Restore the saved state. Returns True if there was a fresh checkpoint to resume from."""
+        try:
+            if time.time() - self.path.stat().st_mtime > self.max_age_hours * 3600:
+                print(f"⚠️ [checkpoint] {self.path.name} is older than {self.max_age_hours}h, starting over")
+                self.clear()
+                return False
+            data = json.loads(self.path.read_text(encoding='utf-8'), object_hook=_decode)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [checkpoint] cannot read {self.path.name}: {e}")
+            return False
+        if data.get('params', {}) != self.params:
+            print(f"⚠️ [checkpoint] {self.path.name} was written for {data.get('params')}, not {self.params}; starting over")
+            self.clear()
+            return False
+        self.results = data.get('results', [])
+        self.seen_ids = set(data.get('seen_ids', []))
+        self.position = data.get('position', {})
+        self.resumed = True
+        print(f"✅ [checkpoint] resuming {self.path.name}: {len(self.results)} results, {len(self.seen_ids)} seen")
+        return True
+
+    def save(self, results=None, seen_ids=None, **position):
+        """Write the current state atomically (tmp file + rename), so a crash mid-write keeps the old one."""
+        if results is not None:
+            self.results = results
+        if seen_ids is not None:
+            self.seen_ids = seen_ids
+        self.position.update(position)
+        payload = {
+            'saved_at': datetime.now(),
+            'params': self.params,
+            'results': self.results,
+            'seen_ids': self.seen_ids,
+            'position': self.position,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, default=_encode)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def clear(self):
+        """Remove the checkpoint once the crawl has finished."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
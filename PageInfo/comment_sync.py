@@ -0,0 +1,104 @@
+# PageInfo/comment_sync.py
+"""
+Incremental comment refresh for comment dashboards.
+
+Every stored FacebookComment has a ``comment_id`` (Facebook's id, read from
+the comment's time link) and a ``fingerprint``: sha1 of author + text. The
+fingerprint leaves the timestamp out: the same comment can show "3 ชม." on
+one visit and its full date on the next (when the hover tooltip works), so
+it would not hash the same twice. A refresh works like this:
+
+1. ``known_keys`` passes the author+text keys of the dashboard's stored
+   comments to the scraper.
+2. The thread is sorted newest first, so expansion stops at the first
+   known comment (see fb_comment_extract.expand_all).
+3. ``save_new_comments`` drops scraped comments whose ``comment_id`` is
+   stored, matches the rest by fingerprint against rows without one (saved
+   before ids were read, or scraped without a time link) and bulk-inserts
+   only the delta.
+
+Duplicates count: a person who posted the same text twice keeps both rows.
+"""
+import hashlib
+
+from django.utils import timezone
+
+from .fb_comment_extract import comment_key
+from .metrics import parse_count
+from .models import FacebookComment
+
+# จำนวน key สูงสุดที่ส่งให้ scraper (คอมเมนต์ล่าสุดก่อน)
+MAX_KNOWN_KEYS = 5000
+
+
+def comment_fingerprint(author, content):
+    return hashlib.sha1(comment_key(author, content).encode('utf-8')).hexdigest()
+
+
+def known_keys(dashboard, limit=MAX_KNOWN_KEYS):
+    """comment_key of the dashboard's stored comments, for the scraper's early stop."""
+    rows = (
+        FacebookComment.objects.filter(dashboard=dashboard)
+        .order_by('-id')
+        .values_list('author', 'content')[:limit]
+    )
+    return list({comment_key(author, content) for author, content in rows})
+
+
+def save_new_comments(dashboard, post_url, comments, extra=None, batch_size=500):
+    """
+    Insert the comments of ``comments`` (scraper dicts) that the dashboard
+    does not have yet. ``liked``/``shared`` come from fb_activity.match_activity;
+    ``extra(comment) -> dict`` adds other per-row fields. Returns the created
+    FacebookComment rows.
+    """
+    stored_ids = set()
+    by_fingerprint = {}  # fingerprint -> [(row id, comment_id)] ของแถวที่เก็บแล้ว
+    for row_id, comment_id, fingerprint in (
+        FacebookComment.objects.filter(dashboard=dashboard).values_list('id', 'comment_id', 'fingerprint')
+    ):
+        if comment_id:
+            stored_ids.add(comment_id)
+        by_fingerprint.setdefault(fingerprint, []).append((row_id, comment_id))
+
+    rows = []
+    claimed = []  # แถวเก่าที่ยังไม่มี comment_id: เติมให้ รอบหน้าจะเทียบด้วย id ได้เลย
+    for c in comments:
+        comment_id = c.get("comment_id") or ''
+        fingerprint = comment_fingerprint(c.get("author"), c.get("content"))
+        if comment_id in stored_ids:
+            continue
+        candidates = by_fingerprint.get(fingerprint, [])
+        # มี id: จับคู่ได้เฉพาะแถวที่ไม่มี id (แถวที่มี id อื่นคือคนละคอมเมนต์แม้ข้อความเหมือนกัน)
+        match = next((i for i, (_, stored_id) in enumerate(candidates) if not (comment_id and stored_id)), None)
+        if comment_id:
+            stored_ids.add(comment_id)
+        if match is not None:
+            row_id, stored_id = candidates.pop(match)
+            if comment_id and not stored_id:
+                claimed.append(FacebookComment(id=row_id, comment_id=comment_id))
+            continue
+        rows.append(FacebookComment(
+            post_url=post_url,
+            dashboard=dashboard,
+            author=c.get("author"),
+            profile_img_url=c.get("profile_img_url"),
+            content=c.get("content") or '',
+            reaction=c.get("reaction"),
+            reaction_count=parse_count(c.get("reaction")),  # bulk_create ไม่ผ่าน save()
+            timestamp_text=c.get("timestamp_text"),
+            image_url=c.get("image_url"),
+            reply=c.get("reply"),
+            comment_id=comment_id,
+            fingerprint=fingerprint,
+            author_profile_id=c.get("author_profile_id") or '',
+            liked=bool(c.get("liked")),
+            shared=bool(c.get("shared")),
+            **(extra(c) if extra else {}),
+        ))
+
+    FacebookComment.objects.bulk_create(rows, batch_size=batch_size)
+    FacebookComment.objects.bulk_update(claimed, ['comment_id'], batch_size=batch_size)
+    dashboard.comments_synced_at = timezone.now()
+    dashboard.save(update_fields=['comments_synced_at'])
+    return rows
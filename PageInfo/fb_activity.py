@@ -0,0 +1,101 @@
+# PageInfo/fb_activity.py
+"""
+Activity pipeline: comments, likes and shares of one Facebook post.
+
+The three scrapers, plus the post screenshot (post_screenshots.py), run at
+the same time as tabs of one logged-in browser context. A dashboard therefore costs one Chromium start and one session
+lease, and takes as long as the slowest of the three (usually comments).
+A tab that fails does not stop the others. Its part is left empty and the
+error is listed in ``errors``.
+
+``match_activity`` then marks each comment ``liked`` / ``shared`` by joining
+the commenter's profile id against hash sets of the likers' and sharers'
+profile ids. Display names are only a fallback for comments whose author
+link had no readable id (normalized like seeding names).
+
+    result = await run_activity_scraper(post_url)
+    result['comments'], result['likes'], result['shares']
+"""
+import asyncio
+import time
+
+from playwright.async_api import async_playwright
+
+from .fb_comment import FBCommentScraper
+from .fb_like import FBLikeScraper
+from .fb_share import FBShareScraper
+from .post_screenshots import capture_post_screenshot
+from .seeding_utils import normalize_author
+from .sessions import load_cookies, session_pool
+
+
+def people_keys(people):
+    """(profile ids, normalized names) of a like/share list, for set lookups."""
+    ids = {p['profile_id'] for p in people if p.get('profile_id')}
+    names = {normalize_author(p.get('name')) for p in people} - {''}
+    return ids, names
+
+
+def match_activity(comments, likes, shares):
+    """Set ``liked`` / ``shared`` on every comment dict in place and return ``comments``."""
+    like_ids, like_names = people_keys(likes)
+    share_ids, share_names = people_keys(shares)
+    for c in comments:
+        profile_id = c.get('author_profile_id')
+        if profile_id:
+            c['liked'] = profile_id in like_ids
+            c['shared'] = profile_id in share_ids
+        else:
+            name = normalize_author(c.get('author'))
+            c['liked'] = bool(name) and name in like_names
+            c['shared'] = bool(name) and name in share_names
+    return comments
+
+
+async def scrape_activity(post_url, cookies_path, headless=False, known_keys=None):
+    started = time.monotonic()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            context = await browser.new_context()
+            await context.add_cookies(load_cookies(cookies_path))
+            comment_result, likes, shares, screenshot = await asyncio.gather(
+                FBCommentScraper(post_url, cookies_path=cookies_path, known_keys=known_keys).scrape(context),
+                FBLikeScraper(post_url, cookies_path=cookies_path).scrape(context),
+                FBShareScraper(post_url, cookies_path=cookies_path).scrape(context),
+                capture_post_screenshot(context, post_url),
+                return_exceptions=True,
+            )
+        finally:
+            await browser.close()
+
+    errors = {}
+    for name, value in (("comments", comment_result), ("likes", likes), ("shares", shares)):
+        if isinstance(value, Exception):
+            print(f"❌ activity {name} failed: {value!r}")
+            errors[name] = str(value)
+    if "comments" in errors:
+        comment_result = {}
+    likes = [] if "likes" in errors else likes
+    shares = [] if "shares" in errors else shares
+    result = {
+        "post_screenshot_path": None if isinstance(screenshot, Exception) else screenshot,
+        "comments": match_activity(comment_result.get("comments", []), likes, shares),
+        "expand_seconds": comment_result.get("expand_seconds"),
+        "likes": likes,
+        "shares": shares,
+        "errors": errors,
+        "elapsed": round(time.monotonic() - started, 2),
+    }
+    print(f"✅ activity: {len(result['comments'])} comments, {len(result['likes'])} likes, "
+          f"{len(result['shares'])} shares in {result['elapsed']}s")
+    return result
+
+
+async def run_activity_scraper(post_url, headless=False, known_keys=None):
+    # ✅ ยืม account เดียวจาก session pool ให้ทั้ง 3 tab
+    with session_pool().lease('facebook') as session:
+        result = await scrape_activity(post_url, session.path, headless=headless, known_keys=known_keys)
+        if len(result["errors"]) == 3:
+            session.report('failure')
+        return result
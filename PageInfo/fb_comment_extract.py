@@ -0,0 +1,329 @@
+# PageInfo/fb_comment_extract.py
+"""
+In-page expansion and extraction of a Facebook comment thread.
+
+``expand_all`` opens the whole thread from inside the page. Each round it
+clicks every pending "ดูความคิดเห็นเพิ่มเติม" / "ดูการตอบกลับ" button (and
+optionally "ดูเพิ่มเติม") in one batch. It then waits until a
+MutationObserver sees the DOM stay quiet for ``quiet_ms``. When no buttons
+are left and scrolling to the bottom loads nothing new, the thread is
+complete. There are no fixed sleeps per click and no fixed number of
+unchanged rounds. It returns the rounds, clicks, comment count and elapsed
+time.
+
+With ``stop_keys`` (see ``comment_key``) expansion is incremental. The
+thread is sorted newest first, so once a top-level comment we already
+stored is loaded, no more "more comments" pages are requested, and replies
+are only opened under comments that are new.
+
+``extract_comments`` reads the whole tree in a single ``page.evaluate``:
+author, avatar, text (emoji ``alt`` kept), attached image, time link and
+reaction count, plus the replies nested under each comment. The author's
+profile link becomes ``author_profile_id`` (fb_people_list.profile_id_from_url)
+and the time link's ``?comment_id=`` / ``&reply_comment_id=`` becomes
+``comment_id``, Facebook's own id of the comment. It returns the
+same flat list of dicts the comment scrapers (fb_comment.py,
+fb_comment_info.py) always returned, with each comment before its replies.
+
+Fields are read from the comment's own part of the DOM only (not from replies
+nested inside it). Each comment therefore appears once, with its own
+timestamp and reaction count.
+"""
+import time
+from urllib.parse import parse_qs, urlparse
+
+from .fb_people_list import profile_id_from_url
+
+# ส่วนที่ใช้ร่วมกันของทั้ง 2 script: หา element ของคอมเมนต์ และอ่านข้อความแบบเดียวกัน
+_JS_HELPERS = r"""
+    const ARTICLE = 'div[role="article"][aria-label]';
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    // เฉพาะ element ของคอมเมนต์นี้เอง ไม่รวมที่อยู่ใน reply ซ้อนข้างใน
+    const own = (root, selector) =>
+        Array.from(root.querySelectorAll(selector)).filter((el) => el.closest(ARTICLE) === root);
+    const childArticles = (root) =>
+        Array.from(root.querySelectorAll(ARTICLE)).filter((el) => el.parentElement.closest(ARTICLE) === root);
+    const topArticles = () =>
+        Array.from(document.querySelectorAll(ARTICLE)).filter((el) => !el.parentElement.closest(ARTICLE));
+
+    const contentText = (el) => {
+        if (!el) return '';
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT);
+        for (let node = walker.currentNode; node; node = walker.nextNode()) {
+            if (node.nodeType === Node.TEXT_NODE) parts.push(node.textContent);
+            else if (node.tagName === 'IMG' && node.alt) parts.push(node.alt);
+            else if (contentMode === 'tokens' && node.tagName === 'A') parts.push(node.textContent);
+        }
+        const cleaned = parts.map((p) => p.trim()).filter(Boolean);
+        return contentMode === 'tokens' ? [...new Set(cleaned)].join(' ') : cleaned.join('\n');
+    };
+    const authorLinkOf = (div) => own(div, 'a[aria-hidden="false"]')[0];
+    const authorOf = (div) => {
+        const el = authorLinkOf(div);
+        return el ? el.innerText.trim() : null;
+    };
+    const contentOf = (div) => contentText(own(div, 'div[dir="auto"]')[0]);
+    // ต้องตรงกับ comment_key() ฝั่ง Python
+    const normalize = (text) => (text || '').replace(/\s+/g, ' ').trim();
+    const keyOf = (div) => `${normalize(authorOf(div))}\n${normalize(contentOf(div))}`;
+"""
+
+JS_EXPAND_ALL = r"""async ({seeMore, quietMs, roundMs, maxMs, contentMode, stopKeys}) => {""" + _JS_HELPERS + r"""
+    const started = performance.now();
+    const clickCounts = new Map();
+    const known = new Set(stopKeys || []);
+    const knownArticles = new WeakMap();
+    let reachedKnown = false;
+
+    const isKnown = (article) => {
+        if (!knownArticles.has(article)) knownArticles.set(article, known.has(keyOf(article)));
+        return knownArticles.get(article);
+    };
+    const checkReachedKnown = () => {
+        if (!reachedKnown && known.size) reachedKnown = topArticles().some(isKnown);
+        return reachedKnown;
+    };
+
+    const ownText = (el) => Array.from(el.childNodes)
+        .filter((n) => n.nodeType === Node.TEXT_NODE)
+        .map((n) => n.textContent)
+        .join('');
+    const isMoreComments = (text) =>
+        text.includes('ดูความคิดเห็นเพิ่มเติม') || text.includes('ดูความเห็นเพิ่มเติม');
+    const isExpander = (text) =>
+        isMoreComments(text)
+        || (text.includes('ดู') && text.includes('ตอบกลับ'))
+        || (seeMore && text.includes('ดูเพิ่มเติม'));
+
+    const pendingButtons = () => {
+        const buttons = new Set();
+        for (const el of document.querySelectorAll('span, div[role="button"]')) {
+            const text = ownText(el);
+            if (!isExpander(text)) continue;
+            // ต้องอยู่ในปุ่มจริง กันไปกดข้อความคอมเมนต์ที่บังเอิญมีคำว่า "ดู...ตอบกลับ"
+            const button = el.closest('[role="button"]');
+            if (!button) continue;
+            // ปุ่มเดิมที่กดไปแล้วหลายรอบแต่ยังไม่หาย = กดไม่ติด ข้ามไป
+            if ((clickCounts.get(button) || 0) >= 3) continue;
+            if (button.getAttribute('aria-disabled') === 'true') continue;
+            if (reachedKnown) {
+                // incremental: เจอคอมเมนต์ที่เก็บไว้แล้ว ไม่ต้องโหลดคอมเมนต์เก่ากว่านี้/reply ของคอมเมนต์เดิม
+                if (isMoreComments(text)) continue;
+                let top = button.closest(ARTICLE);
+                while (top && top.parentElement.closest(ARTICLE)) top = top.parentElement.closest(ARTICLE);
+                if (top && isKnown(top)) continue;
+            }
+            buttons.add(button);
+        }
+        return [...buttons];
+    };
+
+    // รอจน DOM นิ่ง quietMs (ไม่มี mutation) หรือครบ roundMs
+    const quiescence = () => new Promise((resolve) => {
+        let mutations = 0;
+        let timer = null;
+        const finish = () => {
+            observer.disconnect();
+            clearTimeout(timer);
+            clearTimeout(cap);
+            resolve(mutations);
+        };
+        const arm = () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                // ยังมี spinner ของคอมเมนต์อยู่ = request ยังไม่กลับ รอต่อ
+                if (document.querySelector(`${ARTICLE} [role="progressbar"]`)) arm();
+                else finish();
+            }, quietMs);
+        };
+        const observer = new MutationObserver((records) => {
+            mutations += records.length;
+            arm();
+        });
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+        const cap = setTimeout(finish, roundMs);
+        arm();
+    });
+
+    let rounds = 0;
+    let clicks = 0;
+    let idleRounds = 0;
+    while (performance.now() - started < maxMs) {
+        rounds += 1;
+        checkReachedKnown();
+        const buttons = pendingButtons();
+        for (const button of buttons) {
+            clickCounts.set(button, (clickCounts.get(button) || 0) + 1);
+            try { button.click(); } catch (e) { /* ปุ่มหายไประหว่างกด */ }
+        }
+        clicks += buttons.length;
+        if (buttons.length) {
+            idleRounds = 0;
+            await quiescence();
+            continue;
+        }
+        if (reachedKnown) break;
+        // ไม่มีปุ่มเหลือ: เลื่อนลงล่างสุดเผื่อ FB lazy-load คอมเมนต์ชุดถัดไป
+        const before = document.querySelectorAll(ARTICLE).length;
+        window.scrollTo(0, document.body.scrollHeight);
+        const mutations = await quiescence();
+        const after = document.querySelectorAll(ARTICLE).length;
+        if (after === before && !pendingButtons().length) {
+            idleRounds += 1;
+            if (idleRounds >= 2 || mutations === 0) break;
+        } else {
+            idleRounds = 0;
+        }
+    }
+    return {
+        rounds,
+        clicks,
+        comments: document.querySelectorAll(ARTICLE).length,
+        reached_known: reachedKnown,
+        elapsed_ms: Math.round(performance.now() - started),
+        timed_out: performance.now() - started >= maxMs,
+    };
+}"""
+
+JS_EXTRACT_COMMENTS = r"""async ({contentMode, hoverTimestamps}) => {""" + _JS_HELPERS + r"""
+    // tooltip วันที่เต็มของ FB จะโผล่เมื่อ hover จึงยิง pointer/mouse event ในหน้าแทนการ hover ทีละครั้งจาก Python
+    let hoverFailures = 0;
+    const tooltipText = async (el) => {
+        const fire = (types) => types.forEach((type) => el.dispatchEvent(
+            type.startsWith('pointer')
+                ? new PointerEvent(type, {bubbles: true})
+                : new MouseEvent(type, {bubbles: true})
+        ));
+        fire(['pointerover', 'pointerenter', 'mouseover', 'mouseenter']);
+        let text = null;
+        for (let i = 0; i < 20 && !text; i++) {
+            await sleep(50);
+            const tip = document.querySelector('div[role="tooltip"]');
+            if (tip && tip.innerText.trim()) text = tip.innerText.trim();
+        }
+        fire(['pointerout', 'pointerleave', 'mouseout', 'mouseleave']);
+        for (let i = 0; i < 10 && document.querySelector('div[role="tooltip"]'); i++) await sleep(50);
+        return text;
+    };
+
+    const extract = async (div) => {
+        const timeLinks = own(div, 'a[href*="?comment_id="]');
+        const timeEl = timeLinks[timeLinks.length - 1];
+        let timestamp = null;
+        if (timeEl) {
+            if (hoverTimestamps && hoverFailures < 3) {
+                timestamp = await tooltipText(timeEl);
+                hoverFailures = timestamp ? 0 : hoverFailures + 1;
+            }
+            timestamp = timestamp || timeEl.textContent.trim() || null;
+        }
+        const reactionText = own(div, 'span.x1fcty0u.x1sibtaa.xuxw1ft')
+            .map((span) => span.innerText.trim())
+            .find((text) => /^\d+$/.test(text));
+
+        const replies = [];
+        for (const reply of childArticles(div)) replies.push(await extract(reply));
+
+        return {
+            author: authorOf(div),
+            author_url: authorLinkOf(div) ? authorLinkOf(div).getAttribute('href') : null,
+            profile_img_url: own(div, 'image')
+                .map((tag) => tag.getAttribute('xlink:href') || tag.getAttribute('href'))
+                .find((href) => href && href.includes('fbcdn.net')) || null,
+            content: contentOf(div),
+            reaction: reactionText ? `ถูกใจ ${reactionText}` : null,
+            timestamp_text: timestamp,
+            comment_url: timeEl ? timeEl.getAttribute('href') : null,
+            image_url: own(div, 'img')
+                .map((img) => img.getAttribute('src'))
+                .find((src) => src && src.includes('scontent')) || null,
+            replies,
+        };
+    };
+
+    const tree = [];
+    for (const div of topArticles()) {
+        try {
+            tree.push(await extract(div));
+        } catch (e) {
+            console.warn('extract comment failed', e);
+        }
+    }
+    return tree;
+}"""
+
+
+def _normalize(text):
+    return ' '.join((text or '').split())
+
+
+def comment_key(author, content):
+    """Key the page script computes for a loaded comment (author + text, whitespace-normalized)."""
+    return f"{_normalize(author)}\n{_normalize(content)}"
+
+
+def comment_id_from_url(url):
+    """Facebook's id of a comment from its time link (the reply's own id for replies), '' if absent."""
+    query = parse_qs(urlparse(url or '').query)
+    return (query.get('reply_comment_id') or query.get('comment_id') or [''])[0]
+
+
+def flatten_comments(tree):
+    """``[{..., 'replies': [...]}]`` -> flat list, each comment followed by its replies."""
+    comments = []
+    for node in tree:
+        replies = node.pop('replies', [])
+        node['author_profile_id'] = profile_id_from_url(node.pop('author_url', None))
+        node['comment_id'] = comment_id_from_url(node.pop('comment_url', None))
+        comments.append(node)
+        comments.extend(flatten_comments(replies))
+    return comments
+
+
+async def extract_comments(page, content_mode='lines', hover_timestamps=False):
+    """
+    All loaded comments of ``page`` in one round trip.
+
+    content_mode: 'lines' = text pieces joined by newlines (emoji alt inline),
+                  'tokens' = unique text/link/emoji tokens joined by spaces.
+    hover_timestamps: read the full-date tooltip of each time link (falls back
+                      to the link text such as "2 ชม." when no tooltip shows up).
+    """
+    tree = await page.evaluate(
+        JS_EXTRACT_COMMENTS,
+        {'contentMode': content_mode, 'hoverTimestamps': hover_timestamps},
+    )
+    return flatten_comments(tree)
+
+
+async def expand_all(page, see_more=False, quiet_ms=800, round_seconds=15, max_seconds=600,
+                     content_mode='lines', stop_keys=None):
+    """
+    Open every collapsed comment/reply of the thread on ``page``.
+
+    quiet_ms: how long the DOM must stay unchanged before a round counts as loaded.
+    round_seconds: cap on the wait after one batch of clicks.
+    max_seconds: cap on the whole expansion.
+    stop_keys: ``comment_key`` values of comments already stored; loading stops
+               at the first of them (pass the same content_mode as extraction).
+
+    Returns ``{'rounds', 'clicks', 'comments', 'reached_known', 'elapsed_ms', 'timed_out', 'seconds'}``.
+    """
+    started = time.monotonic()
+    stats = await page.evaluate(JS_EXPAND_ALL, {
+        'seeMore': see_more,
+        'quietMs': quiet_ms,
+        'roundMs': round_seconds * 1000,
+        'maxMs': max_seconds * 1000,
+        'contentMode': content_mode,
+        'stopKeys': list(stop_keys or []),
+    })
+    stats['seconds'] = round(time.monotonic() - started, 2)
+    notes = ''.join([
+        ' (reached stored comments)' if stats['reached_known'] else '',
+        ' (timed out)' if stats['timed_out'] else '',
+    ])
+    print(f"⏱️ Expanded {stats['comments']} comments in {stats['seconds']}s "
+          f"({stats['clicks']} clicks, {stats['rounds']} rounds){notes}")
+    return stats
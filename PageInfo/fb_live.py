@@ -9,6 +9,9 @@ from typing import Any, Optional, List, Tuple
 from playwright.async_api import Playwright, async_playwright, Browser, Page, BrowserContext
 from datetime import datetime, timedelta
 
+from .ratelimit import throttled_goto
+from .sessions import load_cookies
+
 
 class FBLiveScraperAsync:
     def __init__(self, cookie_file: str, headless: bool = False,
@@ -22,6 +25,7 @@ class FBLiveScraperAsync:
         self.page_url = page_url
         self.cutoff_dt = cutoff_dt
         self.batch_size = batch_size
+        self.login_failed = False  # True เมื่อ cookie ใช้ login ไม่ได้ (เช่นโดน checkpoint)
 
         # JavaScript snippet to fetch posts (push all, let Python filter by cutoff)
         JS_FETCH_POSTS = r"""(cutoffMs) => {
@@ -139,16 +143,8 @@ class FBLiveScraperAsync:
         return await page.evaluate(self.JS_FETCH_POSTS, cutoff_ms)
 
     async def _process_cookie(self) -> List[dict]:
-        raw = json.loads(Path(self.cookie_file).read_text())
-        for cookie in raw:
-            s = cookie.get("sameSite")
-            if s is None or (isinstance(s, str) and s.lower() == "no_restriction"):
-                cookie["sameSite"] = "None"
-            elif isinstance(s, str) and s.lower() == "lax":
-                cookie["sameSite"] = "Lax"
-            elif isinstance(s, str) and s.lower() == "strict":
-                cookie["sameSite"] = "Strict"
-        return raw
+        # ✅ อ่าน + normalize sameSite ครั้งเดียวต่อไฟล์ (cache ใน PageInfo/sessions.py)
+        return load_cookies(self.cookie_file)
 
     async def _confirm_login(self, page: Page) -> Optional[str]:
         try:
@@ -245,7 +241,7 @@ class FBLiveScraperAsync:
         # Initial navigation & load
         if not seen_ids:
             video_page_url = f"{self.page_url.rstrip('/')}/live_videos"
-            await page.goto(video_page_url)
+            await throttled_goto(page, video_page_url)
         # Try waiting for at least one live video container to appear.  On
         # pages that have no live videos this selector will never exist
         # which previously resulted in a TimeoutError being raised.  To
@@ -322,7 +318,7 @@ class FBLiveScraperAsync:
         try:
             # print(f"[get_post_detail] Opening detail page for: {post_url}")
             detail_page = await context.new_page()
-            await detail_page.goto(post_url)
+            await throttled_goto(detail_page, post_url)
             # Click the comment button to trigger URL change back to /videos/
             await detail_page.wait_for_selector('div[aria-label="แสดงความคิดเห็น"]', timeout=5000)
             await detail_page.click('div[aria-label="แสดงความคิดเห็น"]', force=True)
@@ -677,11 +673,12 @@ class FBLiveScraperAsync:
             # 1) Confirm login
             # ---------------------
             self.page = await self.context.new_page()
-            await self.page.goto("https://www.facebook.com/")
+            await throttled_goto(self.page, "https://www.facebook.com/")
             username = await self._confirm_login(self.page)
             print(f"Login as: {username or 'unknown'}")
             if not username:
                 print("Login failed, stopping.")
+                self.login_failed = True
                 return
 
             # ---------------------
@@ -689,7 +686,7 @@ class FBLiveScraperAsync:
             # ---------------------
             if self.page_url:
                 try:
-                    await self.page.goto(self.page_url)
+                    await throttled_goto(self.page, self.page_url)
                     title_container = self.page.locator(
                         "div.x9f619.x1n2onr6.x1ja2u2z.x78zum5.xdt5ytf.x2lah0s.x193iq5w.x1cy8zhl.xexx8yu"
                     ).first
@@ -700,7 +697,7 @@ class FBLiveScraperAsync:
                     print(f"Cutoff datetime: {self.cutoff_dt}")
 
                     video_page_url = f"{self.page_url.rstrip('/')}/live_videos"
-                    await self.page.goto(video_page_url)
+                    await throttled_goto(self.page, video_page_url)
                 except Exception as e:
                     print(f"Failed to open Facebook Page: {e}")
                     return
@@ -1,40 +1,149 @@
 from pprint import pprint
-from ftplib import FTP
-from io import BytesIO
-from curl_cffi import requests
 from selectolax.parser import HTMLParser
 import json
-import sys
 import re
-from typing import Optional, Dict
+import threading
+from collections import Counter
+from typing import Optional, Dict, List
 from urllib.parse import urlparse
 
-def upload_to_sghost(image_url: str) -> str:
-    from urllib.parse import urlparse
-    import requests
-    import os
+import httpx
 
-    FTP_HOST = "ftp.taechins18.sg-host.com"
-    FTP_USER = "admin@taechins18.sg-host.com"
-    FTP_PASS = "#),51@37f]1i"
-    FTP_PATH = "taechins18.sg-host.com/public_html/image"
-    BASE_URL = "https://taechins18.sg-host.com/image/"
+try:
+    import orjson
+except ImportError:  # orjson เป็น optional ถ้าไม่มีก็ใช้ json ปกติ
+    orjson = None
 
-    filename = os.path.basename(urlparse(image_url).path)
+from .http_client import get_client, run_sync
 
-    ftp = FTP()
-    ftp.connect(FTP_HOST, 21)
-    ftp.login(FTP_USER, FTP_PASS)
-    ftp.cwd(FTP_PATH)
 
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(image_url, headers=headers)
-    response.raise_for_status()
+# ---------------------------------------------------------------------------
+# Errors / result
+# ---------------------------------------------------------------------------
 
-    ftp.storbinary(f"STOR {filename}", BytesIO(response.content))
-    ftp.quit()
+class FacebookScrapeError(Exception):
+    """Base error of this module; ``reason`` is the key used by the failure counter."""
+    reason = 'error'
+
+    def __init__(self, message: str, url: Optional[str] = None):
+        super().__init__(message)
+        self.url = url
+
+
+class FetchError(FacebookScrapeError):
+    """Network failure or non-2xx response."""
+    reason = 'fetch'
+
+    def __init__(self, message: str, url: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message, url)
+        self.status_code = status_code
+        if status_code in (401, 403, 429):
+            self.reason = 'blocked'
+        elif status_code is not None:
+            self.reason = 'http_error'
+        else:
+            self.reason = 'network'
+
+
+class DataNotFoundError(FacebookScrapeError):
+    """The page loaded but the expected JSON/HTML block is not in it."""
+    reason = 'data_not_found'
+
+
+class JSONParseError(FacebookScrapeError):
+    """The expected script block was found but is not valid JSON."""
+    reason = 'json_decode'
+
+
+# จำนวนครั้งที่ scrape ล้มเหลว แยกตาม reason (ต่อ process)
+_failure_counts = Counter()
+_failure_lock = threading.Lock()
+
+
+def record_failure(error: FacebookScrapeError) -> None:
+    with _failure_lock:
+        _failure_counts[error.reason] += 1
+    print(f"❌ [fb_page_info:{error.reason}] {error}")
+
+
+def failure_counts() -> Dict[str, int]:
+    """Snapshot of ``{reason: count}`` since the process started."""
+    with _failure_lock:
+        return dict(_failure_counts)
+
+
+class ScrapeResult(dict):
+    """
+    The scraped fields (a plain dict, so existing ``result['page_id']`` code
+    keeps working) plus the errors hit along the way. A result can be partial:
+    e.g. general info parsed but the profile intro block was missing.
+    An empty result is falsy, like the ``None`` returned before.
+    """
+
+    def __init__(self, data: Optional[dict] = None, errors: Optional[List[FacebookScrapeError]] = None):
+        super().__init__(data or {})
+        self.errors = list(errors or [])
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def partial(self) -> bool:
+        return bool(self) and bool(self.errors)
+
+    def add_error(self, error: FacebookScrapeError) -> None:
+        record_failure(error)
+        self.errors.append(error)
+
+def _loads(text: str):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+_JSON_ERRORS = (json.JSONDecodeError, orjson.JSONDecodeError) if orjson is not None else (json.JSONDecodeError,)
+
+
+class ScriptIndex:
+    """
+    One pass over the ``<script type="application/json">`` blocks of a page.
+
+    ``find(keys)`` scans each block's text once for all wanted keys and remembers
+    which block holds each key; ``get(key)`` decodes only that block (once, even
+    when several keys live in the same block).
+    """
+
+    def __init__(self, html_content: HTMLParser):
+        self._blocks = [
+            script.text(strip=True)
+            for script in html_content.css('script[type="application/json"]')
+        ]
+        self._key_block: Dict[str, int] = {}
+        self._decoded: Dict[int, dict] = {}
+
+    def find(self, keys) -> None:
+        pending = [key for key in keys if key not in self._key_block]
+        for index, text in enumerate(self._blocks):
+            if not pending:
+                break
+            found = [key for key in pending if key in text]
+            for key in found:
+                self._key_block[key] = index
+            pending = [key for key in pending if key not in found]
+
+    def get(self, key: str) -> dict:
+        self.find([key])
+        index = self._key_block.get(key)
+        if index is None:
+            raise DataNotFoundError(f"No valid data found for key '{key}' in the HTML page.")
+        if index not in self._decoded:
+            try:
+                self._decoded[index] = _loads(self._blocks[index])
+            except _JSON_ERRORS as e:
+                raise JSONParseError(f"Error decoding JSON for key '{key}': {e}") from e
+        return self._decoded[index]
 
-    return f"{BASE_URL}{filename}"
 
 class RequestHandler:
     def __init__(self):
@@ -55,43 +164,59 @@ class RequestHandler:
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
         }
 
-    def fetch_html(self, url: str) -> str:
+    def fetch_html(self, url: str) -> HTMLParser:
+        return run_sync(self.fetch_html_async(url))
+
+    async def fetch_html_async(self, url: str) -> HTMLParser:
+        """Fetch ``url`` and parse it; raises FetchError instead of exiting."""
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return HTMLParser(response.text)
-        except Exception as e:
-            print(f"Error fetching the page [{url}]: {e}")
-            sys.exit(1)
+            response = await get_client().get(url, headers=self.headers)
+        except httpx.HTTPError as e:
+            raise FetchError(f"Error fetching the page [{url}]: {e!r}", url=url) from e
+        if response.is_error:
+            raise FetchError(
+                f"Error fetching the page [{url}]: HTTP {response.status_code}",
+                url=url, status_code=response.status_code,
+            )
+        return HTMLParser(response.text)
 
     def parse_json_from_html(self, html_content: HTMLParser, key_to_find: str) -> dict:
-        try:
-            parser = html_content
-            for script in parser.css('script[type="application/json"]'):
-                script_text = script.text(strip=True)
-                if key_to_find in script_text:
-                    return json.loads(script_text)
-            print(f"No valid data found for key '{key_to_find}' in the HTML page.")
-            sys.exit(1)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON for key '{key_to_find}': {e}")
-            sys.exit(1)
-        except Exception as e:
-            print(f"Unexpected error parsing JSON for key '{key_to_find}': {e}")
-            sys.exit(1)
+        """Return the first JSON script block containing ``key_to_find``."""
+        return ScriptIndex(html_content).get(key_to_find)
+
+    def parse_json_sections(self, html_content: HTMLParser, keys) -> tuple:
+        """
+        Locate every key in one scan of the page's script blocks.
+        Returns ``({key: json}, [errors])`` — a missing or broken section does
+        not stop the others from being returned.
+        """
+        index = ScriptIndex(html_content)
+        index.find(keys)
+        sections, errors = {}, []
+        for key in keys:
+            try:
+                sections[key] = index.get(key)
+            except FacebookScrapeError as e:
+                errors.append(e)
+        return sections, errors
 
 
 class PageInfo:
     def __new__(cls, url: str):
         # Instantiate and immediately scrape, returning the data dict
+        instance = cls._prepare(url)
+        # Perform the scrape and return the resulting dict
+        return instance.scrape()
+
+    @classmethod
+    def _prepare(cls, url: str) -> "PageInfo":
+        # Initialize required attributes for scrape (without running it)
         instance = super().__new__(cls)
-        # Initialize required attributes for scrape
         instance.url = cls.normalize_url(url)
         instance.request_handler = RequestHandler()
         instance.general_info = {}
         instance.profile_info = {}
-        # Perform the scrape and return the resulting dict
-        return instance.scrape()
+        return instance
 
     def __init__(self, url: str):
         # __init__ is left for clarity but will not be called due to __new__ returning a dict
@@ -110,33 +235,42 @@ class PageInfo:
             return base_url + input_url
         return input_url
 
-    def scrape(self) -> Optional[Dict[str, Optional[str]]]:
-        html_content = self.request_handler.fetch_html(self.url)
+    def scrape(self) -> ScrapeResult:
+        return run_sync(self.scrape_async())
 
-        # Parse general information
-        general_info_json = self.request_handler.parse_json_from_html(
-            html_content, "username_for_profile"
+    async def scrape_async(self) -> ScrapeResult:
+        try:
+            html_content = await self.request_handler.fetch_html_async(self.url)
+        except FetchError as e:
+            result = ScrapeResult()
+            result.add_error(e)
+            return result
+        return self.parse(html_content)
+
+    def parse(self, html_content: HTMLParser) -> ScrapeResult:
+        result = ScrapeResult()
+
+        # ✅ สแกน script ครั้งเดียวได้ทุก section ส่วนไหนพังก็ยังได้ข้อมูลส่วนที่เหลือ
+        sections, errors = self.request_handler.parse_json_sections(
+            html_content, ["username_for_profile", "profile_tile_items"]
         )
-        self.general_info = self.extract_general_info(general_info_json)
+        for e in errors:
+            e.url = self.url
+            result.add_error(e)
 
-        # Parse profile information
-        profile_info_json = self.request_handler.parse_json_from_html(
-            html_content, "profile_tile_items"
-        )
-        self.profile_info = self.extract_profile_info(profile_info_json)
+        if "username_for_profile" in sections:
+            self.general_info = self.extract_general_info(sections["username_for_profile"])
+        if "profile_tile_items" in sections:
+            self.profile_info = self.extract_profile_info(sections["profile_tile_items"])
 
         self.meta_html_info = self.extract_html_data(html_content)
 
-        # Combine both into one dictionary
-        if self.general_info and self.profile_info:
-            combined_info = {**self.general_info, **self.meta_html_info, **self.profile_info}
-            return combined_info
-        elif self.general_info:
-            return self.general_info
-        elif self.profile_info:
-            return self.profile_info
-        else:
-            return None
+        # Combine into one dictionary (meta tags only count alongside the general info)
+        if self.general_info:
+            result.update(self.general_info)
+            result.update(self.meta_html_info)
+        result.update(self.profile_info)
+        return result
 
     def extract_general_info(self, json_data: dict) -> Dict[str, Optional[str]]:
         general_info = {
@@ -185,13 +319,9 @@ class PageInfo:
                             or user.get("profilePicSmall", {}).get("uri")
                     )
 
+                    # URL จาก fbcdn หมดอายุได้: คนเรียก (import_pages / add_page / bulk_add_pages) mirror เป็นชุดหลังสร้างเพจ
                     if original_pic:
-                        try:
-                            uploaded_url = upload_to_sghost(original_pic)
-                            general_info["profile_pic"] = uploaded_url
-                        except Exception as e:
-                            print(f"❌ Failed to upload profile_pic to sg-host: {e}")
-                            general_info["profile_pic"] = original_pic
+                        general_info["profile_pic"] = original_pic
 
                     profile_social_contents = user.get(
                         "profile_social_context", {}
@@ -329,13 +459,18 @@ class PageInfo:
 class PageFollowers:
     def __new__(cls, page_id: str):
         # Instantiate and immediately scrape, returning the data dict
+        instance = cls._prepare(page_id)
+        # Perform the scrape and return the resulting dict
+        return instance.scrape()
+
+    @classmethod
+    def _prepare(cls, page_id: str) -> "PageFollowers":
+        # Initialize required attributes for scrape (without running it)
         instance = super().__new__(cls)
-        # Initialize required attributes for scrape
         instance.url = f'https://www.facebook.com/plugins/page.php?href=https%3A%2F%2Fwww.facebook.com%2F{page_id}&tabs=timeline&width=340&height=500&small_header=false&adapt_container_width=true&hide_cover=false&show_facepile=true&appId&locale=en_us'
         instance.request_handler = RequestHandler()
         instance.page_followers = {}
-        # Perform the scrape and return the resulting dict
-        return instance.scrape()
+        return instance
 
     def __init__(self, page_id: str):
         # __init__ is left for clarity but will not be called due to __new__ returning a dict
@@ -343,10 +478,21 @@ class PageFollowers:
         self.request_handler = RequestHandler()
         self.page_followers: Dict[str, Optional[str]] = {}
 
-    def scrape(self) -> Optional[Dict[str, Optional[str]]]:
-        # Fetch the plugin page HTML
-        html_content = self.request_handler.fetch_html(self.url)
+    def scrape(self) -> ScrapeResult:
+        return run_sync(self.scrape_async())
 
+    async def scrape_async(self) -> ScrapeResult:
+        # Fetch the plugin page HTML
+        try:
+            html_content = await self.request_handler.fetch_html_async(self.url)
+        except FetchError as e:
+            result = ScrapeResult()
+            result.add_error(e)
+            return result
+        return self.parse(html_content)
+
+    def parse(self, html_content: HTMLParser) -> ScrapeResult:
+        result = ScrapeResult()
         # Find the followers text element
         follower_div = html_content.css_first("div._1drq")
         if follower_div:
@@ -354,10 +500,22 @@ class PageFollowers:
             # Extract numeric part before "followers"
             match = re.search(r"([\d,]+)\s+followers", text, re.IGNORECASE)
             if match:
-                page_followers = {'page_followers_count':int(match.group(1).replace(",", ""))}
-                return page_followers
+                result['page_followers_count'] = int(match.group(1).replace(",", ""))
+                return result
+
+        result.add_error(DataNotFoundError("Followers count not found in the page plugin.", url=self.url))
+        return result
+
+
+
+async def fetch_page_info(url: str) -> ScrapeResult:
+    """Async version of ``PageInfo(url)`` using the shared HTTP client."""
+    return await PageInfo._prepare(url).scrape_async()
+
 
-        return None
+async def fetch_page_followers(page_id: str) -> ScrapeResult:
+    """Async version of ``PageFollowers(page_id)`` using the shared HTTP client."""
+    return await PageFollowers._prepare(page_id).scrape_async()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+# PageInfo/fb_people_list.py
+"""
+In-page reading of Facebook "people" dialogs: reactions ("คุณ และ คนอื่นๆ
+อีก xxx คน") and reshares ("คนที่แชร์ลิงก์นี้").
+
+These dialogs are virtualized lists. Facebook only keeps the rows near the
+viewport in the DOM and recycles the rest while you scroll, so the list can
+never be read in one pass at the end. ``collect_people`` runs the whole loop
+in a single ``evaluate`` on the dialog:
+
+1. read every profile link currently in the dialog in one DOM query and add
+   the unseen ones to a Map keyed by profile id,
+2. scroll the dialog's own scroll container to its bottom,
+3. wait until a MutationObserver sees the dialog stay quiet for ``quiet_ms``.
+
+It stops when the number of people reaches the total the dialog reports
+(``dialog_total``), or when ``stall_rounds`` rounds in a row at the bottom
+of the list bring no one new (twice as many while it can still scroll).
+Only an exact count is used as a total (``exact_count``). A rounded label
+such as "1.2K" can stand for up to 1,249 people, so it gives 0 and the loop
+runs until it stalls instead of stopping ~49 people short.
+Hidden or deactivated profiles are counted in the total but never listed.
+
+Each person is ``{'name', 'profile_id', 'profile_url'}``. ``profile_id`` is
+the numeric id (``profile.php?id=``, ``/people/.../<id>``, ``/user/<id>``) or
+the vanity username. It stays the same when a display name changes or two
+people share one, so commenters can be matched to likers/sharers exactly.
+"""
+import re
+import time
+from urllib.parse import parse_qs, urlparse
+
+# จำนวนเต็มแบบไม่ปัดเศษ ("57", "1,234") ที่ไม่มีหน่วยย่อตามหลัง ("1.2K", "2 พัน" ไม่นับ)
+_EXACT_COUNT = re.compile(
+    r'(?<![\d.,])(\d{1,3}(?:,\d{3})+|\d+)(?![\d.,]*\d)'
+    r'(?!\s*(?:[KkMmBb](?![a-z])|พัน|หมื่น|แสน|ล้าน|thousand|million|billion))'
+)
+
+RESERVED_PATHS = {
+    'photo', 'photo.php', 'photos', 'watch', 'groups', 'hashtag', 'story.php', 'permalink.php',
+    'events', 'pages', 'reel', 'reels', 'share', 'stories', 'posts', 'videos', 'help', 'login',
+    'privacy', 'policies', 'settings', 'notifications', 'messages', 'marketplace', 'friends', 'search',
+}
+
+# host ของลิงก์โปรไฟล์ (l.facebook.com / lm.facebook.com เป็นตัว redirect ลิงก์ภายนอก ไม่ใช่โปรไฟล์)
+PROFILE_HOSTS = {'facebook.com', 'www.facebook.com', 'm.facebook.com', 'web.facebook.com'}
+
+# ต้องตรงกับ profile_id_from_url() ฝั่ง Python (RESERVED_PATHS / PROFILE_HOSTS ส่งมาเป็น reserved / hosts)
+_JS_PROFILE_ID = r"""
+    const RESERVED = new Set(reserved);
+    const HOSTS = new Set(hosts);
+    const profileIdOf = (href) => {
+        let url;
+        try { url = new URL(href, location.origin); } catch (e) { return null; }
+        if (!HOSTS.has(url.hostname.toLowerCase())) return null;
+        const parts = url.pathname.split('/').filter(Boolean);
+        if (parts[0] === 'profile.php') return url.searchParams.get('id');
+        if (parts[0] === 'people' && /^\d+$/.test(parts[2] || '')) return parts[2];
+        const user = parts.indexOf('user');
+        if (parts[0] === 'groups' && user > 0 && /^\d+$/.test(parts[user + 1] || '')) return parts[user + 1];
+        if (parts.length === 1 && !RESERVED.has(parts[0].toLowerCase())) return parts[0];
+        return null;
+    };
+    const profileUrlOf = (id) => /^\d+$/.test(id)
+        ? `https://www.facebook.com/profile.php?id=${id}`
+        : `https://www.facebook.com/${id}`;
+"""
+
+JS_COLLECT_PEOPLE = r"""async (dialog, {total, quietMs, roundMs, maxMs, stallRounds, reserved, hosts}) => {""" + _JS_PROFILE_ID + r"""
+    const started = performance.now();
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const people = new Map();
+
+    const readVisible = () => {
+        let added = 0;
+        for (const a of dialog.querySelectorAll('a[href]')) {
+            const id = profileIdOf(a.getAttribute('href'));
+            if (!id) continue;
+            const name = (a.innerText || '').replace(/\s+/g, ' ').trim();
+            // แถวเดียวกันมีทั้งลิงก์รูปโปรไฟล์ (ไม่มีข้อความ) และลิงก์ชื่อ
+            if (!name || name.startsWith('#')) continue;
+            if (people.has(id)) continue;
+            people.set(id, {name, profile_id: id, profile_url: profileUrlOf(id)});
+            added += 1;
+        }
+        return added;
+    };
+
+    // กล่องที่ scroll ได้จริงใน dialog (ไม่ใช่ตัว dialog เอง)
+    const scroller = () => {
+        let best = null;
+        for (const el of dialog.querySelectorAll('div')) {
+            if (el.scrollHeight - el.clientHeight < 20) continue;
+            const overflow = getComputedStyle(el).overflowY;
+            if (overflow !== 'auto' && overflow !== 'scroll') continue;
+            if (!best || el.scrollHeight > best.scrollHeight) best = el;
+        }
+        return best;
+    };
+
+    // รอจน dialog นิ่ง quietMs หรือครบ roundMs (คืนจำนวน mutation)
+    const quiescence = () => new Promise((resolve) => {
+        let mutations = 0;
+        let timer = null;
+        const finish = () => {
+            observer.disconnect();
+            clearTimeout(timer);
+            clearTimeout(cap);
+            resolve(mutations);
+        };
+        const arm = () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                if (dialog.querySelector('[role="progressbar"]')) arm();
+                else finish();
+            }, quietMs);
+        };
+        const observer = new MutationObserver((records) => {
+            mutations += records.length;
+            arm();
+        });
+        observer.observe(dialog, {childList: true, subtree: true});
+        const cap = setTimeout(finish, roundMs);
+        arm();
+    });
+
+    let rounds = 0;
+    let stalled = 0;
+    readVisible();
+    while (performance.now() - started < maxMs) {
+        if (total && people.size >= total) break;
+        rounds += 1;
+        const box = scroller();
+        const atBottom = !box || box.scrollTop + box.clientHeight >= box.scrollHeight - 4;
+        if (box) box.scrollTop = box.scrollHeight;
+        await quiescence();
+        const added = readVisible();
+        if (added) {
+            stalled = 0;
+            continue;
+        }
+        stalled += 1;
+        // ยังเลื่อนลงได้แต่ไม่มีแถวใหม่ render: ให้เวลาเพิ่มเป็น 2 เท่าก่อนเลิก
+        if (stalled >= (atBottom ? stallRounds : stallRounds * 2)) break;
+        if (!atBottom) await sleep(quietMs);
+    }
+    return {
+        people: [...people.values()],
+        rounds,
+        complete: Boolean(total) && people.size >= total,
+        elapsed_ms: Math.round(performance.now() - started),
+        timed_out: performance.now() - started >= maxMs,
+    };
+}"""
+
+# ตัวเลขรวมที่ dialog แสดง: แท็บ "ทั้งหมด 1.2K" ของ reaction dialog
+JS_DIALOG_TOTAL = r"""(dialog) => {
+    for (const tab of dialog.querySelectorAll('[role="tab"]')) {
+        const text = (tab.innerText || tab.getAttribute('aria-label') || '').replace(/\s+/g, ' ').trim();
+        if (/^(ทั้งหมด|All)/.test(text)) return text;
+    }
+    return '';
+}"""
+
+
+def profile_id_from_url(url):
+    """Profile id (numeric id or vanity name) of a facebook.com profile link, None for other links."""
+    parsed = urlparse(url or '')
+    host = (parsed.hostname or 'www.facebook.com').lower()
+    if host not in PROFILE_HOSTS:
+        return None
+    parts = [p for p in parsed.path.split('/') if p]
+    if not parts:
+        return None
+    if parts[0] == 'profile.php':
+        return (parse_qs(parsed.query).get('id') or [None])[0]
+    if parts[0] == 'people' and len(parts) > 2 and parts[2].isdigit():
+        return parts[2]
+    if parts[0] == 'groups' and 'user' in parts:
+        user_id = (parts[parts.index('user') + 1:] or [''])[0]
+        return user_id if user_id.isdigit() else None
+    if len(parts) == 1 and parts[0].lower() not in RESERVED_PATHS:
+        return parts[0]
+    return None
+
+
+def exact_count(text):
+    """The count in ``text`` when Facebook shows it exactly ("All 1,234"), 0 when rounded ("1.2K") or missing."""
+    match = _EXACT_COUNT.search(text or '')
+    return int(match.group(1).replace(',', '')) if match else 0
+
+
+async def dialog_total(dialog):
+    """Exact number of people the dialog says it lists, 0 if it shows none or only a rounded one."""
+    return exact_count(await dialog.evaluate(JS_DIALOG_TOTAL))
+
+
+async def collect_people(dialog, total=0, quiet_ms=1200, round_seconds=8, max_seconds=300, stall_rounds=3):
+    """
+    Read every person listed in the open ``dialog`` (a Playwright Locator).
+
+    total: exact number of people the dialog should list (0 = unknown or rounded, stop on stall only).
+    quiet_ms: how long the dialog must stay unchanged before a scroll step counts as loaded.
+    round_seconds: cap on the wait after one scroll step.
+    max_seconds: cap on the whole loop.
+    stall_rounds: rounds at the bottom without anyone new before giving up.
+
+    Returns the list of ``{'name', 'profile_id', 'profile_url'}`` in list order.
+    """
+    started = time.monotonic()
+    stats = await dialog.evaluate(JS_COLLECT_PEOPLE, {
+        'total': total or 0,
+        'quietMs': quiet_ms,
+        'roundMs': round_seconds * 1000,
+        'maxMs': max_seconds * 1000,
+        'stallRounds': stall_rounds,
+        'reserved': sorted(RESERVED_PATHS),
+        'hosts': sorted(PROFILE_HOSTS),
+    })
+    people = stats['people']
+    notes = ''.join([
+        f" of {total}" if total else '',
+        ' (timed out)' if stats['timed_out'] else '',
+    ])
+    print(f"⏱️ Collected {len(people)}{notes} people in {round(time.monotonic() - started, 2)}s "
+          f"({stats['rounds']} scrolls)")
+    return people
@@ -9,10 +9,14 @@ from typing import Any, Optional, List, Tuple
 from playwright.async_api import Playwright, async_playwright, Browser, Page, BrowserContext
 from datetime import datetime
 
+from .checkpoints import ScrapeCheckpoint, lookback_days
+from .ratelimit import throttled_goto
+from .sessions import load_cookies
+
 class FBPostScraperAsync:
     def __init__(self, cookie_file: str, headless: bool = False,
                  page_url: Optional[str] = None, cutoff_dt: datetime = None,
-                 batch_size: int = 10):
+                 batch_size: int = 10, resume: bool = True):
         self.cookie_file = cookie_file
         self.headless = headless
         self.browser: Optional[Browser] = None
@@ -21,6 +25,8 @@ class FBPostScraperAsync:
         self.page_url = page_url
         self.cutoff_dt = cutoff_dt
         self.batch_size = batch_size
+        self.resume = resume  # ✅ เก็บ checkpoint ทุก batch แล้วทำต่อจากเดิมถ้ารอบก่อนพังกลางทาง
+        self.login_failed = False  # True เมื่อ cookie ใช้ login ไม่ได้ (เช่นโดน checkpoint)
 
         # JavaScript snippet to fetch posts (push all, let Python filter by cutoff)
         JS_FETCH_POSTS = r"""(cutoffMs) => {
@@ -105,17 +111,23 @@ class FBPostScraperAsync:
         await page.wait_for_timeout(3000)
         return await page.evaluate(self.JS_FETCH_POSTS, cutoff_ms)
 
+    async def _restore_scroll(self, page, scroll_y: int, max_rounds: int = 60) -> None:
+        # Feed only grows while scrolling, so scroll step by step back to where the checkpoint stopped
+        stalled = 0
+        last_y = -1
+        for _ in range(max_rounds):
+            current_y = await page.evaluate("window.scrollY")
+            if current_y >= scroll_y or stalled >= 3:
+                break
+            stalled = stalled + 1 if current_y <= last_y else 0
+            last_y = current_y
+            await page.evaluate("window.scrollBy(0, document.body.scrollHeight);")
+            await page.wait_for_timeout(1000)
+        print(f"Restored scroll position to {current_y}px (target {scroll_y}px)")
+
     async def _process_cookie(self) -> List[dict]:
-        raw = json.loads(Path(self.cookie_file).read_text())
-        for cookie in raw:
-            s = cookie.get("sameSite")
-            if s is None or (isinstance(s, str) and s.lower() == "no_restriction"):
-                cookie["sameSite"] = "None"
-            elif isinstance(s, str) and s.lower() == "lax":
-                cookie["sameSite"] = "Lax"
-            elif isinstance(s, str) and s.lower() == "strict":
-                cookie["sameSite"] = "Strict"
-        return raw
+        # ✅ อ่าน + normalize sameSite ครั้งเดียวต่อไฟล์ (cache ใน PageInfo/sessions.py)
+        return load_cookies(self.cookie_file)
 
     async def _confirm_login(self, page: Page) -> Optional[str]:
         try:
@@ -187,7 +199,7 @@ class FBPostScraperAsync:
 
         # Initial navigation & load
         if not seen_ids:
-            await page.goto(self.page_url)
+            await throttled_goto(page, self.page_url)
         await page.wait_for_selector('div[data-pagelet^="TimelineFeedUnit_"]', timeout=5000)
 
         # Loop until we collect enough or hit older posts
@@ -250,7 +262,7 @@ class FBPostScraperAsync:
         try:
             # print(f"[get_post_detail] Opening detail page for: {post_url}")
             detail_page = await context.new_page()
-            await detail_page.goto(post_url)
+            await throttled_goto(detail_page, post_url)
 
             # Wait for the light‐mode container
             light_container = detail_page.locator('div.__fb-light-mode.x1n2onr6.x1vjfegm').first
@@ -515,11 +527,12 @@ class FBPostScraperAsync:
             # 1) Confirm login
             # ---------------------
             self.page = await self.context.new_page()
-            await self.page.goto("https://www.facebook.com/")
+            await throttled_goto(self.page, "https://www.facebook.com/")
             username = await self._confirm_login(self.page)
             print(f"Login as: {username or 'unknown'}")
             if not username:
                 print("Login failed, stopping.")
+                self.login_failed = True
                 return
 
             # ---------------------
@@ -527,7 +540,7 @@ class FBPostScraperAsync:
             # ---------------------
             if self.page_url:
                 try:
-                    await self.page.goto(self.page_url)
+                    await throttled_goto(self.page, self.page_url)
                     title_container = self.page.locator(
                         "div.x9f619.x1n2onr6.x1ja2u2z.x78zum5.xdt5ytf.x2lah0s.x193iq5w.x1cy8zhl.xexx8yu"
                     ).first
@@ -545,8 +558,17 @@ class FBPostScraperAsync:
                 # ---------------------
                 seen_ids = set()
                 all_results = []
-
                 batch_index = 1
+
+                checkpoint = ScrapeCheckpoint.for_job(
+                    "fb_post", self.page_url, lookback_days=lookback_days(self.cutoff_dt)
+                ) if self.resume else None
+                if checkpoint and checkpoint.load():
+                    all_results = checkpoint.results
+                    seen_ids = checkpoint.seen_ids
+                    batch_index = checkpoint.position.get("batch_index", 0) + 1
+                    await self._restore_scroll(self.page, checkpoint.position.get("scroll_y", 0))
+
                 cutoff_dt = self.cutoff_dt
                 empty_batch_retries = 0
                 max_empty_batch_retries = 3
@@ -585,6 +607,13 @@ class FBPostScraperAsync:
                             all_results.append(detail)
                             pprint(detail)
 
+                    if checkpoint:
+                        checkpoint.save(
+                            all_results, seen_ids,
+                            scroll_y=await self.page.evaluate("window.scrollY"),
+                            batch_index=batch_index,
+                        )
+
                     # After processing, if we hit older posts, exit
                     if older:
                         print("Reached cutoff after processing; exiting.")
@@ -597,6 +626,8 @@ class FBPostScraperAsync:
                     await self.page.wait_for_timeout(500)
 
                 print(f"Fetched all post details. Total posts: {len(all_results)}")
+                if checkpoint:
+                    checkpoint.clear()
 
             # ---------------------
             # 5) Cleanup
@@ -9,6 +9,9 @@ from typing import Any, Optional, List, Tuple, Coroutine
 from playwright.async_api import Playwright, async_playwright, Browser, Page, BrowserContext
 from datetime import datetime
 
+from .ratelimit import throttled_goto
+from .sessions import load_cookies
+
 class FBPostScraperAsync:
     def __init__(self, cookie_file: str, headless: bool = False,
                  page_url: Optional[str] = None, cutoff_dt: datetime = None,
@@ -21,6 +24,7 @@ class FBPostScraperAsync:
         self.page_url = page_url
         self.cutoff_dt = cutoff_dt
         self.batch_size = batch_size
+        self.login_failed = False  # True เมื่อ cookie ใช้ login ไม่ได้ (เช่นโดน checkpoint)
 
         # JavaScript snippet to fetch posts (push all, let Python filter by cutoff), now with improved thumbnail logic
         JS_FETCH_POSTS = r"""(cutoffMs) => {
@@ -117,16 +121,8 @@ class FBPostScraperAsync:
         return await page.evaluate(self.JS_FETCH_POSTS, cutoff_ms)
 
     async def _process_cookie(self) -> List[dict]:
-        raw = json.loads(Path(self.cookie_file).read_text())
-        for cookie in raw:
-            s = cookie.get("sameSite")
-            if s is None or (isinstance(s, str) and s.lower() == "no_restriction"):
-                cookie["sameSite"] = "None"
-            elif isinstance(s, str) and s.lower() == "lax":
-                cookie["sameSite"] = "Lax"
-            elif isinstance(s, str) and s.lower() == "strict":
-                cookie["sameSite"] = "Strict"
-        return raw
+        # ✅ อ่าน + normalize sameSite ครั้งเดียวต่อไฟล์ (cache ใน PageInfo/sessions.py)
+        return load_cookies(self.cookie_file)
 
     async def _confirm_login(self, page: Page) -> Optional[str]:
         try:
@@ -200,7 +196,7 @@ class FBPostScraperAsync:
 
         # Initial navigation & load
         if not seen_ids:
-            await page.goto(self.page_url)
+            await throttled_goto(page, self.page_url)
         await page.wait_for_selector('div[data-pagelet^="TimelineFeedUnit_"]', timeout=5000)
 
         # Loop until we collect enough or hit older posts
@@ -302,7 +298,7 @@ class FBPostScraperAsync:
         try:
             # print(f"[get_post_detail] Opening detail page for: {post_url}")
             detail_page = await context.new_page()
-            await detail_page.goto(post_url)
+            await throttled_goto(detail_page, post_url)
 
             # Wait for the light‐mode container
             await detail_page.wait_for_selector('.__fb-light-mode.x1n2onr6.x1vjfegm', timeout=20000)
@@ -476,7 +472,7 @@ class FBPostScraperAsync:
         try:
             # print(f"[get_post_detail] Opening detail page for: {post_url}")
             detail_page = await context.new_page()
-            await detail_page.goto(post_url)
+            await throttled_goto(detail_page, post_url)
             # Disable video autoplay
             await detail_page.evaluate("""
                 document.querySelectorAll('video').forEach(v => {
@@ -795,11 +791,12 @@ class FBPostScraperAsync:
             # 1) Confirm login
             # ---------------------
             self.page = await self.context.new_page()
-            await self.page.goto("https://www.facebook.com/")
+            await throttled_goto(self.page, "https://www.facebook.com/")
             username = await self._confirm_login(self.page)
             print(f"Login as: {username or 'unknown'}")
             if not username:
                 print("Login failed, stopping.")
+                self.login_failed = True
                 return
 
             # ---------------------
@@ -807,7 +804,7 @@ class FBPostScraperAsync:
             # ---------------------
             if self.page_url:
                 try:
-                    await self.page.goto(self.page_url)
+                    await throttled_goto(self.page, self.page_url)
                     title_container = self.page.locator(
                         "div.x9f619.x1n2onr6.x1ja2u2z.x78zum5.xdt5ytf.x2lah0s.x193iq5w.x1cy8zhl.xexx8yu"
                     ).first
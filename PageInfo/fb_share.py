@@ -1,9 +1,12 @@
 import asyncio
 import json
-import re
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+from .fb_people_list import collect_people, exact_count
+from .ratelimit import throttled_goto
+from .sessions import load_cookies as load_cookie_jar, session_pool
+
 class FBShareScraper:
     def __init__(self, post_url, cookies_path='cookie.json'):
         self.post_url = post_url
@@ -11,9 +14,7 @@ class FBShareScraper:
         self.cookies_path = base_dir / cookies_path
 
     async def load_cookies(self, context):
-        with open(self.cookies_path, 'r', encoding='utf-8') as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
+        await context.add_cookies(load_cookie_jar(self.cookies_path))
 
     async def get_shares(self, page):
         shares = []
@@ -34,68 +35,9 @@ class FBShareScraper:
                 popup = page.locator('div[role="dialog"][aria-label="คนที่แชร์ลิงก์นี้"]')
                 await popup.wait_for(timeout=15000)
 
-                # ✅ focus popup
-                box = await popup.bounding_box()
-                if box:
-                    x = box["x"] + box["width"]/2
-                    y = box["y"] + box["height"]/2
-                    await page.mouse.click(x, y)
-                    await page.wait_for_timeout(1500)
-
-                seen_names = set()
-                previous_count = -1
-                same_count_times = 0
-                scroll_num = 0
-
-                while True:
-                    scroll_num += 1
-
-                    # ✅ ดึงชื่อทั้งหมด
-                    name_elements = popup.locator('a[role="link"] span')
-                    count = await name_elements.count()
-
-                    for i in range(count):
-                        el = name_elements.nth(i)
-                        name = (await el.inner_text()).strip()
-
-                        # ✅ filter เฉพาะชื่อจริง
-                        if not name:
-                            continue
-                        if name.startswith("#"):
-                            continue
-                        if "น." in name:
-                            continue
-                        if re.search(r"\d", name) and len(name) <= 10:
-                            continue
-                        if name == "·":
-                            continue
-
-                        seen_names.add(name)
-
-                    print(f"🔄 Scroll #{scroll_num} - Total names collected: {len(seen_names)}")
-
-                    # ✅ ตรวจสอบถ้าไม่มีชื่อใหม่เพิ่ม 10 รอบติด ให้หยุด (จากเดิม 5 รอบ)
-                    if len(seen_names) == previous_count:
-                        same_count_times += 1
-                        print(f"⚠️ ไม่มีชื่อใหม่เพิ่ม รอบที่ {same_count_times}")
-                        if same_count_times >= 10:
-                            print("✅ ไม่มีชื่อใหม่เพิ่ม 10 รอบ หยุดเลื่อน")
-                            break
-                    else:
-                        same_count_times = 0  # reset
-
-                    previous_count = len(seen_names)
-
-                    # ✅ Scroll ภายใน popup แบบ human-like lazyload (ไม่เลื่อนสุด)
-                    box = await popup.bounding_box()
-                    if box:
-                        x = box["x"] + box["width"]/2
-                        y = box["y"] + box["height"]/2
-                        await page.mouse.move(x, y)
-                        await page.mouse.wheel(0, 100)  # เลื่อนทีละ 100px
-                        await page.wait_for_timeout(2500)  # รอ 2.5s
-
-                shares.extend(list(seen_names))
+                # ✅ popup แชร์ไม่แสดงยอดรวม ใช้ตัวเลขบนปุ่มแชร์ของโพสต์แทน ("12 ครั้ง")
+                total = exact_count(await btn.locator('xpath=ancestor::div[@role="button"][1]').inner_text())
+                shares.extend(await collect_people(popup, total=total))
 
                 # ✅ close popup
                 await page.keyboard.press("Escape")
@@ -111,23 +53,31 @@ class FBShareScraper:
 
         return shares
 
+    async def scrape(self, context):
+        """Scrape the post in a new tab of an already logged-in ``context``."""
+        page = await context.new_page()
+        try:
+            await throttled_goto(page, self.post_url, timeout=60000)
+            await page.wait_for_timeout(5000)
+            return await self.get_shares(page)
+        finally:
+            await page.close()
+
     async def start(self):
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=False)
             context = await browser.new_context()
             await self.load_cookies(context)
-            page = await context.new_page()
-            await page.goto(self.post_url, timeout=60000)
-            await page.wait_for_timeout(5000)
-
-            shares = await self.get_shares(page)
-
-            await browser.close()
-            return shares
+            try:
+                return await self.scrape(context)
+            finally:
+                await browser.close()
 
 async def run_fb_share_scraper(post_url):
-    scraper = FBShareScraper(post_url)
-    return await scraper.start()
+    # ✅ ยืม account จาก session pool (หมุนเวียนระหว่างหลาย cookie)
+    with session_pool().lease('facebook') as session:
+        scraper = FBShareScraper(post_url, cookies_path=session.path)
+        return await scraper.start()
 
 if __name__ == "__main__":
     url = "https://www.facebook.com/photo/?fbid=122186666168274942&set=a.122113064870274942"
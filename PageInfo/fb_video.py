@@ -9,6 +9,9 @@ from typing import Any, Optional, List, Tuple
 from playwright.async_api import Playwright, async_playwright, Browser, Page, BrowserContext
 from datetime import datetime
 
+from .ratelimit import throttled_goto
+from .sessions import load_cookies
+
 class FBVideoScraperAsync:
     def __init__(self, cookie_file: str, headless: bool = False,
                  page_url: Optional[str] = None, cutoff_dt: datetime = None,
@@ -21,6 +24,7 @@ class FBVideoScraperAsync:
         self.page_url = page_url
         self.cutoff_dt = cutoff_dt
         self.batch_size = batch_size
+        self.login_failed = False  # True เมื่อ cookie ใช้ login ไม่ได้ (เช่นโดน checkpoint)
 
         # JavaScript snippet to fetch posts (push all, let Python filter by cutoff)
         JS_FETCH_POSTS = r"""(cutoffMs) => {
@@ -119,16 +123,8 @@ class FBVideoScraperAsync:
         return await page.evaluate(self.JS_FETCH_POSTS, cutoff_ms)
 
     async def _process_cookie(self) -> List[dict]:
-        raw = json.loads(Path(self.cookie_file).read_text())
-        for cookie in raw:
-            s = cookie.get("sameSite")
-            if s is None or (isinstance(s, str) and s.lower() == "no_restriction"):
-                cookie["sameSite"] = "None"
-            elif isinstance(s, str) and s.lower() == "lax":
-                cookie["sameSite"] = "Lax"
-            elif isinstance(s, str) and s.lower() == "strict":
-                cookie["sameSite"] = "Strict"
-        return raw
+        # ✅ อ่าน + normalize sameSite ครั้งเดียวต่อไฟล์ (cache ใน PageInfo/sessions.py)
+        return load_cookies(self.cookie_file)
 
     async def _confirm_login(self, page: Page) -> Optional[str]:
         try:
@@ -207,7 +203,7 @@ class FBVideoScraperAsync:
         # Initial navigation & load
         if not seen_ids:
             video_page_url = f"{self.page_url.rstrip('/')}/videos"
-            await page.goto(video_page_url)
+            await throttled_goto(page, video_page_url)
         await page.wait_for_selector('div.x9f619.x1r8uery.x1iyjqo2.x6ikm8r.x10wlt62.x1n2onr6', timeout=10000)
 
         # Loop until we collect enough or hit older posts
@@ -267,7 +263,7 @@ class FBVideoScraperAsync:
         try:
             # print(f"[get_post_detail] Opening detail page for: {post_url}")
             detail_page = await context.new_page()
-            await detail_page.goto(post_url)
+            await throttled_goto(detail_page, post_url)
             # Disable video autoplay
             await detail_page.evaluate("""
                 document.querySelectorAll('video').forEach(v => {
@@ -653,11 +649,12 @@ class FBVideoScraperAsync:
             # 1) Confirm login
             # ---------------------
             self.page = await self.context.new_page()
-            await self.page.goto("https://www.facebook.com/")
+            await throttled_goto(self.page, "https://www.facebook.com/")
             username = await self._confirm_login(self.page)
             print(f"Login as: {username or 'unknown'}")
             if not username:
                 print("Login failed, stopping.")
+                self.login_failed = True
                 return
 
             # ---------------------
@@ -665,7 +662,7 @@ class FBVideoScraperAsync:
             # ---------------------
             if self.page_url:
                 try:
-                    await self.page.goto(self.page_url)
+                    await throttled_goto(self.page, self.page_url)
                     title_container = self.page.locator(
                         "div.x9f619.x1n2onr6.x1ja2u2z.x78zum5.xdt5ytf.x2lah0s.x193iq5w.x1cy8zhl.xexx8yu"
                     ).first
@@ -676,7 +673,7 @@ class FBVideoScraperAsync:
                     print(f"Cutoff datetime: {self.cutoff_dt}")
 
                     video_page_url = f"{self.page_url.rstrip('/')}/videos"
-                    await self.page.goto(video_page_url)
+                    await throttled_goto(self.page, video_page_url)
                 except Exception as e:
                     print(f"Failed to open Facebook Page: {e}")
                     return
@@ -0,0 +1,186 @@
+# PageInfo/followers.py
+"""
+Live follower-count refresh for every platform.
+
+``refresh_follower_counts`` runs the async profile fetchers concurrently on
+one event loop, sharing the pooled client from PageInfo/http_client.py. Each
+platform has its own concurrency cap (so one slow or rate-limited site does
+not starve the others) and a per-fetch timeout; the results are written back
+with one bulk_update on PageInfo and one bulk upsert on FollowerHistory
+(page, date).
+
+Caps/timeouts can be overridden in settings::
+
+    FOLLOWER_REFRESH = {
+        'max_concurrency': 32,
+        'platforms': {'facebook': {'concurrency': 4, 'timeout': 30}, ...},
+    }
+"""
+import asyncio
+import re
+from datetime import date
+
+from django.conf import settings
+
+from .http_client import run_sync
+from .metrics import parse_optional_count
+from .models import PageInfo, FollowerHistory
+
+DEFAULT_LIMITS = {
+    'max_concurrency': 32,
+    'platforms': {
+        'facebook': {'concurrency': 8, 'timeout': 30},
+        'tiktok': {'concurrency': 4, 'timeout': 30},
+        'instagram': {'concurrency': 2, 'timeout': 30},
+        'youtube': {'concurrency': 4, 'timeout': 60},
+        'lemon8': {'concurrency': 4, 'timeout': 30},
+    },
+}
+
+
+def _limits():
+    custom = getattr(settings, 'FOLLOWER_REFRESH', {}) or {}
+    platforms = {name: dict(conf) for name, conf in DEFAULT_LIMITS['platforms'].items()}
+    for name, conf in (custom.get('platforms') or {}).items():
+        platforms.setdefault(name, {}).update(conf)
+    return {
+        'max_concurrency': custom.get('max_concurrency', DEFAULT_LIMITS['max_concurrency']),
+        'platforms': platforms,
+    }
+
+
+def _instagram_username(page):
+    if page.page_username:
+        return page.page_username
+    match = re.search(r"instagram\.com/([\w\.\-]+)/?", page.page_url or '')
+    return match.group(1) if match else None
+
+
+async def fetch_follower_count(page):
+    """
+    Fetch the current follower count of one PageInfo from its platform.
+    Returns an int, or None when the platform returned nothing usable.
+    """
+    platform = page.platform or 'facebook'
+
+    if platform == 'facebook':
+        from .fb_page_info import fetch_page_followers
+        if not page.page_id:
+            return None
+        data = await fetch_page_followers(page.page_id)
+        if not data and data.errors:
+            # ✅ ให้ fetch_follower_counts นับเป็น 'error' ไม่ใช่ 'empty'
+            raise data.errors[0]
+        return parse_optional_count(data.get('page_followers_count'))
+
+    if platform == 'tiktok':
+        from .tiktok_page_info import fetch_tiktok_info
+        data = await fetch_tiktok_info(page.page_url or f"https://www.tiktok.com/@{page.page_username}")
+        return parse_optional_count((data or {}).get('followers'))
+
+    if platform == 'instagram':
+        from .ig_page_info import fetch_instagram_info
+        username = _instagram_username(page)
+        data = await fetch_instagram_info(username) if username else None
+        return parse_optional_count((data or {}).get('followers_count'))
+
+    if platform == 'youtube':
+        from .yt_page_info import fetch_youtube_info
+        data = await fetch_youtube_info(page.page_url) if page.page_url else None
+        return parse_optional_count((data or {}).get('subscribers_count'))
+
+    if platform == 'lemon8':
+        from .lm8_page_info import fetch_lemon8_info
+        data = await fetch_lemon8_info(page.page_url) if page.page_url else None
+        return parse_optional_count((data or {}).get('followers_count'))
+
+    return None
+
+
+async def fetch_follower_counts(pages, fetcher=fetch_follower_count, on_result=None):
+    """
+    Fetch follower counts for ``pages`` concurrently (no DB access).
+
+    Returns ``{page.id: (status, count)}`` where status is one of 'ok',
+    'empty', 'error', 'timeout' or 'skipped' (unknown platform).
+    ``on_result(page, status, count)`` is called as each page finishes.
+    """
+    limits = _limits()
+    global_sem = asyncio.Semaphore(limits['max_concurrency'])
+    platform_sems = {
+        name: asyncio.Semaphore(conf.get('concurrency', 1))
+        for name, conf in limits['platforms'].items()
+    }
+    results = {}
+
+    def record(page, status, count=None):
+        results[page.id] = (status, count)
+        if on_result:
+            on_result(page, status, count)
+
+    async def run(page):
+        platform = page.platform or 'facebook'
+        if platform not in platform_sems:
+            record(page, 'skipped')
+            return
+        timeout = limits['platforms'][platform].get('timeout')
+        async with platform_sems[platform], global_sem:
+            try:
+                # ✅ timeout นับจากตอนเริ่ม fetch จริง ไม่ใช่ตอนรอคิว
+                count = await asyncio.wait_for(fetcher(page), timeout)
+            except asyncio.TimeoutError:
+                record(page, 'timeout')
+                return
+            except Exception as e:
+                print(f"❌ [{platform}] {page.page_name}: {e!r}")
+                record(page, 'error')
+                return
+        record(page, 'ok' if count is not None else 'empty', count)
+
+    await asyncio.gather(*(run(page) for page in pages))
+    return results
+
+
+def refresh_follower_counts(pages, fetcher=fetch_follower_count, on_result=None):
+    """Fetch follower counts for ``pages`` concurrently and persist the successful ones."""
+    pages = list(pages)
+    results = run_sync(fetch_follower_counts(pages, fetcher=fetcher, on_result=on_result))
+    save_follower_counts({
+        page_id: count for page_id, (status, count) in results.items() if status == 'ok'
+    })
+    return results
+
+
+def save_follower_counts(counts, day=None):
+    """
+    Persist ``{page_id: followers}``: update PageInfo.page_followers_count,
+    upsert today's FollowerHistory rows in one statement and refresh the
+    stored engagement rates of the affected pages.
+    """
+    from .ingest import refresh_engagement_rates
+
+    if not counts:
+        return 0
+    day = day or date.today()
+
+    pages = list(PageInfo.objects.filter(id__in=counts.keys()).only('id', 'page_followers_count'))
+    changed = []
+    for page in pages:
+        new_count = counts[page.id]
+        if page.page_followers_count != new_count:
+            page.page_followers_count = new_count
+            changed.append(page)
+    if changed:
+        PageInfo.objects.bulk_update(changed, ['page_followers_count'], batch_size=500)
+
+    FollowerHistory.objects.bulk_create(
+        [FollowerHistory(page_id=page_id, date=day, page_followers_count=count) for page_id, count in counts.items()],
+        update_conflicts=True,
+        unique_fields=['page', 'date'],
+        update_fields=['page_followers_count'],
+        batch_size=500,
+    )
+
+    for page in changed:
+        refresh_engagement_rates(page)
+    return len(counts)
@@ -34,6 +34,49 @@ class PageURLForm(forms.Form):
         widget=forms.URLInput(attrs={'class': 'form-control form-control-lg', 'placeholder': 'Input URL Page'})
     )
 
+# ฟอร์มสำหรับเพิ่มหลายเพจพร้อมกัน (textarea หรือไฟล์ CSV)
+class BulkPageImportForm(forms.Form):
+    # หน้าเว็บสร้างแค่ PageInfo (ดึงโปรไฟล์ผ่าน HTTP) ให้จบใน request เดียว
+    # รายการใหญ่กว่านี้ใช้ `manage.py import_pages`
+    MAX_URLS = 50
+
+    urls = forms.CharField(
+        required=False,
+        label="Page URLs",
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 6,
+            'placeholder': 'One URL per line (Facebook / TikTok / Instagram / YouTube / Lemon8)',
+        }),
+    )
+    csv_file = forms.FileField(
+        required=False,
+        label="CSV file",
+        help_text="ใช้คอลัมน์ url หรือคอลัมน์แรก",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
+    def clean(self):
+        from .page_import import parse_url_lines, parse_url_csv
+
+        cleaned_data = super().clean()
+        url_list = parse_url_lines(cleaned_data.get('urls'))
+        csv_file = cleaned_data.get('csv_file')
+        if csv_file:
+            try:
+                csv_urls = parse_url_csv(csv_file)
+            except (UnicodeDecodeError, ValueError):
+                raise forms.ValidationError("❌ อ่านไฟล์ CSV ไม่ได้ (ต้องเป็น UTF-8)")
+            url_list += [url for url in csv_urls if url not in url_list]
+
+        if not url_list:
+            raise forms.ValidationError("❌ กรุณาใส่ URL อย่างน้อย 1 รายการ")
+        if len(url_list) > self.MAX_URLS:
+            raise forms.ValidationError(
+                f"❌ เพิ่มได้สูงสุด {self.MAX_URLS} URL ต่อครั้ง (มากกว่านี้ใช้ manage.py import_pages)"
+            )
+        cleaned_data['url_list'] = url_list
+        return cleaned_data
+
 # ฟอร์มสำหรับสร้างกลุ่มเพจใหม่
 class PageGroupForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,119 @@
+# PageInfo/hashtags.py
+"""
+Hashtag index maintained at ingest time.
+
+``sync_post_hashtags`` is called whenever a post is upserted (see
+PageInfo/ingest.py) and by the ``backfill_hashtags`` command, so dashboards
+can ask for top hashtags with one grouped query instead of regex-scanning
+every post on each render.
+"""
+import re
+
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from .models import PostHashtag, FacebookPost, TikTokPost
+
+HASHTAG_RE = re.compile(r"#\S+")
+
+
+def extract_hashtags(text):
+    """Return the distinct lowercase hashtags in ``text`` (in first-seen order)."""
+    seen = {}
+    for tag in HASHTAG_RE.findall(text or ''):
+        seen.setdefault(tag.lower()[:255], None)
+    return list(seen)
+
+
+def _hashtag_rows(post):
+    tags = extract_hashtags(post.post_content)
+    fk = {'facebook_post': post} if isinstance(post, FacebookPost) else {'tiktok_post': post}
+    return [
+        PostHashtag(page_id=post.page_id, tag=tag, post_timestamp_dt=post.post_timestamp_dt, **fk)
+        for tag in tags
+    ]
+
+
+def sync_post_hashtags(post):
+    """Replace the stored hashtags of one FacebookPost/TikTokPost with the ones in its content."""
+    if isinstance(post, FacebookPost):
+        PostHashtag.objects.filter(facebook_post=post).delete()
+    elif isinstance(post, TikTokPost):
+        PostHashtag.objects.filter(tiktok_post=post).delete()
+    else:
+        raise TypeError(f"Unsupported post type: {type(post).__name__}")
+    rows = _hashtag_rows(post)
+    if rows:
+        PostHashtag.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def rebuild_hashtags(posts, batch_size=1000):
+    """Rebuild the index for an iterable of posts of a single type; returns the number of rows written."""
+    written = 0
+    post_ids = []
+    rows = []
+    model = None
+    for post in posts:
+        model = type(post)
+        post_ids.append(post.pk)
+        rows.extend(_hashtag_rows(post))
+        if len(post_ids) >= batch_size:
+            written += _flush(model, post_ids, rows)
+            post_ids, rows = [], []
+    if post_ids:
+        written += _flush(model, post_ids, rows)
+    return written
+
+
+def _flush(model, post_ids, rows):
+    fk = 'facebook_post_id__in' if model is FacebookPost else 'tiktok_post_id__in'
+    PostHashtag.objects.filter(**{fk: post_ids}).delete()
+    PostHashtag.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def _filtered(page_ids=None, start=None, end=None):
+    qs = PostHashtag.objects.all()
+    if page_ids is not None:
+        qs = qs.filter(page_id__in=page_ids)
+    if start:
+        qs = qs.filter(post_timestamp_dt__gte=start)
+    if end:
+        qs = qs.filter(post_timestamp_dt__lt=end)
+    return qs
+
+
+def top_hashtags(page_ids=None, start=None, end=None, limit=50):
+    """[(tag, post_count), ...] for the given pages / date range, most used first."""
+    rows = (
+        _filtered(page_ids, start, end)
+        .values('tag')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'tag')[:limit]
+    )
+    return [(row['tag'], row['count']) for row in rows]
+
+
+def hashtag_trends(page_ids=None, start=None, end=None, tags=None, limit=10):
+    """
+    Daily post counts per hashtag: {tag: [{'date': date, 'count': n}, ...]}.
+    When ``tags`` is not given the ``limit`` most used tags in the range are used.
+    """
+    if tags is None:
+        tags = [tag for tag, _ in top_hashtags(page_ids, start, end, limit)]
+    if not tags:
+        return {}
+
+    rows = (
+        _filtered(page_ids, start, end)
+        .filter(tag__in=tags, post_timestamp_dt__isnull=False)
+        .annotate(day=TruncDate('post_timestamp_dt'))
+        .values('tag', 'day')
+        .annotate(count=Count('id'))
+        .order_by('tag', 'day')
+    )
+    trends = {tag: [] for tag in tags}
+    for row in rows:
+        trends[row['tag']].append({'date': row['day'], 'count': row['count']})
+    return trends
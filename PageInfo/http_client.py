@@ -0,0 +1,168 @@
+# PageInfo/http_client.py
+"""
+Shared async HTTP client for the profile fetchers (fb/tiktok/ig/yt/lemon8).
+
+One ``httpx.AsyncClient`` per event loop gives connection pooling and
+keep-alive (HTTP/2 when the ``h2`` package is installed). On top of it every
+request gets:
+
+* a per-host concurrency limit (``asyncio.Semaphore`` per hostname),
+* the shared per-site request rate from PageInfo/ratelimit.py,
+* consistent connect/read timeouts,
+* retries with full-jitter exponential backoff on network errors, 429 and 5xx
+  (``Retry-After`` is honoured when present).
+
+Async code uses ``await get_client().get(url, ...)``; existing sync callers go
+through ``run_sync(coro)``, which runs the coroutine on a fresh loop and closes
+that loop's client afterwards.
+
+Defaults can be overridden in settings::
+
+    HTTP_CLIENT = {
+        'timeout': 20, 'connect_timeout': 10,
+        'retries': 3, 'backoff_base': 0.5, 'backoff_cap': 8,
+        'per_host': 4, 'host_limits': {'www.instagram.com': 2},
+        'max_connections': 100,
+    }
+"""
+import asyncio
+import importlib.util
+import random
+import weakref
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+
+from .ratelimit import limiter_for
+
+DEFAULTS = {
+    'timeout': 20.0,
+    'connect_timeout': 10.0,
+    'retries': 3,
+    'backoff_base': 0.5,
+    'backoff_cap': 8.0,
+    'per_host': 4,
+    'host_limits': {},
+    'max_connections': 100,
+    'max_keepalive_connections': 20,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/130.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    if settings.configured:
+        conf.update(getattr(settings, 'HTTP_CLIENT', {}) or {})
+    return conf
+
+
+class AsyncHTTPClient:
+    def __init__(self, config=None):
+        self.config = config or _config()
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(self.config['timeout'], connect=self.config['connect_timeout']),
+            limits=httpx.Limits(
+                max_connections=self.config['max_connections'],
+                max_keepalive_connections=self.config['max_keepalive_connections'],
+            ),
+        )
+        self._host_semaphores = {}
+
+    def _semaphore(self, url):
+        host = urlparse(url).hostname or ''
+        sem = self._host_semaphores.get(host)
+        if sem is None:
+            limit = self.config['host_limits'].get(host, self.config['per_host'])
+            sem = self._host_semaphores[host] = asyncio.Semaphore(limit)
+        return sem
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.config['backoff_cap'])
+        return random.uniform(0, min(self.config['backoff_cap'], self.config['backoff_base'] * 2 ** attempt))
+
+    async def request(self, method, url, retries=None, **kwargs):
+        """
+        Send a request and return the ``httpx.Response`` (any status).
+        Network errors are re-raised after the last retry.
+        """
+        retries = self.config['retries'] if retries is None else retries
+        sem = self._semaphore(url)
+        bucket = limiter_for(url)
+        for attempt in range(retries + 1):
+            await bucket.acquire_async()
+            try:
+                async with sem:
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                print(f"⚠️ {method} {url} failed ({e!r}), retry {attempt + 1}/{retries}")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After', '')
+                bucket.report('throttled', float(retry_after) if retry_after.isdigit() else None)
+            elif response.status_code < 400:
+                bucket.report('ok')
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                print(f"⚠️ {method} {url} -> {response.status_code}, retry {attempt + 1}/{retries}")
+                await asyncio.sleep(self._backoff(attempt, response))
+                continue
+            return response
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """The shared client of the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncHTTPClient()
+    return client
+
+
+async def close_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_sync(coro):
+    """Run ``coro`` from sync code (views, scripts) and clean up the loop's client."""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_client()
+
+    return asyncio.run(runner())
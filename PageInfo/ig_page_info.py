@@ -1,9 +1,15 @@
-import requests
 import json
 import re
 
+from .http_client import get_client, run_sync
+
 
 def get_instagram_info(username):
+    """sync wrapper ของ fetch_instagram_info"""
+    return run_sync(fetch_instagram_info(username))
+
+
+async def fetch_instagram_info(username):
     # Endpoint ที่ Instagram ใช้ดึงข้อมูลผู้ใช้แบบ web (GraphQL)
     url = f"https://www.instagram.com/api/v1/users/web_profile_info/?username={username}"
 
@@ -18,10 +24,18 @@ def get_instagram_info(username):
     }
 
     # คุณสามารถเพิ่ม cookies ถ้าโดนบล็อก หรือใช้ session จาก browser
-    response = requests.get(url, headers=headers)
+    try:
+        response = await get_client().get(url, headers=headers)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return None
 
     if response.status_code == 200:
-        data = response.json()
+        try:
+            data = response.json()
+        except json.JSONDecodeError as e:
+            print(f"❌ Error parsing JSON: {e}")
+            return None
         user_data = data.get("data", {}).get("user", {})
         if user_data:
             result = {
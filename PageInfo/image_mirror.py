@@ -0,0 +1,318 @@
+# PageInfo/image_mirror.py
+"""
+Mirror expiring CDN images (fbcdn / tiktokcdn signed URLs) to our own storage.
+
+``mirror_urls(urls)`` downloads the distinct URLs concurrently through the
+shared HTTP client (PageInfo/http_client.py: pooling, per-host limits,
+retries). Each file is stored under the sha256 of its content, so the same
+avatar seen under a thousand different signed URLs is uploaded once. Files
+already in the storage are not uploaded again (``backend.exists``). It returns
+``{original_url: mirrored_url}`` for the URLs that worked.
+
+``mirror_model_images`` does this for whole tables: it collects the distinct
+unmirrored URLs of the given columns, mirrors them chunk by chunk, and writes
+one ``UPDATE ... WHERE col = <old url>`` per distinct URL inside a
+transaction per chunk. The management command ``mirror_images`` runs it;
+page imports (the ``import_pages`` command, ``add_page`` and
+``bulk_add_pages``) run it for ``PageInfo.profile_pic`` of the pages they
+just created when ``mirror_configured()``. Scrapers never mirror on their
+own: one backend per run, not one FTP login and folder listing per page.
+
+Storage backends:
+
+* ``ftp``: the public image folder of our web host (production). Uploads go
+  through a small pool of logged-in FTP sessions.
+* ``django``: any Django storage, ``default_storage`` by default. Used for
+  local runs and tests.
+
+Defaults can be overridden in settings (FTP values default to the FTP_* env vars)::
+
+    IMAGE_MIRROR = {
+        'backend': 'ftp',            # or 'django'
+        'concurrency': 8, 'chunk_size': 500, 'max_bytes': 10_000_000,
+        'ftp': {'host': ..., 'user': ..., 'password': ..., 'path': 'public_html/image',
+                'base_url': 'https://example.com/image/', 'pool_size': 4},
+        'django': {'prefix': 'mirror/'},
+    }
+"""
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+from ftplib import FTP, error_perm
+from io import BytesIO
+
+from django.conf import settings
+
+from .http_client import get_client, run_sync
+
+DEFAULTS = {
+    'backend': 'ftp',
+    'concurrency': 8,
+    'chunk_size': 500,
+    'max_bytes': 10_000_000,
+    'ftp': {
+        'host': os.getenv('FTP_HOST'),
+        'user': os.getenv('FTP_USER'),
+        'password': os.getenv('FTP_PASS'),
+        'path': '/'.join(p for p in (os.getenv('FTP_ROOT'), 'image') if p),
+        'base_url': os.getenv('FTP_BASE_URL'),
+        'pool_size': 4,
+    },
+    'django': {'prefix': 'mirror/'},
+}
+
+# นามสกุลจาก magic bytes (CDN บางทีส่ง content-type ผิด)
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG', 'png'),
+    (b'GIF8', 'gif'),
+    (b'RIFF', 'webp'),
+)
+
+
+def _config():
+    conf = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULTS.items()}
+    if settings.configured:
+        for key, value in (getattr(settings, 'IMAGE_MIRROR', {}) or {}).items():
+            if isinstance(value, dict):
+                conf.setdefault(key, {}).update(value)
+            else:
+                conf[key] = value
+    return conf
+
+
+def image_name(data):
+    """Storage name of an image: sha256 of its bytes + extension from its signature."""
+    ext = next((ext for magic, ext in _SIGNATURES if data.startswith(magic)), 'jpg')
+    return f"{hashlib.sha256(data).hexdigest()[:40]}.{ext}"
+
+
+class DjangoStorageBackend:
+    def __init__(self, storage=None, prefix='mirror/'):
+        if storage is None:
+            from django.core.files.storage import default_storage as storage
+        self.storage = storage
+        self.prefix = prefix
+
+    def is_mirrored(self, url):
+        return url.startswith(self.storage.url(self.prefix))
+
+    def exists(self, name):
+        return self.storage.exists(self.prefix + name)
+
+    def save(self, name, data):
+        from django.core.files.base import ContentFile
+
+        if not self.exists(name):
+            self.storage.save(self.prefix + name, ContentFile(data))
+        return self.url(name)
+
+    def url(self, name):
+        return self.storage.url(self.prefix + name)
+
+    def close(self):
+        pass
+
+
+class FTPBackend:
+    def __init__(self, host, user, password, path, base_url, pool_size=4):
+        if not (host and base_url):
+            raise ValueError("IMAGE_MIRROR['ftp'] needs host and base_url (FTP_HOST / FTP_BASE_URL)")
+        self.host, self.user, self.password, self.path = host, user, password, path
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.pool_size = pool_size
+        # ✅ slot = สิทธิ์ใช้ 1 connection; คืน slot ทุกครั้ง (รวมถึงตอน connection เสีย) จึงไม่มี thread ค้างรอ
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._names = None
+
+    def _connect(self):
+        ftp = FTP()
+        ftp.connect(self.host, 21, timeout=30)
+        ftp.login(self.user, self.password)
+        try:
+            ftp.cwd(self.path)
+        except error_perm:
+            ftp.mkd(self.path)
+            ftp.cwd(self.path)
+        return ftp
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, ftp, broken=False):
+        if broken:
+            try:
+                ftp.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(ftp)
+        self._slots.release()
+
+    def _listing(self):
+        # รายชื่อไฟล์ในโฟลเดอร์ อ่านครั้งเดียวแล้วจำไว้ (ไฟล์ตั้งชื่อตาม hash ชื่อซ้ำ = ไฟล์เดียวกัน)
+        with self._lock:
+            names = self._names
+        if names is None:
+            ftp = self._acquire()
+            try:
+                names = {os.path.basename(n) for n in ftp.nlst()}
+            except Exception:
+                self._release(ftp, broken=True)
+                raise
+            self._release(ftp)
+            with self._lock:
+                self._names = names
+        return names
+
+    def is_mirrored(self, url):
+        return url.startswith(self.base_url)
+
+    def exists(self, name):
+        return name in self._listing()
+
+    def save(self, name, data):
+        if not self.exists(name):
+            ftp = self._acquire()
+            try:
+                ftp.storbinary(f"STOR {name}", BytesIO(data))
+            except Exception:
+                self._release(ftp, broken=True)
+                raise
+            self._release(ftp)
+            with self._lock:
+                self._names.add(name)
+        return self.url(name)
+
+    def url(self, name):
+        return f"{self.base_url}{name}"
+
+    def close(self):
+        while True:
+            try:
+                ftp = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                ftp.quit()
+            except Exception:
+                ftp.close()
+
+
+def mirror_configured(conf=None):
+    """True when the configured backend can be used (FTP needs host and base_url)."""
+    conf = conf or _config()
+    if conf['backend'] == 'ftp':
+        return bool(conf['ftp'].get('host') and conf['ftp'].get('base_url'))
+    return conf['backend'] == 'django'
+
+
+def get_backend(conf=None):
+    conf = conf or _config()
+    if conf['backend'] == 'django':
+        return DjangoStorageBackend(**conf['django'])
+    if conf['backend'] == 'ftp':
+        return FTPBackend(**conf['ftp'])
+    raise ValueError(f"unknown IMAGE_MIRROR backend: {conf['backend']}")
+
+
+async def mirror_urls(urls, backend=None, concurrency=None):
+    """Mirror ``urls`` concurrently; returns ``{url: mirrored_url}`` (failed URLs are left out)."""
+    conf = _config()
+    own_backend = backend is None
+    backend = backend or get_backend(conf)
+    sem = asyncio.Semaphore(concurrency or conf['concurrency'])
+    by_hash = {}  # sha256 name -> task อัปโหลด (ไฟล์เดียวกันจากหลาย URL อัปโหลดครั้งเดียว)
+    stats = {'downloaded': 0, 'deduplicated': 0, 'failed': 0}
+
+    async def mirror_one(url):
+        async with sem:
+            try:
+                response = await get_client().get(url, follow_redirects=True)
+                if response.status_code >= 400:
+                    raise ValueError(f"HTTP {response.status_code}")
+                data = response.content
+                if not data or len(data) > conf['max_bytes']:
+                    raise ValueError(f"unexpected size {len(data)}")
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"❌ [mirror] download {url[:80]}: {e}")
+                return url, None
+        stats['downloaded'] += 1
+        name = image_name(data)
+        upload = by_hash.get(name)
+        if upload is None:
+            upload = by_hash[name] = asyncio.ensure_future(asyncio.to_thread(backend.save, name, data))
+        else:
+            stats['deduplicated'] += 1
+        try:
+            return url, await upload
+        except Exception as e:
+            stats['failed'] += 1
+            print(f"❌ [mirror] upload {name}: {e}")
+            return url, None
+
+    todo = {u for u in urls if u and not backend.is_mirrored(u)}
+    try:
+        results = await asyncio.gather(*(mirror_one(u) for u in todo))
+    finally:
+        if own_backend:
+            await asyncio.to_thread(backend.close)
+    print(f"✅ [mirror] {len(todo)} urls: {stats['downloaded']} downloaded, {len(by_hash)} distinct files, "
+          f"{stats['deduplicated']} duplicates, {stats['failed']} failed")
+    return {url: new_url for url, new_url in results if new_url}
+
+
+def mirror_url(url):
+    """Sync version for one URL; returns the original URL when mirroring fails."""
+    return run_sync(mirror_urls([url])).get(url, url)
+
+
+def mirror_model_images(model, fields, chunk_size=None, limit=None, backend=None, queryset=None):
+    """
+    Mirror every unmirrored URL in ``fields`` of ``model`` and rewrite the rows.
+    ``queryset`` limits which rows the URLs are collected from (default: all);
+    every row holding a mirrored URL is rewritten. Returns ``{field: rows updated}``.
+    """
+    from django.db import transaction
+
+    conf = _config()
+    chunk_size = chunk_size or conf['chunk_size']
+    own_backend = backend is None
+    backend = backend or get_backend(conf)
+    rows = model.objects.all() if queryset is None else queryset
+    updated = {}
+    try:
+        for field in fields:
+            urls = (
+                rows.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list(field, flat=True).distinct()
+            )
+            pending = [u for u in urls.iterator() if not backend.is_mirrored(u)]
+            if limit:
+                pending = pending[:limit]
+            print(f"📦 [mirror] {model.__name__}.{field}: {len(pending)} distinct urls")
+            updated[field] = 0
+            for start in range(0, len(pending), chunk_size):
+                mapping = run_sync(mirror_urls(pending[start:start + chunk_size], backend=backend))
+                # ✅ UPDATE ครั้งเดียวต่อ URL (avatar เดียวกันหลายพันแถวอัปเดตใน statement เดียว)
+                with transaction.atomic():
+                    for old, new in mapping.items():
+                        updated[field] += model.objects.filter(**{field: old}).update(**{field: new})
+    finally:
+        if own_backend:
+            backend.close()
+    return updated
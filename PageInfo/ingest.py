@@ -0,0 +1,133 @@
+# PageInfo/ingest.py
+"""
+Write path for scraped posts.
+
+Every place that stores scraper output (add_page, management commands) goes
+through these helpers so derived data such as the hashtag index and the
+stored engagement columns stay in sync with the post rows.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, ExpressionWrapper, F, FloatField, When
+from django.utils import timezone
+
+from .hashtags import sync_post_hashtags
+from .metrics import parse_count, facebook_engagement, tiktok_engagement, engagement_rate
+from .models import FacebookPost, TikTokPost
+
+
+def upsert_facebook_post(page_obj, post):
+    """Create/update one FacebookPost from a FB post/video/reel/live scraper dict."""
+    post_type = post.get("post_type", "post")
+    post_url = post.get("video_url") if post_type in ["video", "reel", "live"] else post.get("post_url")
+    post_imgs = (post.get("post_imgs") or []) + (
+        [post.get("video_thumbnail")] if post.get("video_thumbnail") else [])
+
+    # ✅ Fallback เวลา: ใช้ post_timestamp_dt หรือ post_date
+    post_timestamp_dt = post.get("post_timestamp_dt") or post.get("post_date")
+    if post_timestamp_dt and timezone.is_naive(post_timestamp_dt):
+        post_timestamp_dt = timezone.make_aware(post_timestamp_dt)
+
+    # ✅ สร้างข้อความเวลา หากไม่มี
+    post_timestamp_text = post.get("post_timestamp_text")
+    if not post_timestamp_text and post_timestamp_dt:
+        try:
+            post_timestamp_text = post_timestamp_dt.strftime("วัน%Aที่ %-d %B %Y เวลา %H:%M น.")
+        except ValueError:
+            post_timestamp_text = post_timestamp_dt.strftime("วัน%Aที่ %d %B %Y เวลา %H:%M น.")
+
+    total = facebook_engagement(post.get('reactions'), post.get('comment_count'), post.get('share_count'))
+
+    obj, _ = FacebookPost.objects.update_or_create(
+        post_id=post["post_id"],
+        defaults={
+            'page': page_obj,
+            'post_url': post_url,
+            'post_type': post_type,
+            'post_timestamp_dt': post_timestamp_dt,
+            'post_timestamp_text': post_timestamp_text or "",
+            'post_content': post.get('post_content', ""),
+            'post_imgs': post_imgs,
+            'reactions': post.get('reactions', {}),
+            'comment_count': post.get('comment_count', 0),
+            'share_count': post.get('share_count', 0),
+            'watch_count': post.get('watch_count'),
+            'total_engagement': total,
+            'engagement_rate': engagement_rate(total, page_obj.page_followers_count),
+        }
+    )
+    sync_post_hashtags(obj)
+    return obj
+
+
+def _tiktok_timestamp(post):
+    """แปลงวันที่จาก timestamp_unix หรือ string 'dd/mm/YYYY' เป็น datetime (aware)."""
+    ts_unix = post.get('timestamp_unix')
+    if ts_unix:
+        try:
+            dt_utc = datetime.fromtimestamp(int(ts_unix), tz=dt_timezone.utc)
+            return dt_utc.astimezone(timezone.get_default_timezone())
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถแปลง timestamp_unix '{ts_unix}': {e}")
+
+    post_timestamp_text = post.get('timestamp', '')
+    if post_timestamp_text and post_timestamp_text != 'ไม่พบวันที่':
+        try:
+            dt = datetime.strptime(post_timestamp_text, '%d/%m/%Y')
+            return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+        except ValueError as e:
+            print(f"⚠️ ไม่สามารถแปลงวันที่ '{post_timestamp_text}': {e}")
+    return None
+
+
+def upsert_tiktok_post(page_obj, post):
+    """Create/update one TikTokPost from a TikTokPostScraper dict (URL truncated to max_length)."""
+    likes = parse_count(post.get('reaction', 0))
+    comments = parse_count(post.get('comment', 0))
+    shares = parse_count(post.get('shared', 0))
+    saves = parse_count(post.get('saved', 0))
+    views = parse_count(post.get('views', 0))
+    total = tiktok_engagement(likes, comments, shares, saves)
+
+    obj, _ = TikTokPost.objects.update_or_create(
+        post_url=(post.get('post_url') or '')[:500],
+        defaults={
+            'page': page_obj,
+            'post_content': post.get('post_content', ''),
+            'post_imgs': (post.get('post_thumbnail') or '')[:500],
+            'post_timestamp': post.get('timestamp', ''),
+            'post_timestamp_dt': _tiktok_timestamp(post),
+            'like_count': likes,
+            'comment_count': comments,
+            'share_count': shares,
+            'save_count': saves,
+            'view_count': views,
+            'total_engagement': total,
+            'engagement_rate': engagement_rate(total, page_obj.page_followers_count, views),
+            'platform': 'tiktok'
+        }
+    )
+    sync_post_hashtags(obj)
+    return obj
+
+
+def refresh_engagement_rates(page_obj):
+    """
+    Recompute engagement_rate for every post of ``page_obj`` in one UPDATE per
+    table, e.g. after its follower count changed. Mirrors metrics.engagement_rate.
+    """
+    followers = page_obj.page_followers_count
+    if followers:
+        rate = ExpressionWrapper(F('total_engagement') * 100.0 / followers, output_field=FloatField())
+        fb_rate = tt_rate = rate
+    else:
+        fb_rate = None
+        tt_rate = Case(
+            When(view_count__gt=0, then=ExpressionWrapper(
+                F('total_engagement') * 100.0 / F('view_count'), output_field=FloatField())),
+            default=None,
+            output_field=FloatField(),
+        )
+    updated = FacebookPost.objects.filter(page=page_obj).update(engagement_rate=fb_rate)
+    updated += TikTokPost.objects.filter(page=page_obj).update(engagement_rate=tt_rate)
+    return updated
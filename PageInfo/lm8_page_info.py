@@ -1,8 +1,15 @@
-import requests
 from bs4 import BeautifulSoup
 import re
 
+from .http_client import get_client, run_sync
+
+
 def get_lemon8_info(url):
+    """sync wrapper ของ fetch_lemon8_info"""
+    return run_sync(fetch_lemon8_info(url))
+
+
+async def fetch_lemon8_info(url):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                       "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -10,7 +17,11 @@ def get_lemon8_info(url):
         "Accept-Language": "th-TH,th;q=0.9,en-US;q=0.8,en;q=0.7"
     }
 
-    response = requests.get(url, headers=headers)
+    try:
+        response = await get_client().get(url, headers=headers)
+    except Exception as e:
+        print(f"❌ Error fetching Lemon8: {e}")
+        return None
     if response.status_code != 200:
         print(f"❌ HTTP Error: {response.status_code}")
         return None
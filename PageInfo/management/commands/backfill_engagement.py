@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from PageInfo.models import PageInfo, FacebookPost, TikTokPost
+from PageInfo.metrics import facebook_engagement, tiktok_engagement
+from PageInfo.ingest import refresh_engagement_rates
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored total_engagement / engagement_rate for FacebookPost and TikTokPost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, action='append', dest='page_ids',
+                            help='Only recompute posts of this PageInfo id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        page_ids = options.get('page_ids')
+        batch_size = options['batch_size']
+
+        fb_qs = FacebookPost.objects.only('id', 'reactions', 'comment_count', 'share_count')
+        tt_qs = TikTokPost.objects.only('id', 'like_count', 'comment_count', 'share_count', 'save_count')
+        pages = PageInfo.objects.all()
+        if page_ids:
+            fb_qs = fb_qs.filter(page_id__in=page_ids)
+            tt_qs = tt_qs.filter(page_id__in=page_ids)
+            pages = pages.filter(id__in=page_ids)
+
+        # 1) total_engagement (ต้องคำนวณใน Python เพราะ reactions เป็น JSON)
+        for model, qs, compute in (
+            (FacebookPost, fb_qs, lambda p: facebook_engagement(p.reactions, p.comment_count, p.share_count)),
+            (TikTokPost, tt_qs, lambda p: tiktok_engagement(p.like_count, p.comment_count, p.share_count, p.save_count)),
+        ):
+            batch = []
+            count = 0
+            for post in qs.order_by('id').iterator(chunk_size=batch_size):
+                post.total_engagement = compute(post)
+                batch.append(post)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, ['total_engagement'])
+                    count += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_update(batch, ['total_engagement'])
+                count += len(batch)
+            self.stdout.write(self.style.SUCCESS(f'{model.__name__}: total_engagement updated for {count} posts'))
+
+        # 2) engagement_rate ทีละเพจด้วย UPDATE เดียวต่อ table
+        updated = 0
+        for page in pages.only('id', 'page_followers_count'):
+            updated += refresh_engagement_rates(page)
+        self.stdout.write(self.style.SUCCESS(f'engagement_rate updated for {updated} posts'))
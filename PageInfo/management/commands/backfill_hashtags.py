@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from PageInfo.models import FacebookPost, TikTokPost
+from PageInfo.hashtags import rebuild_hashtags
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the PostHashtag index from existing FacebookPost/TikTokPost content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, action='append', dest='page_ids',
+                            help='Only rebuild posts of this PageInfo id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        page_ids = options.get('page_ids')
+        batch_size = options['batch_size']
+
+        for model in (FacebookPost, TikTokPost):
+            qs = model.objects.only('id', 'page_id', 'post_content', 'post_timestamp_dt').order_by('id')
+            if page_ids:
+                qs = qs.filter(page_id__in=page_ids)
+
+            written = rebuild_hashtags(qs.iterator(chunk_size=batch_size), batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: indexed {written} hashtags'
+            ))
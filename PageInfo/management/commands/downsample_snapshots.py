@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from PageInfo.snapshots import downsample_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Thin out old PostMetricSnapshot rows (hourly after N days, daily after M days)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hourly-after', type=int, default=7,
+                            help='Keep one snapshot per post per hour once older than this many days')
+        parser.add_argument('--daily-after', type=int, default=30,
+                            help='Keep one snapshot per post per day once older than this many days')
+
+    def handle(self, *args, **options):
+        deleted = downsample_snapshots(hourly_after=options['hourly_after'], daily_after=options['daily_after'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} old snapshots'))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from PageInfo.image_mirror import mirror_configured, mirror_model_images
+from PageInfo.models import PageGroup, PageInfo
+from PageInfo.page_import import import_pages, parse_url_csv, parse_url_lines
+
+
+class Command(BaseCommand):
+    help = 'Import many page URLs into a PageGroup (platform is detected from each URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='Page URLs')
+        parser.add_argument('--group', type=int, required=True, help='PageGroup id to add the pages to')
+        parser.add_argument('--file', dest='file_path',
+                            help='CSV (url column or first column) or text file with one URL per line')
+        parser.add_argument('--no-posts', action='store_true', help='Only create PageInfo, skip post scraping')
+
+    def handle(self, *args, **options):
+        try:
+            group = PageGroup.objects.get(id=options['group'])
+        except PageGroup.DoesNotExist:
+            raise CommandError(f"PageGroup {options['group']} not found")
+
+        urls = parse_url_lines(' '.join(options['urls']))
+        if options.get('file_path'):
+            with open(options['file_path'], encoding='utf-8-sig') as f:
+                file_urls = parse_url_csv(f) if options['file_path'].lower().endswith('.csv') else parse_url_lines(f.read())
+            urls += [url for url in file_urls if url not in urls]
+        if not urls:
+            raise CommandError('No URLs given')
+
+        self.stdout.write(f'Importing {len(urls)} URLs into "{group.group_name}"')
+        done = []
+
+        def report(result):
+            done.append(result)
+            line = (f'[{len(done)}/{len(urls)}] {result.status:<8} {result.platform or "?":<9} '
+                    f'{result.url} ({result.posts} posts, {result.elapsed:.1f}s) {result.message}')
+            self.stdout.write(self.style.SUCCESS(line) if result.ok else self.style.ERROR(line))
+
+        results = import_pages(group, urls, scrape_posts_too=not options['no_posts'], on_result=report)
+
+        created_ids = [r.page_id for r in results if r.status == 'created']
+        created = len(created_ids)
+        failed = sum(1 for r in results if not r.ok)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {created} created, {len(results) - created - failed} already existed, {failed} failed'
+        ))
+
+        # ✅ รูปโปรไฟล์จาก CDN หมดอายุได้: mirror ทีเดียวทั้งชุดหลัง import (ไม่ทำใน scrape ทีละเพจ)
+        if created and mirror_configured():
+            updated = mirror_model_images(PageInfo, ['profile_pic'],
+                                          queryset=PageInfo.objects.filter(id__in=created_ids))
+            self.stdout.write(self.style.SUCCESS(f"Mirrored profile pictures: {updated['profile_pic']} rows updated"))
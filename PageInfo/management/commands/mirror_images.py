@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from PageInfo.image_mirror import get_backend, mirror_model_images
+from PageInfo.models import FacebookComment, PageInfo, TikTokPost
+
+# ตาราง/คอลัมน์ที่เก็บ URL รูปจาก CDN ที่หมดอายุได้
+TARGETS = {
+    'comments': (FacebookComment, ['image_url', 'profile_img_url']),
+    'pages': (PageInfo, ['profile_pic']),
+    'tiktok': (TikTokPost, ['post_imgs']),
+}
+
+
+class Command(BaseCommand):
+    help = 'Copy expiring fbcdn/tiktokcdn images to our own storage and point the rows at the copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), action='append', dest='targets',
+                            help='Which table to mirror (repeatable, default: comments)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Distinct URLs mirrored per batch of DB updates')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Mirror at most this many distinct URLs per column')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        try:
+            for target in options.get('targets') or ['comments']:
+                model, fields = TARGETS[target]
+                updated = mirror_model_images(model, fields, chunk_size=options['chunk_size'],
+                                              limit=options['limit'], backend=backend)
+                for field, count in updated.items():
+                    self.stdout.write(self.style.SUCCESS(f'{model.__name__}.{field}: {count} rows updated'))
+        finally:
+            backend.close()
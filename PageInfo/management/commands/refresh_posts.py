@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from PageInfo.models import PageInfo
+from PageInfo.refresh import estimated_minutes, refresh_due_posts
+
+
+class Command(BaseCommand):
+    help = ('Re-scrape post metrics of pages that are due (newest posts first) '
+            'within the hourly browser-minutes budget; run from cron every few minutes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--platform', action='append', dest='platforms',
+                            help='Only refresh pages of this platform (repeatable)')
+        parser.add_argument('--group', type=int, action='append', dest='group_ids',
+                            help='Only refresh pages of this PageGroup id (repeatable)')
+        parser.add_argument('--budget', type=float,
+                            help='Browser-minutes per hour (default: settings.POST_REFRESH)')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the jobs that would run')
+
+    def handle(self, *args, **options):
+        pages = None
+        if options.get('platforms') or options.get('group_ids'):
+            pages = PageInfo.objects.all()
+            if options.get('platforms'):
+                pages = pages.filter(platform__in=options['platforms'])
+            if options.get('group_ids'):
+                pages = pages.filter(page_group_id__in=options['group_ids'])
+
+        def report(state):
+            line = (f'[{state.last_status}] {state.page.page_name} {state.kind}: '
+                    f'{state.posts_seen} posts in {state.last_duration_s:.0f}s, next {state.next_due_at:%Y-%m-%d %H:%M}')
+            self.stdout.write(self.style.SUCCESS(line) if state.last_status == 'ok' else self.style.ERROR(line))
+
+        started = time.monotonic()
+        planned, remaining = refresh_due_posts(
+            pages, budget_minutes=options.get('budget'), on_result=report, dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            for state in planned:
+                self.stdout.write(f'P{state.priority} {state.page.page_name} {state.kind} '
+                                  f'(~{estimated_minutes(state):.1f} min, due {state.next_due_at or "now"})')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(planned)} jobs {"planned" if options["dry_run"] else "run"} '
+            f'in {time.monotonic() - started:.1f}s, {max(remaining, 0):.1f} browser-minutes left this hour'
+        ))
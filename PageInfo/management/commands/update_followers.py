@@ -1,24 +1,39 @@
+import time
+
 from django.core.management.base import BaseCommand
-from PageInfo.models import PageInfo, FollowerHistory
-from datetime import date
+from PageInfo.models import PageInfo
+from PageInfo.followers import refresh_follower_counts
+
 
 class Command(BaseCommand):
-    help = 'Update follower count for all pages and store it in FollowerHistory'
-
-    def handle(self, *args, **kwargs):
-        for page in PageInfo.objects.all():
-            current_count = page.page_followers_count or 0
-
-            if not FollowerHistory.objects.filter(page=page, date=date.today()).exists():
-                FollowerHistory.objects.create(
-                    page=page,
-                    date=date.today(),
-                    page_followers_count=current_count
-                )
-                self.stdout.write(self.style.SUCCESS(
-                    f'Saved {current_count} followers for {page.page_name}'
-                ))
+    help = 'Fetch live follower counts for all pages concurrently and store them in FollowerHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--platform', action='append', dest='platforms',
+                            help='Only refresh pages of this platform (repeatable)')
+        parser.add_argument('--group', type=int, action='append', dest='group_ids',
+                            help='Only refresh pages of this PageGroup id (repeatable)')
+
+    def handle(self, *args, **options):
+        pages = PageInfo.objects.all()
+        if options.get('platforms'):
+            pages = pages.filter(platform__in=options['platforms'])
+        if options.get('group_ids'):
+            pages = pages.filter(page_group_id__in=options['group_ids'])
+
+        def report(page, status, count):
+            if status == 'ok':
+                self.stdout.write(self.style.SUCCESS(f'Saved {count} followers for {page.page_name}'))
             else:
-                self.stdout.write(self.style.WARNING(
-                    f'Data for {page.page_name} already exists today'
-                ))
+                self.stdout.write(self.style.WARNING(f'[{status}] {page.platform} {page.page_name}'))
+
+        started = time.monotonic()
+        results = refresh_follower_counts(pages, on_result=report)
+
+        summary = {}
+        for status, _ in results.values():
+            summary[status] = summary.get(status, 0) + 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {len(results)} pages in {time.monotonic() - started:.1f}s: '
+            + ', '.join(f'{k}={v}' for k, v in sorted(summary.items()))
+        ))
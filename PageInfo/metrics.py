@@ -0,0 +1,97 @@
+# PageInfo/metrics.py
+"""
+Shared helpers for turning scraped count strings into integers.
+
+Scrapers hand us counts in many shapes ("ถูกใจ 5", "1,234", "12K followers",
+"1.2 พัน"), so everything that needs a number for sorting or aggregation
+goes through ``parse_count`` instead of re-implementing the parsing.
+"""
+import json
+import re
+
+_SUFFIX_MULTIPLIERS = {
+    'k': 1_000,
+    'm': 1_000_000,
+    'b': 1_000_000_000,
+    'พัน': 1_000,
+    'หมื่น': 10_000,
+    'แสน': 100_000,
+    'ล้าน': 1_000_000,
+    'thousand': 1_000,
+    'million': 1_000_000,
+    'billion': 1_000_000_000,
+}
+
+# ตัวเลข: คอมม่าคั่นหลักพันต้องตามด้วยเลข 3 หลักพอดี ("1,234") ส่วนคอมม่าตามด้วย 1-2 หลัก
+# เป็นทศนิยมแบบยุโรป ("1,2" = 1.2 ไม่ใช่ 12)
+_COUNT_RE = re.compile(
+    r'(\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d+(?:\.\d+|,\d{1,2}(?![\d,]))?)'
+    r'\s*(?:(thousand|million|billion)s?|(k|m|b|พัน|หมื่น|แสน|ล้าน))?(?![a-z])',
+    re.IGNORECASE,
+)
+
+
+def parse_count(value):
+    """
+    Return ``value`` as a non-negative int.
+
+    Accepts ints, floats and strings such as 'ถูกใจ 5', '1,234 likes',
+    '12K followers', '5 million', '1.2 พัน' or '1,2K' (comma decimal).
+    Anything without a number returns 0.
+    """
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+
+    match = _COUNT_RE.search(str(value))
+    if not match:
+        return 0
+
+    digits = match.group(1)
+    # คอมม่าเดียวตามด้วย 1-2 หลัก = จุดทศนิยม ที่เหลือเป็นตัวคั่นหลักพัน
+    number = float(digits.replace(',', '.') if re.fullmatch(r'\d+,\d{1,2}', digits) else digits.replace(',', ''))
+    suffix = (match.group(2) or match.group(3) or '').lower()
+    return int(number * _SUFFIX_MULTIPLIERS.get(suffix, 1))
+
+
+def parse_optional_count(value):
+    """Like ``parse_count`` but keeps ``None``/blank as ``None`` for nullable columns."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return parse_count(value)
+
+
+def reactions_total(reactions):
+    """Sum of all reaction types in a FacebookPost.reactions dict (JSON string tolerated)."""
+    if isinstance(reactions, str):
+        try:
+            reactions = json.loads(reactions)
+        except json.JSONDecodeError:
+            return 0
+    if not isinstance(reactions, dict):
+        return 0
+    return sum(parse_count(v) for k, v in reactions.items() if k != 'ทั้งหมด')
+
+
+def facebook_engagement(reactions, comment_count, share_count):
+    """All reactions + comments + shares."""
+    return reactions_total(reactions) + parse_count(comment_count) + parse_count(share_count)
+
+
+def tiktok_engagement(like_count, comment_count, share_count, save_count):
+    """Likes + comments + shares + saves."""
+    return sum(parse_count(v) for v in (like_count, comment_count, share_count, save_count))
+
+
+def engagement_rate(total_engagement, followers=None, views=None):
+    """
+    Engagement as a percentage of ``followers``; when the follower count is
+    unknown, of ``views`` (TikTok). ``None`` when neither is available.
+    """
+    base = followers if followers else views
+    if not base:
+        return None
+    return round(parse_count(total_engagement) * 100.0 / base, 4)
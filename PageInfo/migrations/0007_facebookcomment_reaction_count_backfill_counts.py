@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:10
+
+import re
+
+from django.db import migrations, models
+
+# สำเนาของ PageInfo.metrics.parse_count ณ ตอนเขียน migration นี้ (migration ห้าม import โค้ดที่ยังแก้ต่อได้)
+_SUFFIX_MULTIPLIERS = {
+    'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000,
+    'พัน': 1_000, 'หมื่น': 10_000, 'แสน': 100_000, 'ล้าน': 1_000_000,
+    'thousand': 1_000, 'million': 1_000_000, 'billion': 1_000_000_000,
+}
+_COUNT_RE = re.compile(
+    r'(\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d+(?:\.\d+|,\d{1,2}(?![\d,]))?)'
+    r'\s*(?:(thousand|million|billion)s?|(k|m|b|พัน|หมื่น|แสน|ล้าน))?(?![a-z])',
+    re.IGNORECASE,
+)
+
+
+def parse_count(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+    match = _COUNT_RE.search(str(value))
+    if not match:
+        return 0
+    digits = match.group(1)
+    number = float(digits.replace(',', '.') if re.fullmatch(r'\d+,\d{1,2}', digits) else digits.replace(',', ''))
+    suffix = (match.group(2) or match.group(3) or '').lower()
+    return int(number * _SUFFIX_MULTIPLIERS.get(suffix, 1))
+
+
+def parse_optional_count(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return parse_count(value)
+
+
+def backfill_counts(apps, schema_editor):
+    FacebookComment = apps.get_model('PageInfo', 'FacebookComment')
+    PageInfo = apps.get_model('PageInfo', 'PageInfo')
+
+    batch = []
+    for comment in FacebookComment.objects.exclude(reaction__isnull=True).exclude(reaction='').only('id', 'reaction').iterator(chunk_size=2000):
+        comment.reaction_count = parse_count(comment.reaction)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            FacebookComment.objects.bulk_update(batch, ['reaction_count'])
+            batch = []
+    if batch:
+        FacebookComment.objects.bulk_update(batch, ['reaction_count'])
+
+    # page_likes_count becomes a BIGINT in 0008, so leave only digits (or NULL) here.
+    # page_followers_count was only filled for Facebook; other platforms kept the text in page_followers.
+    pages = []
+    for page in PageInfo.objects.only('id', 'page_likes_count', 'page_likes', 'page_followers', 'page_followers_count'):
+        likes = parse_optional_count(page.page_likes_count)
+        if likes is None:
+            likes = parse_optional_count(page.page_likes)
+        page.page_likes_count = str(likes) if likes is not None else None
+        if page.page_followers_count is None:
+            page.page_followers_count = parse_optional_count(page.page_followers)
+        pages.append(page)
+    PageInfo.objects.bulk_update(pages, ['page_likes_count', 'page_followers_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0006_alter_tiktokpost_post_imgs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='reaction_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0007_facebookcomment_reaction_count_backfill_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pageinfo',
+            name='page_likes_count',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['post_url'], name='fbcomment_post_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'sentiment'], name='fbcomment_dash_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'category'], name='fbcomment_dash_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'keyword_group'], name='fbcomment_dash_kw_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', '-reaction_count'], name='fbcomment_dash_react_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['page', '-post_timestamp_dt'], name='fbpost_page_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['page', '-post_timestamp_dt'], name='ttpost_page_ts_idx'),
+        ),
+    ]
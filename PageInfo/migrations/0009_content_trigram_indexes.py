@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:02
+
+from django.db import migrations
+
+# (index name, table, column) — UPPER(col) matches the SQL Django emits for __icontains on Postgres
+TRIGRAM_INDEXES = [
+    ('fbpost_content_trgm_idx', 'PageInfo_facebookpost', 'post_content'),
+    ('ttpost_content_trgm_idx', 'PageInfo_tiktokpost', 'post_content'),
+    ('fbcomment_content_trgm_idx', 'PageInfo_facebookcomment', 'content'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin (UPPER("{column}") gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0008_alter_pageinfo_page_likes_count_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
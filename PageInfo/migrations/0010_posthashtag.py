@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0009_content_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=255)),
+                ('post_timestamp_dt', models.DateTimeField(blank=True, null=True)),
+                ('facebook_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hashtags', to='PageInfo.facebookpost')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtags', to='PageInfo.pageinfo')),
+                ('tiktok_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hashtags', to='PageInfo.tiktokpost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['page', 'tag'], name='hashtag_page_tag_idx'), models.Index(fields=['tag', 'post_timestamp_dt'], name='hashtag_tag_ts_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facebook_post', 'tag'), name='uniq_fbpost_hashtag'), models.UniqueConstraint(fields=('tiktok_post', 'tag'), name='uniq_ttpost_hashtag')],
+            },
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:16
+
+import json
+import re
+
+from django.db import migrations, models
+
+# สำเนาของ PageInfo.metrics ณ ตอนเขียน migration นี้ (migration ห้าม import โค้ดที่ยังแก้ต่อได้)
+_SUFFIX_MULTIPLIERS = {
+    'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000,
+    'พัน': 1_000, 'หมื่น': 10_000, 'แสน': 100_000, 'ล้าน': 1_000_000,
+    'thousand': 1_000, 'million': 1_000_000, 'billion': 1_000_000_000,
+}
+_COUNT_RE = re.compile(
+    r'(\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d+(?:\.\d+|,\d{1,2}(?![\d,]))?)'
+    r'\s*(?:(thousand|million|billion)s?|(k|m|b|พัน|หมื่น|แสน|ล้าน))?(?![a-z])',
+    re.IGNORECASE,
+)
+
+
+def parse_count(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+    match = _COUNT_RE.search(str(value))
+    if not match:
+        return 0
+    digits = match.group(1)
+    number = float(digits.replace(',', '.') if re.fullmatch(r'\d+,\d{1,2}', digits) else digits.replace(',', ''))
+    suffix = (match.group(2) or match.group(3) or '').lower()
+    return int(number * _SUFFIX_MULTIPLIERS.get(suffix, 1))
+
+
+def reactions_total(reactions):
+    if isinstance(reactions, str):
+        try:
+            reactions = json.loads(reactions)
+        except json.JSONDecodeError:
+            return 0
+    if not isinstance(reactions, dict):
+        return 0
+    return sum(parse_count(v) for k, v in reactions.items() if k != 'ทั้งหมด')
+
+
+def facebook_engagement(reactions, comment_count, share_count):
+    return reactions_total(reactions) + parse_count(comment_count) + parse_count(share_count)
+
+
+def tiktok_engagement(like_count, comment_count, share_count, save_count):
+    return sum(parse_count(v) for v in (like_count, comment_count, share_count, save_count))
+
+
+def backfill_total_engagement(apps, schema_editor):
+    FacebookPost = apps.get_model('PageInfo', 'FacebookPost')
+    TikTokPost = apps.get_model('PageInfo', 'TikTokPost')
+
+    batch = []
+    for post in FacebookPost.objects.only('id', 'reactions', 'comment_count', 'share_count').iterator(chunk_size=2000):
+        post.total_engagement = facebook_engagement(post.reactions, post.comment_count, post.share_count)
+        batch.append(post)
+        if len(batch) >= 2000:
+            FacebookPost.objects.bulk_update(batch, ['total_engagement'])
+            batch = []
+    if batch:
+        FacebookPost.objects.bulk_update(batch, ['total_engagement'])
+
+    batch = []
+    for post in TikTokPost.objects.only('id', 'like_count', 'comment_count', 'share_count', 'save_count').iterator(chunk_size=2000):
+        post.total_engagement = tiktok_engagement(post.like_count, post.comment_count, post.share_count, post.save_count)
+        batch.append(post)
+        if len(batch) >= 2000:
+            TikTokPost.objects.bulk_update(batch, ['total_engagement'])
+            batch = []
+    if batch:
+        TikTokPost.objects.bulk_update(batch, ['total_engagement'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0010_posthashtag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookpost',
+            name='total_engagement',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tiktokpost',
+            name='total_engagement',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_total_engagement, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['page', '-total_engagement'], name='fbpost_page_eng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['page', '-total_engagement'], name='ttpost_page_eng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['page', '-view_count'], name='ttpost_page_views_idx'),
+        ),
+    ]
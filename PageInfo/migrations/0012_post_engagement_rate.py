@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0011_post_total_engagement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookpost',
+            name='engagement_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tiktokpost',
+            name='engagement_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['page', '-engagement_rate'], name='fbpost_page_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['page', '-engagement_rate'], name='ttpost_page_rate_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:20
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def dedupe_follower_history(apps, schema_editor):
+    # เก็บแถวล่าสุด (id มากสุด) ของแต่ละ (page, date) ไว้ก่อนสร้าง unique constraint
+    FollowerHistory = apps.get_model('PageInfo', 'FollowerHistory')
+    dupes = (
+        FollowerHistory.objects.values('page_id', 'date')
+        .annotate(keep_id=Max('id'), n=models.Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        FollowerHistory.objects.filter(page_id=row['page_id'], date=row['date']).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0012_post_engagement_rate'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_follower_history, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='followerhistory',
+            constraint=models.UniqueConstraint(fields=('page', 'date'), name='uniq_followerhistory_page_date'),
+        ),
+    ]
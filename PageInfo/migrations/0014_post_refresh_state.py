@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0013_followerhistory_unique_page_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRefreshState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Facebook posts'), ('video', 'Facebook videos'), ('reel', 'Facebook reels'), ('live', 'Facebook lives'), ('tiktok', 'TikTok videos')], max_length=10)),
+                ('priority', models.PositiveSmallIntegerField(default=0)),
+                ('next_due_at', models.DateTimeField(blank=True, null=True)),
+                ('last_scraped_at', models.DateTimeField(blank=True, null=True)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_duration_s', models.FloatField(blank=True, null=True)),
+                ('est_minutes', models.FloatField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, default='', max_length=20)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('failures', models.PositiveSmallIntegerField(default=0)),
+                ('posts_seen', models.IntegerField(default=0)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_states', to='PageInfo.pageinfo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['priority', 'next_due_at'], name='refreshstate_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('page', 'kind'), name='uniq_refreshstate_page_kind')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0014_post_refresh_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostMetricSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('captured_at', models.DateTimeField()),
+                ('view_count', models.IntegerField(blank=True, null=True)),
+                ('like_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('share_count', models.IntegerField(default=0)),
+                ('save_count', models.IntegerField(default=0)),
+                ('total_engagement', models.IntegerField(default=0)),
+                ('facebook_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='PageInfo.facebookpost')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_snapshots', to='PageInfo.pageinfo')),
+                ('tiktok_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='PageInfo.tiktokpost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facebook_post', 'captured_at'], name='snapshot_fbpost_ts_idx'), models.Index(fields=['tiktok_post', 'captured_at'], name='snapshot_ttpost_ts_idx'), models.Index(fields=['page', 'captured_at'], name='snapshot_page_ts_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:43
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+# สำเนาของ PageInfo.comment_sync.comment_fingerprint ณ ตอนเขียน migration นี้
+# (migration ห้าม import โค้ดที่ยังแก้ต่อได้)
+THAI_MONTHS = (
+    'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
+    'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม',
+)
+_ABSOLUTE_DATE = re.compile(r'\d{4}|' + '|'.join(THAI_MONTHS))
+
+
+def _normalize(text):
+    return ' '.join((text or '').split())
+
+
+def comment_fingerprint(author, content, timestamp_text=None):
+    timestamp = _normalize(timestamp_text)
+    stable = timestamp if _ABSOLUTE_DATE.search(timestamp) else ''
+    raw = f"{_normalize(author)}\n{_normalize(content)}\n{stable}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def backfill(apps, schema_editor):
+    FacebookComment = apps.get_model('PageInfo', 'FacebookComment')
+    FBCommentDashboard = apps.get_model('PageInfo', 'FBCommentDashboard')
+
+    batch = []
+    for comment in FacebookComment.objects.only('id', 'author', 'content', 'timestamp_text').iterator(chunk_size=2000):
+        comment.fingerprint = comment_fingerprint(comment.author, comment.content, comment.timestamp_text)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            FacebookComment.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        FacebookComment.objects.bulk_update(batch, ['fingerprint'])
+
+    # dashboard เก่าเก็บไว้แค่ post_id (URL ที่ตัด query ออกแล้ว)
+    FBCommentDashboard.objects.filter(link_url='').exclude(post_id__isnull=True).update(link_url=models.F('post_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0015_post_metric_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='fbcommentdashboard',
+            name='comments_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fbcommentdashboard',
+            name='link_url',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'fingerprint'], name='fbcomment_dash_fp_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
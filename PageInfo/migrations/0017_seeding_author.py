@@ -0,0 +1,172 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:47
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# รายชื่อตั้งต้น นำเข้าเป็น SeedingAuthor แบบ global (ใช้ทุก campaign)
+# หลังจากนั้นเพิ่ม/ลบรายชื่อผ่าน admin และ normalize_author เป็นสำเนา ณ ตอนเขียน migration นี้
+# (migration ห้าม import โค้ดที่ยังแก้ต่อได้)
+SEEDING_AUTHORS = {
+    "Beybie Beechaya",
+    "Anisara threesha",
+    "Bright Kevalin",
+    "Donlapa Chararat",
+    "Kamonchanok KengKla",
+    "Pimwarun Krongkarn",
+    "Kwanjira Kraiwit",
+    "Tukta Baikhao",
+    "Mooh Jarintip",
+    "Palita Balee",
+    "Kornnapa moonnak",
+    "Nick Napapon",
+    "Anna Patnicha",
+    "Veenut Anchisa",
+    "Gadesiri Muangman",
+    "Jenn Manuschaya",
+    "Saifon nick",
+    "Pu Punnipa",
+    "Pop Chalalai",
+    "Nan Roniya",
+    "Marie Papawarin",
+    "Por Jeerach",
+    "Wan Rawiwan",
+    "Nick Siwapon",
+    "Mos Jirawadee",
+    "Sasiton LookNook",
+    "Aey Saranya",
+    "Tik Wanwipa",
+    "Ploy Natcha",
+    "Nuk Jintara",
+    "BeeBie Hathairat",
+    "Kik Panadda",
+    "Ja Thanaporn",
+    "Yeeh Phattarapon",
+    "Lek Kanjana",
+    "Meeh Chananya",
+    "Nook Supansa",
+    "Ning Ponnapa",
+    "WiWi Wilaiwan",
+    "Preaw Narisa",
+    "Tip Kamoltip",
+    "Jeeranan Cha",
+    "Malee Malai",
+    "ศศิประภา แก้วกาญ",
+    "NidNoy Ponwipa",
+    "Hong Napatwarin",
+    "Mai Tippawan",
+    "Dean Sakawdean",
+    "Vew Supattaree",
+    "Jin Mayteenee",
+    "Kea Kannika",
+    "Lalinsiri Lin",
+    "Kun Chatchanok",
+    "Nuch Weeranuch",
+    "Mint Suprapa",
+    "Nook Wilasinee",
+    "Siraprapha Boonya",
+    "Panutda Tongdee",
+    "Oui Araya",
+    "Lek Sumalee",
+    "Jane Suthicha",
+    "Pum Rattahawadee",
+    "Boom Netnapa",
+    "Bim Nichapa",
+    "Pim Nonoun",
+    "Neena Sunee",
+    "Noey Pitchanan",
+    "Chu Yuwadee",
+    "Neena Suda",
+    "Ket Ketsaraporn",
+    "Ploy Nanthiya",
+    "Chom Chompu",
+    "Pom Suphichaya",
+    "Koy Watchareeya",
+    "Aoh Dutsanee",
+    "Beer Sirorat",
+    "Ying Ying Napapon",
+    "Jeab Aranya",
+    "Nattapa Nakonsan",
+    "Junsuda Sangtong",
+    "NingNing Piyachat",
+    "Ratchanee Pantong",
+    "Saiphan Sangyot",
+    "Gift Supattra",
+    "Keaw Narakorn",
+    "Oil Siriwanna",
+    "Panjaporn Phosrikeaw",
+    "Natthanun Chalee",
+    "Pimrapa Pom",
+    "มิ้นท์ มินตรา",
+    "บิว จุฑารัตน์ แสงมนี",
+    "ออกัส นริสรา",
+    "Aey Thitima",
+    "Duangdao ด้วยรักและปลาทู",
+    "Parichat Thitipechakul",
+    "Kotchakorn Sakdikul",
+    "Wanida Saekue",
+    "Nida Suntasak",
+    "Arisa Sakolvipas",
+    "Nisarat Chaiyarit",
+    "Varunee Cheyasak",
+    "Pornnapa Wannavijit",
+    "Thanthip Manapensiri",
+    "Kamonchon Kiattikul",
+}
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, '\u200b\u200c\u200d\u2060\ufeff'))
+
+
+def _is_thai(ch):
+    return '\u0e00' <= ch <= '\u0e7f'
+
+
+def normalize_author(name):
+    """Comparable form of a display name: 'Mooh  Jarintip.' -> 'mooh jarintip', 'Noémie' -> 'noemie'."""
+    text = unicodedata.normalize('NFKD', (name or '').translate(_ZERO_WIDTH)).casefold()
+    chars = []
+    for ch in text:
+        if _is_thai(ch):
+            chars.append(ch)  # สระ/วรรณยุกต์ไทยเป็นส่วนของชื่อ ห้ามตัดทิ้ง
+        elif unicodedata.combining(ch):
+            continue  # accent ของอักษรละติน
+        else:
+            chars.append(ch if ch.isalnum() else ' ')
+    return unicodedata.normalize('NFC', ' '.join(''.join(chars).split()))
+
+
+def import_seeding_authors(apps, schema_editor):
+    SeedingAuthor = apps.get_model('PageInfo', 'SeedingAuthor')
+    rows = {}
+    for name in sorted(SEEDING_AUTHORS):
+        rows.setdefault(normalize_author(name), name)
+    SeedingAuthor.objects.bulk_create(
+        [SeedingAuthor(name=name, normalized_name=key) for key, name in rows.items() if key],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0016_comment_fingerprint_dashboard_link'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedingAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(db_index=True, editable=False, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign_group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seeding_authors', to='PageInfo.commentcampaigngroup')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('campaign_group', 'normalized_name'), name='uniq_seeding_author_campaign')],
+            },
+        ),
+        migrations.RunPython(import_seeding_authors, migrations.RunPython.noop),
+    ]
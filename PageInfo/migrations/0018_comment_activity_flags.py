@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:49
+
+from django.db import migrations, models
+
+# ค่าเดิมของ like_status/share_status มี 2 ชุด: จาก run_activity_pipeline และจาก add_comment_url
+LIKED_VALUES = ('liked', 'ถูกใจแล้ว')
+SHARED_VALUES = ('shared', 'แชร์แล้ว')
+
+
+def status_to_flags(apps, schema_editor):
+    FacebookComment = apps.get_model('PageInfo', 'FacebookComment')
+    FacebookComment.objects.filter(like_status__in=LIKED_VALUES).update(liked=True)
+    FacebookComment.objects.filter(share_status__in=SHARED_VALUES).update(shared=True)
+
+
+def flags_to_status(apps, schema_editor):
+    FacebookComment = apps.get_model('PageInfo', 'FacebookComment')
+    FacebookComment.objects.update(like_status='ยังไม่ถูกใจ', share_status='ยังไม่แชร์')
+    FacebookComment.objects.filter(liked=True).update(like_status='ถูกใจแล้ว')
+    FacebookComment.objects.filter(shared=True).update(share_status='แชร์แล้ว')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0017_seeding_author'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='author_profile_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='liked',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='shared',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(status_to_flags, flags_to_status),
+        migrations.RemoveField(
+            model_name='facebookcomment',
+            name='like_status',
+        ),
+        migrations.RemoveField(
+            model_name='facebookcomment',
+            name='share_status',
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'liked'], name='fbcomment_dash_liked_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0018_comment_activity_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commentcampaigngroup',
+            name='fuzzy_seeding_match',
+            field=models.BooleanField(default=False),
+        ),
+    ]
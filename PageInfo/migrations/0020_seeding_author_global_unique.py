@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+def drop_duplicate_global_authors(apps, schema_editor):
+    # unique เดิมไม่กันแถว global ซ้ำ (NULL ไม่เท่ากัน): เก็บแถวแรกของแต่ละชื่อไว้ก่อนสร้าง constraint
+    SeedingAuthor = apps.get_model('PageInfo', 'SeedingAuthor')
+    seen = set()
+    duplicates = []
+    for author_id, normalized_name in (
+        SeedingAuthor.objects.filter(campaign_group__isnull=True)
+        .order_by('id').values_list('id', 'normalized_name')
+    ):
+        if normalized_name in seen:
+            duplicates.append(author_id)
+        seen.add(normalized_name)
+    SeedingAuthor.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0019_campaign_fuzzy_seeding'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_global_authors, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='seedingauthor',
+            constraint=models.UniqueConstraint(condition=models.Q(('campaign_group__isnull', True)), fields=('normalized_name',), name='uniq_seeding_author_global'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:40
+
+import hashlib
+
+from django.db import migrations, models
+
+
+# สำเนาของ PageInfo.comment_sync.comment_fingerprint ณ ตอนเขียน migration นี้
+# (migration ห้าม import โค้ดที่ยังแก้ต่อได้): ไม่รวม timestamp แล้ว
+def _normalize(text):
+    return ' '.join((text or '').split())
+
+
+def comment_fingerprint(author, content):
+    raw = f"{_normalize(author)}\n{_normalize(content)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def rehash(apps, schema_editor):
+    FacebookComment = apps.get_model('PageInfo', 'FacebookComment')
+
+    batch = []
+    for comment in FacebookComment.objects.only('id', 'author', 'content').iterator(chunk_size=2000):
+        comment.fingerprint = comment_fingerprint(comment.author, comment.content)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            FacebookComment.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        FacebookComment.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0020_seeding_author_global_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facebookcomment',
+            name='comment_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='facebookcomment',
+            index=models.Index(fields=['dashboard', 'comment_id'], name='fbcomment_dash_cid_idx'),
+        ),
+        migrations.RunPython(rehash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PageInfo', '0021_facebookcomment_comment_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='facebookpost',
+            name='fbpost_page_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tiktokpost',
+            name='ttpost_page_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['page', '-post_timestamp_dt', '-id'], name='fbpost_page_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['page', '-post_timestamp_dt', '-id'], name='ttpost_page_ts_id_idx'),
+        ),
+    ]
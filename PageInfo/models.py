@@ -1,5 +1,8 @@
 from django.db import models
 
+from .metrics import parse_count, facebook_engagement, tiktok_engagement
+from .seeding_utils import normalize_author
+
 class PageGroup(models.Model):
     group_name = models.CharField(max_length=255, default='Test Campaign')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -24,7 +27,7 @@ class PageInfo(models.Model):
     page_followers = models.CharField(max_length=100, null=True, blank=True)
     page_likes = models.CharField(max_length=100, null=True, blank=True)
     page_followers_count = models.IntegerField(null=True, blank=True)
-    page_likes_count = models.CharField(max_length=100, null=True, blank=True)
+    page_likes_count = models.BigIntegerField(null=True, blank=True)
     page_talking_count = models.CharField(max_length=100, null=True, blank=True)
     page_were_here_count = models.CharField(max_length=100, null=True, blank=True)
     page_description = models.TextField(null=True, blank=True)
@@ -69,12 +72,25 @@ class FacebookPost(models.Model):
 
     comment_count = models.IntegerField(default=0)
     share_count = models.IntegerField(default=0)
+    total_engagement = models.IntegerField(default=0)  # reactions ทั้งหมด + comments + shares (คำนวณตอน save)
+    engagement_rate = models.FloatField(null=True, blank=True)  # % ของผู้ติดตามเพจ (ตั้งค่าโดย PageInfo/ingest.py)
 
     content_pillar = models.CharField(max_length=100, null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['page', '-post_timestamp_dt', '-id'], name='fbpost_page_ts_id_idx'),
+            models.Index(fields=['page', '-total_engagement'], name='fbpost_page_eng_idx'),
+            models.Index(fields=['page', '-engagement_rate'], name='fbpost_page_rate_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.total_engagement = facebook_engagement(self.reactions, self.comment_count, self.share_count)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.page.page_name if self.page else 'Unknown'} - {self.post_timestamp_text}"
 
@@ -83,6 +99,12 @@ class FollowerHistory(models.Model):
     date = models.DateField()
     page_followers_count = models.IntegerField(null=True, blank=True)  # ✅ ชื่อนี้
 
+    class Meta:
+        constraints = [
+            # หนึ่งแถวต่อเพจต่อวัน (ใช้เป็น conflict target ของ bulk upsert ใน PageInfo/followers.py)
+            models.UniqueConstraint(fields=['page', 'date'], name='uniq_followerhistory_page_date'),
+        ]
+
     def __str__(self):
         return f"{self.page.page_name} - {self.date} - {self.page_followers_count}"
 
@@ -95,17 +117,36 @@ class FacebookComment(models.Model):
     profile_img_url = models.TextField(null=True, blank=True)
     content = models.TextField()
     reaction = models.CharField(max_length=500, null=True, blank=True)
+    reaction_count = models.IntegerField(default=0)  # ตัวเลขจาก reaction เช่น 'ถูกใจ 5' -> 5
     timestamp_text = models.CharField(max_length=500, null=True, blank=True)
     image_url = models.TextField(null=True, blank=True)
     reply = models.TextField(null=True, blank=True)
-    like_status = models.CharField(max_length=50, null=True, blank=True, default="ยังไม่ถูกใจ")
-    share_status = models.CharField(max_length=50, null=True, blank=True, default="ยังไม่แชร์")
+    author_profile_id = models.CharField(max_length=255, blank=True, default='')  # id/username จากลิงก์ชื่อผู้คอมเมนต์
+    liked = models.BooleanField(default=False)   # ผู้คอมเมนต์กดถูกใจโพสต์ (activity dashboard)
+    shared = models.BooleanField(default=False)  # ผู้คอมเมนต์แชร์โพสต์ (activity dashboard)
     sentiment = models.CharField(max_length=20, null=True, blank=True)
     reason = models.CharField(max_length=255, null=True, blank=True)
     keyword_group = models.CharField(max_length=255, null=True, blank=True)
     category = models.CharField(max_length=255, null=True, blank=True)
+    comment_id = models.CharField(max_length=255, blank=True, default='')  # id คอมเมนต์ของ FB จากลิงก์เวลา (?comment_id=)
+    fingerprint = models.CharField(max_length=40, blank=True, default='')  # sha1 ของ author+content (ดู comment_sync.py)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post_url'], name='fbcomment_post_url_idx'),
+            models.Index(fields=['dashboard', 'fingerprint'], name='fbcomment_dash_fp_idx'),
+            models.Index(fields=['dashboard', 'comment_id'], name='fbcomment_dash_cid_idx'),
+            models.Index(fields=['dashboard', 'liked'], name='fbcomment_dash_liked_idx'),
+            models.Index(fields=['dashboard', 'sentiment'], name='fbcomment_dash_sent_idx'),
+            models.Index(fields=['dashboard', 'category'], name='fbcomment_dash_cat_idx'),
+            models.Index(fields=['dashboard', 'keyword_group'], name='fbcomment_dash_kw_idx'),
+            models.Index(fields=['dashboard', '-reaction_count'], name='fbcomment_dash_react_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.reaction_count = parse_count(self.reaction)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.author} - {self.content[:30]}"
@@ -114,14 +155,41 @@ class CommentCampaignGroup(models.Model):
     group_name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     post = models.ForeignKey('FacebookPost', on_delete=models.CASCADE, related_name='campaigns', null=True, blank=True)
+    # จับชื่อ seeding ที่พิมพ์ผิดเล็กน้อยด้วย (ปิดไว้เป็นค่าเริ่มต้น ดู seeding_utils)
+    fuzzy_seeding_match = models.BooleanField(default=False)
 
     def __str__(self):
         return self.group_name
 
 
+class SeedingAuthor(models.Model):
+    """บัญชี seeding ที่ใช้แยกคอมเมนต์ seeding/organic (campaign_group ว่าง = ใช้ทุก campaign)"""
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, db_index=True, editable=False)
+    campaign_group = models.ForeignKey(CommentCampaignGroup, related_name='seeding_authors', on_delete=models.CASCADE, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign_group', 'normalized_name'], name='uniq_seeding_author_campaign'),
+            # NULL ไม่ชนกันใน unique ข้างบน: รายชื่อ global (campaign_group ว่าง) ต้องมี constraint ของตัวเอง
+            models.UniqueConstraint(fields=['normalized_name'], condition=models.Q(campaign_group__isnull=True),
+                                    name='uniq_seeding_author_global'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_author(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} ({self.campaign_group or 'global'})"
+
 
 class FBCommentDashboard(models.Model):
     post_id = models.CharField(max_length=1000, db_index=True, null=True, blank=True)
+    link_url = models.TextField(blank=True, default='')  # URL เต็มที่ใช้ scrape (post_id ตัด query ออก)
+    comments_synced_at = models.DateTimeField(null=True, blank=True)
     dashboard_name = models.CharField(max_length=255, blank=True, null=True)
     dashboard_type = models.CharField(
         max_length=50,
@@ -150,10 +218,107 @@ class TikTokPost(models.Model):
     comment_count = models.IntegerField(null=True, blank=True)
     share_count = models.IntegerField(null=True, blank=True)
     save_count = models.IntegerField(null=True, blank=True)
+    total_engagement = models.IntegerField(default=0)  # likes + comments + shares + saves (คำนวณตอน save)
+    engagement_rate = models.FloatField(null=True, blank=True)  # % ของผู้ติดตาม หรือของ view ถ้าไม่รู้จำนวนผู้ติดตาม (ตั้งค่าโดย PageInfo/ingest.py)
 
     platform = models.CharField(max_length=20, default='tiktok')  # ✅ เพิ่ม platform
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['page', '-post_timestamp_dt', '-id'], name='ttpost_page_ts_id_idx'),
+            models.Index(fields=['page', '-total_engagement'], name='ttpost_page_eng_idx'),
+            models.Index(fields=['page', '-engagement_rate'], name='ttpost_page_rate_idx'),
+            models.Index(fields=['page', '-view_count'], name='ttpost_page_views_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.total_engagement = tiktok_engagement(self.like_count, self.comment_count, self.share_count, self.save_count)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"TikTok Post - {self.post_url}"
+
+
+class PostRefreshState(models.Model):
+    """Refresh bookkeeping per (page, post source); maintained by PageInfo/refresh.py."""
+    KINDS = (
+        ('post', 'Facebook posts'),
+        ('video', 'Facebook videos'),
+        ('reel', 'Facebook reels'),
+        ('live', 'Facebook lives'),
+        ('tiktok', 'TikTok videos'),
+    )
+
+    page = models.ForeignKey('PageInfo', on_delete=models.CASCADE, related_name='refresh_states')
+    kind = models.CharField(max_length=10, choices=KINDS)
+
+    priority = models.PositiveSmallIntegerField(default=0)  # 0 = โพสต์ใหม่สุด (ต้อง refresh บ่อยสุด)
+    next_due_at = models.DateTimeField(null=True, blank=True)  # null = ยังไม่เคย scrape -> ทำก่อน
+    last_scraped_at = models.DateTimeField(null=True, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_duration_s = models.FloatField(null=True, blank=True)
+    est_minutes = models.FloatField(null=True, blank=True)  # ค่าเฉลี่ย (EMA) browser-minutes ต่อครั้ง
+    last_status = models.CharField(max_length=20, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    failures = models.PositiveSmallIntegerField(default=0)  # error ติดกันกี่ครั้ง
+    posts_seen = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['page', 'kind'], name='uniq_refreshstate_page_kind'),
+        ]
+        indexes = [
+            models.Index(fields=['priority', 'next_due_at'], name='refreshstate_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.page.page_name} [{self.kind}] - {self.last_scraped_at}"
+
+
+class PostMetricSnapshot(models.Model):
+    """Append-only metric history of a post; written in bulk by PageInfo/snapshots.py."""
+    page = models.ForeignKey('PageInfo', on_delete=models.CASCADE, related_name='metric_snapshots')
+    facebook_post = models.ForeignKey('FacebookPost', on_delete=models.CASCADE, related_name='snapshots', null=True, blank=True)
+    tiktok_post = models.ForeignKey('TikTokPost', on_delete=models.CASCADE, related_name='snapshots', null=True, blank=True)
+    captured_at = models.DateTimeField()
+
+    view_count = models.IntegerField(null=True, blank=True)  # FB: watch_count (เฉพาะ video)
+    like_count = models.IntegerField(default=0)  # FB: reactions ทั้งหมด
+    comment_count = models.IntegerField(default=0)
+    share_count = models.IntegerField(default=0)
+    save_count = models.IntegerField(default=0)
+    total_engagement = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['facebook_post', 'captured_at'], name='snapshot_fbpost_ts_idx'),
+            models.Index(fields=['tiktok_post', 'captured_at'], name='snapshot_ttpost_ts_idx'),
+            models.Index(fields=['page', 'captured_at'], name='snapshot_page_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.facebook_post_id or self.tiktok_post_id} @ {self.captured_at}: {self.total_engagement}"
+
+
+class PostHashtag(models.Model):
+    """One row per (post, hashtag); filled by PageInfo.hashtags.sync_post_hashtags at ingest time."""
+    page = models.ForeignKey('PageInfo', on_delete=models.CASCADE, related_name='hashtags')
+    facebook_post = models.ForeignKey('FacebookPost', on_delete=models.CASCADE, related_name='hashtags', null=True, blank=True)
+    tiktok_post = models.ForeignKey('TikTokPost', on_delete=models.CASCADE, related_name='hashtags', null=True, blank=True)
+    tag = models.CharField(max_length=255)  # lowercase รวม '#' เช่น '#dairyqueen'
+    post_timestamp_dt = models.DateTimeField(null=True, blank=True)  # copy จากโพสต์ เพื่อ filter ช่วงวันที่
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['page', 'tag'], name='hashtag_page_tag_idx'),
+            models.Index(fields=['tag', 'post_timestamp_dt'], name='hashtag_tag_ts_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facebook_post', 'tag'], name='uniq_fbpost_hashtag'),
+            models.UniqueConstraint(fields=['tiktok_post', 'tag'], name='uniq_ttpost_hashtag'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag} - {self.page.page_name if self.page else 'Unknown'}"
@@ -0,0 +1,415 @@
+# PageInfo/page_import.py
+"""
+Onboard many pages at once (bulk form on add_page / ``manage.py import_pages``).
+
+For every URL: detect the platform -> fetch the profile -> create PageInfo ->
+scrape the last ``post_days`` days of posts. All URLs run concurrently on one
+event loop. Profile fetches use the pooled HTTP client and share the
+``profile_concurrency`` cap. Post scrapes start real browsers, so they get a
+much smaller cap (``post_concurrency``). DB writes go through sync_to_async.
+
+The web form only creates the PageInfo rows (``scrape_posts_too=False``) so
+the request finishes well inside proxy timeouts. It registers the new pages
+with the refresh scheduler, and their posts arrive with the next
+``refresh_posts`` run. ``import_pages`` from the shell scrapes posts right away.
+
+Limits can be overridden in settings::
+
+    PAGE_IMPORT = {'profile_concurrency': 8, 'post_concurrency': 2, 'post_days': 30}
+"""
+import asyncio
+import csv
+import io
+import re
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .http_client import run_sync
+from .ingest import upsert_facebook_post, upsert_tiktok_post
+from .metrics import parse_count, parse_optional_count
+from .models import PageInfo
+from .sessions import session_pool
+from .snapshots import record_snapshots
+
+DEFAULT_LIMITS = {
+    'profile_concurrency': 8,
+    'post_concurrency': 2,
+    'post_days': 30,
+}
+
+PLATFORM_HOSTS = {
+    'facebook': ('facebook.com', 'fb.com', 'fb.me'),
+    'tiktok': ('tiktok.com',),
+    'instagram': ('instagram.com', 'instagr.am'),
+    'youtube': ('youtube.com', 'youtu.be'),
+    'lemon8': ('lemon8-app.com',),
+}
+
+PLATFORMS_WITH_POSTS = ('facebook', 'tiktok')
+
+
+def _limits():
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(getattr(settings, 'PAGE_IMPORT', {}) or {})
+    return limits
+
+
+def detect_platform(url):
+    """Return the platform key for ``url`` ('facebook', 'tiktok', ...) or None."""
+    host = (urlparse(url if '//' in url else f'https://{url}').hostname or '').lower()
+    for platform, domains in PLATFORM_HOSTS.items():
+        if any(host == d or host.endswith('.' + d) for d in domains):
+            return platform
+    return None
+
+
+def parse_url_lines(text):
+    """URLs from a textarea: one per line (commas/spaces also accepted), de-duplicated in order."""
+    urls = []
+    for token in re.split(r'[\s,]+', text or ''):
+        token = token.strip()
+        if token and token not in urls:
+            urls.append(token)
+    return urls
+
+
+def parse_url_csv(file_obj):
+    """
+    URLs from a CSV upload: the ``url`` column if there is a header row,
+    otherwise the first column of every row.
+    """
+    raw = file_obj.read()
+    text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = header.index('url') if 'url' in header else 0
+    if 'url' in header:
+        rows = rows[1:]
+
+    urls = []
+    for row in rows:
+        if len(row) > column:
+            url = row[column].strip()
+            if url and url not in urls:
+                urls.append(url)
+    return urls
+
+
+# ---------------------------------------------------------------------------
+# profile -> PageInfo fields
+# ---------------------------------------------------------------------------
+
+def _allowed(fields):
+    allowed_fields = {f.name for f in PageInfo._meta.get_fields()}
+    return {k: v for k, v in fields.items() if k in allowed_fields}
+
+
+def facebook_fields(fb_data):
+    filtered_data = _allowed(fb_data)
+    for key in ['page_likes_count', 'page_followers_count']:
+        filtered_data[key] = parse_optional_count(filtered_data.get(key))
+    if filtered_data.get('page_followers_count') is None:
+        filtered_data['page_followers_count'] = parse_optional_count(filtered_data.get('page_followers'))
+    filtered_data['platform'] = 'facebook'
+    return filtered_data
+
+
+def tiktok_fields(tiktok_data):
+    return _allowed({
+        'page_username': tiktok_data.get('username'),
+        'page_name': tiktok_data.get('nickname'),
+        'page_followers': tiktok_data.get('followers', 0),
+        'page_followers_count': parse_optional_count(tiktok_data.get('followers')),
+        'page_likes': tiktok_data.get('likes', 0),
+        'page_likes_count': parse_optional_count(tiktok_data.get('likes')),
+        'following_count': tiktok_data.get('following', 0),
+        'page_videos_count': tiktok_data.get('video_count', 0),
+        'page_description': tiktok_data.get('bio'),
+        'profile_pic': tiktok_data.get('profile_pic'),
+        'page_url': tiktok_data.get('url'),
+        'verified': tiktok_data.get('verified', False),
+        'platform': 'tiktok',
+    })
+
+
+def instagram_fields(ig_data):
+    return _allowed({
+        'page_username': ig_data.get('username'),
+        'page_name': ig_data.get('username'),
+        'page_followers': ig_data.get('followers_count'),
+        'page_followers_count': parse_optional_count(ig_data.get('followers_count')),
+        'page_website': ig_data.get('website'),
+        'page_category': ig_data.get('category'),
+        'post_count': ig_data.get('post_count'),
+        'page_description': ig_data.get('bio'),
+        'profile_pic': ig_data.get('profile_pic'),
+        'page_url': ig_data.get('url'),
+        'platform': 'instagram',
+    })
+
+
+def lemon8_fields(lm8_data):
+    return _allowed({
+        'page_username': lm8_data.get('username'),
+        'page_name': lm8_data.get('username'),
+        'page_followers': lm8_data.get('followers_count'),
+        'page_followers_count': parse_optional_count(lm8_data.get('followers_count')),
+        'page_likes': lm8_data.get('likes_count'),
+        'page_likes_count': parse_optional_count(lm8_data.get('likes_count')),
+        'following_count': lm8_data.get('following_count'),
+        'age': lm8_data.get('age'),
+        'page_description': lm8_data.get('bio'),
+        'page_website': lm8_data.get('website'),
+        'profile_pic': lm8_data.get('profile_pic'),
+        'page_url': lm8_data.get('url'),
+        'platform': 'lemon8',
+    })
+
+
+def youtube_fields(yt_data):
+    subscribers = parse_count(yt_data.get('subscribers_count'))
+    return _allowed({
+        'page_username': yt_data.get('username'),
+        'page_name': yt_data.get('page_name'),
+        'page_followers': subscribers,
+        'page_followers_count': subscribers,
+        'profile_pic': yt_data.get('profile_pic'),
+        'page_url': yt_data.get('page_url'),
+        'page_description': yt_data.get('bio'),
+        'page_address': yt_data.get('country'),
+        'page_join_date': yt_data.get('join_date'),
+        'page_videos_count': parse_count(yt_data.get('videos_count')),
+        'page_total_views': parse_count(yt_data.get('total_views')),
+        'page_website': yt_data.get('page_website'),
+        'platform': 'youtube',
+    })
+
+
+def _instagram_username(url):
+    match = re.search(r"instagram\.com/([\w\.\-]+)/?", url)
+    return match.group(1) if match else None
+
+
+async def fetch_profile_fields(platform, url):
+    """Fetch the profile of ``url`` and return PageInfo fields, or None if nothing usable came back."""
+    if platform == 'facebook':
+        from .fb_page_info import fetch_page_info, fetch_page_followers
+        fb_data = await fetch_page_info(url)
+        if not fb_data:
+            return None
+        fb_data = dict(fb_data)
+        if fb_data.get('page_id'):
+            follower_data = await fetch_page_followers(fb_data['page_id'])
+            if follower_data:
+                fb_data.update(follower_data)
+        return facebook_fields(fb_data)
+
+    if platform == 'tiktok':
+        from .tiktok_page_info import fetch_tiktok_info
+        data = await fetch_tiktok_info(url)
+        return tiktok_fields(data) if data else None
+
+    if platform == 'instagram':
+        from .ig_page_info import fetch_instagram_info
+        username = _instagram_username(url)
+        data = await fetch_instagram_info(username) if username else None
+        return instagram_fields(data) if data else None
+
+    if platform == 'lemon8':
+        from .lm8_page_info import fetch_lemon8_info
+        data = await fetch_lemon8_info(url)
+        return lemon8_fields(data) if data else None
+
+    if platform == 'youtube':
+        from .yt_page_info import fetch_youtube_info
+        data = await fetch_youtube_info(url)
+        return youtube_fields(data) if data else None
+
+    return None
+
+
+# ---------------------------------------------------------------------------
+# post scrapes (browser based)
+# ---------------------------------------------------------------------------
+
+FACEBOOK_KINDS = ('post', 'video', 'reel', 'live')
+
+
+def facebook_scraper_class(kind):
+    """Playwright scraper class for one Facebook post source ('post', 'video', 'reel', 'live')."""
+    if kind == 'post':
+        from .fb_post import FBPostScraperAsync
+        return FBPostScraperAsync
+    if kind == 'video':
+        from .fb_video import FBVideoScraperAsync
+        return FBVideoScraperAsync
+    if kind == 'reel':
+        from .fb_reel import FBReelScraperAsync
+        return FBReelScraperAsync
+    if kind == 'live':
+        from .fb_live import FBLiveScraperAsync
+        return FBLiveScraperAsync
+    raise ValueError(f"unknown Facebook post source: {kind}")
+
+
+async def scrape_facebook_kind(url, kind, cutoff_dt, cookie_path=None):
+    """
+    Run one Facebook scraper. Without ``cookie_path`` an account is leased from
+    the session pool, and a failed login is reported as a checkpoint.
+    """
+    scraper_class = facebook_scraper_class(kind)
+    if cookie_path:
+        scraper = scraper_class(cookie_file=cookie_path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
+        return await scraper.run() or []
+
+    with session_pool().lease('facebook') as session:
+        scraper = scraper_class(cookie_file=session.path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
+        posts = await scraper.run()
+        if scraper.login_failed:
+            session.report('checkpoint')
+            raise RuntimeError(f"Facebook login failed with session {session.account.name}")
+        return posts or []
+
+
+async def run_fb_post_video_reel_live_scraper(url, cutoff_dt, cookie_path=None):
+    posts = []
+    for kind in FACEBOOK_KINDS:
+        posts += await scrape_facebook_kind(url, kind, cutoff_dt, cookie_path)
+    return posts
+
+
+def scrape_tiktok_posts(url, days=30):
+    """Recent TikTok posts of a profile (sync, starts its own browser)."""
+    from .tiktok_post import scrape_tiktok_posts_for_django, filter_recent_posts
+
+    with session_pool().lease('tiktok') as session:
+        scrape_result = scrape_tiktok_posts_for_django(
+            profile_url=url,
+            cookies_file=session.path,
+            max_posts=None,
+            headless=True,
+            scroll_rounds=50,
+            timeout=30000
+        )
+        if scrape_result.get('captcha_detected'):
+            session.report('captcha')
+        if not scrape_result.get('success'):
+            raise RuntimeError(scrape_result.get('message') or 'TikTok scrape failed')
+    return filter_recent_posts(scrape_result.get('data', []), days=days)
+
+
+async def scrape_posts(platform, url, days=30):
+    if platform == 'facebook':
+        cutoff_date = datetime.now() - timedelta(days=days)
+        return await run_fb_post_video_reel_live_scraper(url, cutoff_date)
+    if platform == 'tiktok':
+        # scraper ของ TikTok เป็น sync (Playwright sync API) จึงรันใน thread แยก
+        return await asyncio.to_thread(scrape_tiktok_posts, url, days)
+    return []
+
+
+def save_posts(page_obj, platform, posts):
+    """Upsert scraped posts and append their current counts to the metric history."""
+    upsert = upsert_facebook_post if platform == 'facebook' else upsert_tiktok_post
+    saved = [upsert(page_obj, post) for post in posts or []]
+    record_snapshots(saved)
+    return len(saved)
+
+
+# ---------------------------------------------------------------------------
+# bulk import
+# ---------------------------------------------------------------------------
+
+class ImportResult:
+    """Outcome of one URL: status is 'created', 'exists', 'invalid' or 'failed'."""
+
+    def __init__(self, url, platform=None):
+        self.url = url
+        self.platform = platform
+        self.status = 'pending'
+        self.page_id = None
+        self.page_name = None
+        self.posts = 0
+        self.message = ''
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return self.status in ('created', 'exists')
+
+    def __repr__(self):
+        return f"<ImportResult {self.status} {self.url}>"
+
+
+def _create_page(group, fields):
+    page_url = fields.get('page_url')
+    if page_url:
+        existing = PageInfo.objects.filter(page_group=group, page_url=page_url).first()
+        if existing:
+            return existing, False
+    return PageInfo.objects.create(page_group=group, **fields), True
+
+
+async def import_pages_async(group, urls, scrape_posts_too=True, on_result=None):
+    limits = _limits()
+    profile_sem = asyncio.Semaphore(limits['profile_concurrency'])
+    post_sem = asyncio.Semaphore(limits['post_concurrency'])
+
+    async def run(url):
+        result = ImportResult(url, detect_platform(url))
+        started = time.monotonic()
+        try:
+            if result.platform is None:
+                result.status = 'invalid'
+                result.message = 'ไม่รู้จัก platform ของ URL นี้'
+                return result
+
+            async with profile_sem:
+                fields = await fetch_profile_fields(result.platform, url)
+            if not fields:
+                result.status = 'failed'
+                result.message = 'ดึงข้อมูลโปรไฟล์ไม่สำเร็จ'
+                return result
+
+            page_obj, created = await sync_to_async(_create_page)(group, fields)
+            result.page_id = page_obj.id
+            result.page_name = page_obj.page_name
+            result.status = 'created' if created else 'exists'
+            if not created:
+                result.message = 'มีเพจนี้ในกลุ่มอยู่แล้ว'
+                return result
+
+            if scrape_posts_too and result.platform in PLATFORMS_WITH_POSTS:
+                try:
+                    async with post_sem:
+                        posts = await scrape_posts(result.platform, url, limits['post_days'])
+                    result.posts = await sync_to_async(save_posts)(page_obj, result.platform, posts)
+                except Exception as e:
+                    # ✅ ถึงแม้ดึงโพสต์ไม่ได้ ก็ยังคง PageInfo ไว้
+                    result.message = f'ดึงโพสต์ไม่สำเร็จ: {e}'
+            return result
+        except Exception as e:
+            result.status = 'failed'
+            result.message = str(e) or repr(e)
+            return result
+        finally:
+            result.elapsed = time.monotonic() - started
+            if on_result:
+                on_result(result)
+
+    return await asyncio.gather(*(run(url) for url in urls))
+
+
+def import_pages(group, urls, scrape_posts_too=True, on_result=None):
+    """
+    Import ``urls`` into ``group`` concurrently and return one ImportResult
+    per URL (same order). ``on_result(result)`` is called as each URL finishes.
+    """
+    return run_sync(import_pages_async(group, urls, scrape_posts_too=scrape_posts_too, on_result=on_result))
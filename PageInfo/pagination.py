@@ -0,0 +1,79 @@
+# PageInfo/pagination.py
+"""
+Keyset (seek) pagination for post tables ordered newest first.
+
+Rows are ordered by ``post_timestamp_dt DESC NULLS LAST, id DESC`` and the
+cursor is the (timestamp, id) of the last row shown. Dated and undated posts
+are read by two separate seeks, each a plain range on the
+(page, -post_timestamp_dt, -id) index no matter how deep the user scrolls,
+instead of OFFSET over the whole history:
+
+* dated: ``post_timestamp_dt <= ts`` (minus the rows at ``ts`` already shown),
+* undated tail: ``post_timestamp_dt IS NULL AND id < pk``, only queried once
+  the dated rows run out.
+"""
+from datetime import datetime
+
+POSTS_PAGE_SIZE = 100
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, is_first):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def encode_cursor(post):
+    ts = post.post_timestamp_dt.isoformat() if post.post_timestamp_dt else ''
+    return f"{ts}|{post.pk}"
+
+
+def decode_cursor(cursor):
+    """Return (timestamp or None, id) or None if the cursor is missing/invalid."""
+    if not cursor or '|' not in cursor:
+        return None
+    ts_text, _, pk_text = cursor.rpartition('|')
+    try:
+        pk = int(pk_text)
+        ts = datetime.fromisoformat(ts_text) if ts_text else None
+    except ValueError:
+        return None
+    return ts, pk
+
+
+def keyset_paginate(queryset, cursor=None, per_page=POSTS_PAGE_SIZE):
+    """Return the ``per_page`` posts after ``cursor`` (newest first) as a KeysetPage."""
+    decoded = decode_cursor(cursor)
+    ts, pk = decoded or (None, None)
+    wanted = per_page + 1
+    rows = []
+    if decoded is None or ts is not None:
+        dated = queryset.filter(post_timestamp_dt__isnull=False)
+        if decoded:
+            dated = dated.filter(post_timestamp_dt__lte=ts).exclude(post_timestamp_dt=ts, id__gte=pk)
+        rows = list(dated.order_by('-post_timestamp_dt', '-id')[:wanted])
+    if len(rows) < wanted:
+        # โพสต์ที่ไม่มีเวลาอยู่ท้ายสุด (NULLS LAST): ค้นแยกอีกช่วง เลื่อนต่อด้วย id อย่างเดียว
+        undated = queryset.filter(post_timestamp_dt__isnull=True)
+        if decoded and ts is None:
+            undated = undated.filter(id__lt=pk)
+        rows += list(undated.order_by('-id')[:wanted - len(rows)])
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1]) if has_next else None
+    return KeysetPage(items, next_cursor, is_first=decoded is None)
@@ -0,0 +1,142 @@
+# PageInfo/post_screenshots.py
+"""
+Post screenshots for comment dashboards, captured beside the comment scrape.
+
+``capture_post_screenshot(context, post_url)`` opens the post in its own tab
+of the scraper's browser context. The comment scrapers run it with
+``asyncio.gather`` next to their own tab, so sorting/expanding comments
+starts right away and never waits on imaging. It:
+
+1. waits for the post article and for the images inside it (no fixed sleeps),
+2. clips the post down to its reaction bar,
+3. re-encodes the PNG from Chromium in a worker thread: scaled to fit
+   ``max_width`` x ``max_height``, WebP (or JPEG), quality lowered step by
+   step (then the image shrunk) until the file is under ``max_bytes``,
+4. saves it straight into the storage of ``FBCommentDashboard.screenshot_path``
+   and returns the storage name. ``attach_screenshot`` points the dashboard at
+   it without copying the file again.
+
+Defaults can be overridden in settings::
+
+    POST_SCREENSHOTS = {'format': 'webp', 'quality': 80, 'min_quality': 40,
+                        'max_width': 1080, 'max_height': 2400, 'max_bytes': 300_000}
+"""
+import asyncio
+import io
+import uuid
+
+from django.conf import settings
+from PIL import Image
+
+from .ratelimit import throttled_goto
+
+DEFAULTS = {
+    'format': 'webp',      # 'webp' หรือ 'jpeg'
+    'quality': 80,
+    'min_quality': 40,
+    'max_width': 1080,
+    'max_height': 2400,
+    'max_bytes': 300_000,
+}
+
+POST_SELECTORS = ('div[role="dialog"] div[role="article"]', 'div[role="article"]')
+
+# รอรูปในโพสต์โหลดเสร็จ (หรือครบ timeout) แทนการ sleep ตายตัว
+JS_WAIT_IMAGES = r"""(post, timeoutMs) => Promise.race([
+    Promise.all(Array.from(post.querySelectorAll('img'))
+        .filter((img) => !img.complete)
+        .map((img) => new Promise((resolve) => {
+            img.addEventListener('load', resolve, {once: true});
+            img.addEventListener('error', resolve, {once: true});
+        }))),
+    new Promise((resolve) => setTimeout(resolve, timeoutMs)),
+])"""
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    if settings.configured:
+        conf.update(getattr(settings, 'POST_SCREENSHOTS', {}) or {})
+    return conf
+
+
+def compress_screenshot(png_bytes, conf=None):
+    """PNG bytes -> (bytes, extension) scaled and encoded within the configured size cap."""
+    conf = conf or _config()
+    image = Image.open(io.BytesIO(png_bytes)).convert('RGB')
+    image.thumbnail((conf['max_width'], conf['max_height']), Image.LANCZOS)
+
+    fmt = 'WEBP' if conf['format'].lower() == 'webp' else 'JPEG'
+    options = {'method': 6} if fmt == 'WEBP' else {'optimize': True}
+    quality = conf['quality']
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, fmt, quality=quality, **options)
+        data = buffer.getvalue()
+        if len(data) <= conf['max_bytes'] or image.width <= 320:
+            break
+        if quality > conf['min_quality']:
+            quality = max(conf['min_quality'], quality - 10)
+        else:
+            # คุณภาพต่ำสุดแล้วยังเกิน: ย่อขนาดลงอีก 20%
+            image = image.resize((int(image.width * 0.8), int(image.height * 0.8)), Image.LANCZOS)
+    return data, 'webp' if fmt == 'WEBP' else 'jpg'
+
+
+def store_screenshot(data, ext):
+    """Save into the storage of FBCommentDashboard.screenshot_path; returns the storage name."""
+    from django.core.files.base import ContentFile
+
+    from .models import FBCommentDashboard
+
+    field = FBCommentDashboard._meta.get_field('screenshot_path')
+    name = field.generate_filename(None, f"{uuid.uuid4().hex}.{ext}")
+    return field.storage.save(name, ContentFile(data))
+
+
+def attach_screenshot(dashboard, name):
+    """Point ``dashboard.screenshot_path`` at an already stored screenshot, deleting the one it replaces."""
+    if not name:
+        return
+    old = dashboard.screenshot_path.name
+    dashboard.screenshot_path.name = name
+    dashboard.save(update_fields=['screenshot_path'])
+    if old and old != name:
+        dashboard.screenshot_path.storage.delete(old)
+
+
+async def _post_clip(page):
+    """Bounding box of the post from its top to the bottom of its reaction bar."""
+    for selector in POST_SELECTORS:
+        post = page.locator(selector).first
+        try:
+            await post.wait_for(timeout=10000)
+        except Exception:
+            continue
+        await post.evaluate(JS_WAIT_IMAGES, 5000)
+        box = await post.bounding_box()
+        footer = post.locator('div[aria-label*="ถูกใจ"]').first
+        if await footer.count():
+            footer_box = await footer.bounding_box()
+            if box and footer_box:
+                box["height"] = footer_box["y"] + footer_box["height"] - box["y"]
+        return box
+    return None
+
+
+async def capture_post_screenshot(context, post_url):
+    """Screenshot ``post_url`` in a new tab of ``context``; returns the storage name or None."""
+    page = await context.new_page()
+    try:
+        await throttled_goto(page, post_url, timeout=60000)
+        clip = await _post_clip(page)
+        png = await page.screenshot(clip=clip, type='png') if clip else await page.screenshot(type='png')
+        data, ext = await asyncio.to_thread(compress_screenshot, png)
+        name = await asyncio.to_thread(store_screenshot, data, ext)
+        print(f"✅ แคปโพสต์เรียบร้อย: {name} ({len(data) // 1024} KB)")
+        return name
+    except Exception as e:
+        print(f"❌ แคปโพสต์ล้มเหลว: {e}")
+        return None
+    finally:
+        await page.close()
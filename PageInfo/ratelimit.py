@@ -0,0 +1,175 @@
+# PageInfo/ratelimit.py
+"""
+Per-host adaptive rate limiting shared by every scraper in the process.
+
+Each target site has one token bucket (``rate`` requests/second, ``burst``
+extra tokens). The HTTP profile fetchers (PageInfo/http_client.py) and the
+Playwright navigations (``throttled_goto`` / ``throttled_goto_sync``) take a
+token before every request, so concurrent jobs share one budget per site
+instead of each sleeping on its own.
+
+The rate adapts AIMD-style:
+
+* 429 / captcha / checkpoint: the rate is halved (down to ``min_rate``) and
+  the host is paused (``Retry-After`` is honoured for 429).
+* each successful request: the rate climbs back by 5% of the configured rate.
+
+Configuration (keys match the host and its subdomains)::
+
+    RATE_LIMITS = {
+        'default': {'rate': 2, 'burst': 4},
+        'facebook.com': {'rate': 0.5, 'burst': 2},
+        'tiktok.com': {'rate': 0.3, 'burst': 1},
+    }
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+DEFAULT_LIMITS = {
+    'default': {'rate': 2.0, 'burst': 4},
+    'facebook.com': {'rate': 0.5, 'burst': 2},
+    'tiktok.com': {'rate': 0.3, 'burst': 1},
+    'instagram.com': {'rate': 0.2, 'burst': 1},
+    'youtube.com': {'rate': 1.0, 'burst': 2},
+    'lemon8-app.com': {'rate': 0.5, 'burst': 2},
+    # CDN รูปภาพ (image_mirror) รับโหลดได้มากกว่าหน้าเว็บ
+    'fbcdn.net': {'rate': 20.0, 'burst': 20},
+    'tiktokcdn.com': {'rate': 20.0, 'burst': 20},
+}
+
+# วินาทีที่หยุดยิง host นั้นหลังเจอสัญญาณ (429 ใช้ Retry-After ถ้ามี)
+PAUSES = {'throttled': 30, 'captcha': 60, 'checkpoint': 120}
+SIGNALS = ('ok',) + tuple(PAUSES)
+
+CHECKPOINT_MARKERS = ('/checkpoint', 'two_step_verification')
+CAPTCHA_MARKERS = ('captcha',)
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst=1, min_rate=None):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.base_rate / 16
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token (possibly going negative) and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def report(self, signal, retry_after=None):
+        """Feed back the outcome of a request: 'ok', 'throttled', 'captcha' or 'checkpoint'."""
+        if signal not in SIGNALS:
+            raise ValueError(f"unknown signal: {signal}")
+        with self._lock:
+            if signal == 'ok':
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+                return
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else PAUSES[signal]
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.tokens = min(self.tokens, 0.0)
+        print(f"⚠️ [ratelimit:{self.name}] {signal} -> {self.rate:.3f} req/s, pause {pause:.1f}s")
+
+    def stats(self):
+        return {
+            'host': self.name,
+            'rate': round(self.rate, 4),
+            'base_rate': self.base_rate,
+            'paused_s': max(0, round(self.paused_until - time.monotonic(), 1)),
+        }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _limits():
+    limits = {key: dict(conf) for key, conf in DEFAULT_LIMITS.items()}
+    if settings.configured:
+        for key, conf in (getattr(settings, 'RATE_LIMITS', {}) or {}).items():
+            limits.setdefault(key, {}).update(conf)
+    return limits
+
+
+def _host(url_or_host):
+    if '//' in url_or_host:
+        return (urlparse(url_or_host).hostname or '').lower()
+    return url_or_host.lower()
+
+
+def limiter_for(url_or_host):
+    """The shared TokenBucket of the site ``url_or_host`` belongs to."""
+    host = _host(url_or_host)
+    limits = _limits()
+    key = next(
+        (k for k in limits if k != 'default' and (host == k or host.endswith('.' + k))),
+        host or 'default',
+    )
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            conf = limits.get(key) or limits['default']
+            bucket = _buckets[key] = TokenBucket(key, conf['rate'], conf.get('burst', 1), conf.get('min_rate'))
+        return bucket
+
+
+def limiter_stats():
+    with _buckets_lock:
+        return [bucket.stats() for bucket in _buckets.values()]
+
+
+def page_signal(status, url):
+    """Classify a navigation result: 'throttled', 'checkpoint', 'captcha' or 'ok'."""
+    url = (url or '').lower()
+    if status == 429:
+        return 'throttled'
+    if any(marker in url for marker in CHECKPOINT_MARKERS):
+        return 'checkpoint'
+    if any(marker in url for marker in CAPTCHA_MARKERS):
+        return 'captcha'
+    return 'ok'
+
+
+async def throttled_goto(page, url, **kwargs):
+    """``await page.goto(url)`` after taking a token for the host; reports the outcome."""
+    bucket = limiter_for(url)
+    await bucket.acquire_async()
+    response = await page.goto(url, **kwargs)
+    bucket.report(page_signal(response.status if response else None, page.url))
+    return response
+
+
+def throttled_goto_sync(page, url, **kwargs):
+    """Sync Playwright version of ``throttled_goto``."""
+    bucket = limiter_for(url)
+    bucket.acquire()
+    response = page.goto(url, **kwargs)
+    bucket.report(page_signal(response.status if response else None, page.url))
+    return response
@@ -0,0 +1,297 @@
+# PageInfo/refresh.py
+"""
+Scheduled re-scrape of post metrics (``manage.py refresh_posts`` from cron).
+
+Every (page, post source) pair has a PostRefreshState row. Its refresh
+interval depends on how new the page's latest post of that source is, because
+fresh posts gain engagement fastest:
+
+    newest post < 1 day old   -> priority 0, every hour
+    newest post < 7 days old  -> priority 1, every 6 hours
+    newest post < 30 days old -> priority 2, daily
+    otherwise                 -> priority 3, weekly
+
+Each run takes the due states in (priority, next_due_at) order until the
+hourly budget of browser-minutes is used up. A state's cost is the moving
+average of its past run times. The chosen states are claimed (next_due_at is
+pushed ahead) before any browser starts, so overlapping cron runs don't pick
+the same job. A refresh only scrapes back ``lookback_days`` days, since older
+posts barely move.
+
+Defaults can be overridden in settings::
+
+    POST_REFRESH = {
+        'browser_minutes_per_hour': 60, 'concurrency': 2, 'lookback_days': 14,
+        'tiers': [(24, 1), (168, 6), (720, 24)], 'idle_interval_hours': 168,
+    }
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from .http_client import run_sync
+from .models import FacebookPost, TikTokPost, PageInfo, PostRefreshState
+from .page_import import FACEBOOK_KINDS, save_posts, scrape_facebook_kind, scrape_tiktok_posts
+
+DEFAULTS = {
+    'browser_minutes_per_hour': 60,
+    'concurrency': 2,
+    'lookback_days': 14,
+    # (อายุโพสต์ล่าสุดไม่เกิน N ชั่วโมง, refresh ทุก M ชั่วโมง) เรียงจากใหม่ไปเก่า; index = priority
+    'tiers': [(24, 1), (24 * 7, 6), (24 * 30, 24)],
+    'idle_interval_hours': 24 * 7,
+    'default_cost_minutes': {'post': 4, 'video': 3, 'reel': 3, 'live': 3, 'tiktok': 3},
+    'retry_minutes': 30,
+    'claim_minutes': 60,
+}
+
+KINDS_BY_PLATFORM = {
+    'facebook': list(FACEBOOK_KINDS),
+    'tiktok': ['tiktok'],
+}
+
+# post_type ของ FacebookPost ที่ใช้ดูอายุโพสต์ล่าสุดของแต่ละ kind (live ถูกเก็บเป็น video/post)
+KIND_POST_TYPES = {
+    'post': ['post'],
+    'video': ['video'],
+    'reel': ['reel'],
+    'live': ['video', 'post'],
+}
+
+EMA_ALPHA = 0.3
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, 'POST_REFRESH', {}) or {})
+    return conf
+
+
+def schedule_for(newest_post_at, now, conf=None):
+    """Return ``(priority, interval)`` for a source whose latest post was published at ``newest_post_at``."""
+    conf = conf or _config()
+    priority = len(conf['tiers'])
+    if newest_post_at is not None:
+        age_hours = (now - newest_post_at).total_seconds() / 3600
+        for tier, (max_age_hours, _) in enumerate(conf['tiers']):
+            if age_hours <= max_age_hours:
+                priority = tier
+                break
+    return priority, tier_interval(priority, conf)
+
+
+def tier_interval(priority, conf=None):
+    conf = conf or _config()
+    if priority < len(conf['tiers']):
+        return timedelta(hours=conf['tiers'][priority][1])
+    return timedelta(hours=conf['idle_interval_hours'])
+
+
+def _newest_posts(page_ids):
+    """``{(page_id, kind): (newest post_timestamp_dt, last stored at)}`` in two aggregate queries."""
+    newest = {}
+    fb_rows = (
+        FacebookPost.objects.filter(page_id__in=page_ids)
+        .values('page_id', 'post_type')
+        .annotate(newest=Max('post_timestamp_dt'), stored=Max('updated_at'))
+    )
+    for row in fb_rows:
+        for kind, post_types in KIND_POST_TYPES.items():
+            if row['post_type'] not in post_types:
+                continue
+            current = newest.get((row['page_id'], kind), (None, None))
+            newest[(row['page_id'], kind)] = (
+                max(filter(None, [current[0], row['newest']]), default=None),
+                max(filter(None, [current[1], row['stored']]), default=None),
+            )
+
+    tt_rows = (
+        TikTokPost.objects.filter(page_id__in=page_ids)
+        .values('page_id')
+        .annotate(newest=Max('post_timestamp_dt'), stored=Max('created_at'))
+    )
+    for row in tt_rows:
+        newest[(row['page_id'], 'tiktok')] = (row['newest'], row['stored'])
+    return newest
+
+
+def sync_states(pages=None, now=None):
+    """
+    Create missing PostRefreshState rows and recompute priority/next_due_at
+    from the newest stored posts. New states start from when the page's posts
+    were last stored (e.g. by add_page), so a fresh page is not scraped twice.
+    """
+    conf = _config()
+    now = now or timezone.now()
+    pages = list(pages if pages is not None else PageInfo.objects.filter(platform__in=KINDS_BY_PLATFORM))
+    page_ids = [page.id for page in pages]
+    newest = _newest_posts(page_ids)
+
+    existing = {
+        (state.page_id, state.kind): state
+        for state in PostRefreshState.objects.filter(page_id__in=page_ids)
+    }
+    to_create, to_update = [], []
+    for page in pages:
+        for kind in KINDS_BY_PLATFORM.get(page.platform, []):
+            newest_post_at, stored_at = newest.get((page.id, kind), (None, None))
+            priority, interval = schedule_for(newest_post_at, now, conf)
+            state = existing.get((page.id, kind))
+            if state is None:
+                state = PostRefreshState(page=page, kind=kind, last_scraped_at=stored_at)
+                to_create.append(state)
+            elif state.last_status == 'running' and state.next_due_at and state.next_due_at > now:
+                continue  # ถูก claim อยู่ อย่าไปแก้ next_due_at
+            else:
+                to_update.append(state)
+            state.priority = priority
+            if state.failures:
+                continue  # กำลัง backoff หลัง error ใช้ next_due_at เดิม
+            state.next_due_at = state.last_scraped_at + interval if state.last_scraped_at else None
+
+    PostRefreshState.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    PostRefreshState.objects.bulk_update(to_update, ['priority', 'next_due_at'], batch_size=500)
+    return len(to_create), len(to_update)
+
+
+def spent_minutes(now=None):
+    """Browser-minutes used by jobs started in the last hour."""
+    now = now or timezone.now()
+    seconds = (
+        PostRefreshState.objects.filter(last_started_at__gte=now - timedelta(hours=1))
+        .aggregate(total=Sum('last_duration_s'))['total']
+    )
+    return (seconds or 0) / 60
+
+
+def estimated_minutes(state, conf=None):
+    conf = conf or _config()
+    if state.est_minutes:
+        return state.est_minutes
+    return conf['default_cost_minutes'].get(state.kind, 3)
+
+
+def due_states(now=None, pages=None):
+    now = now or timezone.now()
+    qs = (
+        PostRefreshState.objects.filter(Q(next_due_at__isnull=True) | Q(next_due_at__lte=now))
+        .select_related('page')
+        .order_by('priority', F('next_due_at').asc(nulls_first=True))
+    )
+    if pages is not None:
+        qs = qs.filter(page__in=pages)
+    return qs
+
+
+def plan_jobs(now=None, budget_minutes=None, pages=None):
+    """
+    Pick due states in priority order while they fit in the remaining hourly
+    budget. Returns ``(states, remaining_minutes)``; nothing is claimed.
+    """
+    conf = _config()
+    now = now or timezone.now()
+    budget = conf['browser_minutes_per_hour'] if budget_minutes is None else budget_minutes
+    remaining = budget - spent_minutes(now)
+
+    planned = []
+    for state in due_states(now, pages):
+        cost = estimated_minutes(state, conf)
+        # งานที่ใหญ่กว่า budget ทั้งก้อนให้รันได้เฉพาะตอนที่ชั่วโมงนี้ยังไม่ได้ใช้ budget เลย
+        if cost > remaining and (planned or remaining < budget):
+            break
+        planned.append(state)
+        remaining -= cost
+    return planned, remaining
+
+
+def claim(states, now=None):
+    """Mark ``states`` as running so overlapping runs skip them until claim_minutes pass."""
+    conf = _config()
+    now = now or timezone.now()
+    for state in states:
+        state.last_status = 'running'
+        state.last_started_at = now
+        state.next_due_at = now + timedelta(minutes=conf['claim_minutes'])
+    PostRefreshState.objects.bulk_update(states, ['last_status', 'last_started_at', 'next_due_at'])
+
+
+async def scrape_source(page, kind, lookback_days):
+    if kind == 'tiktok':
+        # scraper ของ TikTok เป็น sync (Playwright sync API) จึงรันใน thread แยก
+        return await asyncio.to_thread(scrape_tiktok_posts, page.page_url, lookback_days)
+    cutoff_dt = datetime.now() - timedelta(days=lookback_days)
+    return await scrape_facebook_kind(page.page_url, kind, cutoff_dt)
+
+
+def finish(state, duration_s, posts_saved=None, error=None):
+    """Store the outcome of one job and schedule the next run."""
+    conf = _config()
+    now = timezone.now()
+    minutes = duration_s / 60
+    state.last_duration_s = duration_s
+    state.est_minutes = minutes if not state.est_minutes else (
+        EMA_ALPHA * minutes + (1 - EMA_ALPHA) * state.est_minutes
+    )
+
+    if error is None:
+        newest = _newest_posts([state.page_id]).get((state.page_id, state.kind), (None, None))[0]
+        state.priority, interval = schedule_for(newest, now, conf)
+        state.last_scraped_at = now
+        state.next_due_at = now + interval
+        state.last_status = 'ok'
+        state.last_error = ''
+        state.failures = 0
+        state.posts_seen = posts_saved or 0
+    else:
+        state.failures += 1
+        retry = timedelta(minutes=conf['retry_minutes'] * 2 ** (state.failures - 1))
+        state.next_due_at = now + min(retry, tier_interval(state.priority, conf))
+        state.last_status = 'error'
+        state.last_error = str(error)[:2000]
+
+    state.save(update_fields=[
+        'priority', 'next_due_at', 'last_scraped_at', 'last_duration_s', 'est_minutes',
+        'last_status', 'last_error', 'failures', 'posts_seen',
+    ])
+
+
+async def run_jobs(states, on_result=None):
+    conf = _config()
+    sem = asyncio.Semaphore(conf['concurrency'])
+
+    async def run(state):
+        async with sem:
+            started = time.monotonic()
+            error, saved = None, None
+            try:
+                posts = await scrape_source(state.page, state.kind, conf['lookback_days'])
+                platform = 'tiktok' if state.kind == 'tiktok' else 'facebook'
+                saved = await sync_to_async(save_posts)(state.page, platform, posts)
+            except Exception as e:
+                print(f"❌ [{state.kind}] {state.page.page_name}: {e!r}")
+                error = e
+            await sync_to_async(finish)(state, time.monotonic() - started, saved, error)
+        if on_result:
+            on_result(state)
+        return state
+
+    return await asyncio.gather(*(run(state) for state in states))
+
+
+def refresh_due_posts(pages=None, budget_minutes=None, on_result=None, dry_run=False):
+    """
+    One scheduler tick: sync states, pick due jobs within the budget, claim and run them.
+    Returns ``(planned_states, remaining_budget_minutes)``.
+    """
+    sync_states(pages)
+    planned, remaining = plan_jobs(budget_minutes=budget_minutes, pages=pages)
+    if dry_run or not planned:
+        return planned, remaining
+    claim(planned)
+    run_sync(run_jobs(planned, on_result=on_result))
+    return planned, remaining
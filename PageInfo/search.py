@@ -0,0 +1,69 @@
+# PageInfo/search.py
+"""
+Text search over post and comment content.
+
+On Postgres the lookups are served by the pg_trgm GIN indexes created in
+migration 0009 (``UPPER(col) gin_trgm_ops`` matches Django's ``icontains``),
+and results are ranked by trigram word similarity. Other backends (SQLite for
+local runs) fall back to plain ``icontains`` ordered by recency.
+"""
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+
+from .models import FacebookPost, TikTokPost, FacebookComment
+
+SEARCH_PAGE_SIZE = 20
+
+
+def _terms(query):
+    return [t for t in (query or '').split() if t]
+
+
+def _match_all_terms(field, terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(**{f'{field}__icontains': term})
+    return condition
+
+
+def _rank(queryset, field, query, fallback_order):
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        return queryset.annotate(rank=TrigramWordSimilarity(query, field)).order_by('-rank', *fallback_order)
+    return queryset.order_by(*fallback_order)
+
+
+def search_facebook_posts(query, page_ids=None):
+    terms = _terms(query)
+    if not terms:
+        return FacebookPost.objects.none()
+    qs = FacebookPost.objects.select_related('page').filter(_match_all_terms('post_content', terms))
+    if page_ids is not None:
+        qs = qs.filter(page_id__in=page_ids)
+    return _rank(qs, 'post_content', query, ['-post_timestamp_dt', '-id'])
+
+
+def search_tiktok_posts(query, page_ids=None):
+    terms = _terms(query)
+    if not terms:
+        return TikTokPost.objects.none()
+    qs = TikTokPost.objects.select_related('page').filter(_match_all_terms('post_content', terms))
+    if page_ids is not None:
+        qs = qs.filter(page_id__in=page_ids)
+    return _rank(qs, 'post_content', query, ['-post_timestamp_dt', '-id'])
+
+
+def search_comments(query, dashboard_ids=None):
+    terms = _terms(query)
+    if not terms:
+        return FacebookComment.objects.none()
+    qs = FacebookComment.objects.select_related('dashboard').filter(_match_all_terms('content', terms))
+    if dashboard_ids is not None:
+        qs = qs.filter(dashboard_id__in=dashboard_ids)
+    return _rank(qs, 'content', query, ['-created_at', '-id'])
+
+
+def paginate(queryset, page_number, per_page=SEARCH_PAGE_SIZE):
+    """Return a Django ``Page``; invalid/out-of-range numbers fall back to the nearest page."""
+    return Paginator(queryset, per_page).get_page(page_number)
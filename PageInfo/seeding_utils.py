@@ -1,113 +1,186 @@
 # PageInfo/seeding_utils.py
+"""
+Seeding-account matching for comment dashboards.
 
-SEEDING_AUTHORS = {
-    "Beybie Beechaya",
-    "Anisara threesha",
-    "Bright Kevalin",
-    "Donlapa Chararat",
-    "Kamonchanok KengKla",
-    "Pimwarun Krongkarn",
-    "Kwanjira Kraiwit",
-    "Tukta Baikhao",
-    "Mooh Jarintip"
-    "Palita Balee",
-    "Kornnapa moonnak",
-    "Nick Napapon",
-    "Anna Patnicha",
-    "Veenut Anchisa",
-    "Gadesiri Muangman",
-    "Jenn Manuschaya",
-    "Saifon nick",
-    "Pu Punnipa",
-    "Pop Chalalai",
-    "Nan Roniya",
-    "Marie Papawarin",
-    "Por Jeerach",
-    "Wan Rawiwan",
-    "Nick Siwapon",
-    "Mos Jirawadee",
-    "Sasiton LookNook",
-    "Aey Saranya",
-    "Tik Wanwipa",
-    "Ploy Natcha",
-    "Nuk Jintara",
-    "BeeBie Hathairat",
-    "Kik Panadda",
-    "Ja Thanaporn",
-    "Yeeh Phattarapon",
-    "Lek Kanjana",
-    "Meeh Chananya",
-    "Nook Supansa",
-    "Ning Ponnapa",
-    "WiWi Wilaiwan",
-    "Preaw Narisa",
-    "Tip Kamoltip",
-    "Jeeranan Cha",
-    "Malee Malai",
-    "ศศิประภา แก้วกาญ",
-    "NidNoy Ponwipa",
-    "Hong Napatwarin",
-    "Mai Tippawan",
-    "Dean Sakawdean",
-    "Vew Supattaree",
-    "Jin Mayteenee",
-    "Kea Kannika",
-    "Lalinsiri Lin",
-    "Kun Chatchanok",
-    "Nuch Weeranuch",
-    "Mint Suprapa",
-    "Nook Wilasinee",
-    "Siraprapha Boonya",
-    "Panutda Tongdee",
-    "Oui Araya",
-    "Lek Sumalee",
-    "Jane Suthicha",
-    "Pum Rattahawadee",
-    "Boom Netnapa",
-    "Bim Nichapa",
-    "Pim Nonoun",
-    "Neena Sunee",
-    "Noey Pitchanan",
-    "Chu Yuwadee",
-    "Neena Suda",
-    "Ket Ketsaraporn",
-    "Ploy Nanthiya",
-    "Chom Chompu",
-    "Pom Suphichaya",
-    "Koy Watchareeya",
-    "Aoh Dutsanee",
-    "Beer Sirorat",
-    "Ying Ying Napapon",
-    "Jeab Aranya",
-    "Nattapa Nakonsan",
-    "Junsuda Sangtong",
-    "NingNing Piyachat",
-    "Ratchanee Pantong",
-    "Saiphan Sangyot",
-    "Gift Supattra",
-    "Keaw Narakorn",
-    "Oil Siriwanna",
-    "Panjaporn Phosrikeaw",
-    "Natthanun Chalee",
-    "Pimrapa Pom",
-    "มิ้นท์ มินตรา",
-    "บิว จุฑารัตน์ แสงมนี",
-    "ออกัส นริสรา",
-    "Aey Thitima",
-    "Duangdao ด้วยรักและปลาทู",
-    "Parichat Thitipechakul",
-    "Kotchakorn Sakdikul",
-    "Wanida Saekue",
-    "Nida Suntasak",
-    "Arisa Sakolvipas",
-    "Nisarat Chaiyarit",
-    "Varunee Cheyasak",
-    "Pornnapa Wannavijit",
-    "Thanthip Manapensiri",
-    "Kamonchon Kiattikul",
-
-    # เพิ่มชื่ออื่นๆ ได้ที่นี่
+Seeding accounts are stored as SeedingAuthor rows. A row is global
+(campaign_group empty) or belongs to one CommentCampaignGroup. For each
+campaign the rows are compiled once into a ``SeedingIndex``: a dict of
+normalized names (``normalize_author``: NFKC, casefold, zero-width and
+punctuation removed, Latin accents dropped, whitespace collapsed), plus the
+same names with their words sorted ("Jarintip Mooh" = "Mooh Jarintip").
+
+Exact normalized matching is the default. A campaign can opt in to an
+edit-distance fallback (``CommentCampaignGroup.fuzzy_seeding_match``, or
+``'fuzzy': True`` for every campaign) for typos in long names. It is kept
+strict so organic commenters are not swallowed: the name must be at least
+``min_fuzzy_length`` long, have the same number of words, be at most
+``max_distance`` edits away, and its first and last words may only differ by
+an inserted/deleted character, never a substituted one ("Anne Bell" is not
+"Anna Bell"; "Kamonchanok Kengklaa" is "Kamonchanok Kengkla").
+
+The index is cached per process and rebuilt only when the SeedingAuthor
+table changes (one small count/max query per lookup). ``split_seeding``
+classifies a whole comment list in one pass, with each distinct author
+looked up once.
+
+Defaults can be overridden in settings::
+
+    SEEDING_MATCH = {'fuzzy': False, 'max_distance': 1, 'min_fuzzy_length': 12}
+"""
+import threading
+import unicodedata
+
+from django.conf import settings
+
+DEFAULTS = {
+    'fuzzy': False,          # เปิดรายแคมเปญได้ที่ CommentCampaignGroup.fuzzy_seeding_match
+    'max_distance': 1,       # ต่างกันได้กี่ตัวอักษร
+    'min_fuzzy_length': 12,  # ชื่อสั้นกว่านี้ต้องตรงเป๊ะ กันชื่อจริงที่ต่างกันตัวเดียวชนกัน
 }
 
-def is_seeding(author_name):
-    return author_name.strip() in SEEDING_AUTHORS if author_name else False
+_ZERO_WIDTH = dict.fromkeys(map(ord, '\u200b\u200c\u200d\u2060\ufeff'))
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    if settings.configured:
+        conf.update(getattr(settings, 'SEEDING_MATCH', {}) or {})
+    return conf
+
+
+def _is_thai(ch):
+    return '\u0e00' <= ch <= '\u0e7f'
+
+
+def normalize_author(name):
+    """Comparable form of a display name: 'Mooh  Jarintip.' -> 'mooh jarintip', 'Noémie' -> 'noemie'."""
+    text = unicodedata.normalize('NFKD', (name or '').translate(_ZERO_WIDTH)).casefold()
+    chars = []
+    for ch in text:
+        if _is_thai(ch):
+            chars.append(ch)  # สระ/วรรณยุกต์ไทยเป็นส่วนของชื่อ ห้ามตัดทิ้ง
+        elif unicodedata.combining(ch):
+            continue  # accent ของอักษรละติน
+        else:
+            chars.append(ch if ch.isalnum() else ' ')
+    return unicodedata.normalize('NFC', ' '.join(''.join(chars).split()))
+
+
+def _sorted_words(normalized):
+    return ' '.join(sorted(normalized.split()))
+
+
+def _distance(a, b, limit, substitutions=True):
+    """True if the Levenshtein distance of a and b is at most ``limit`` (stops early)."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    replace_cost = 1 if substitutions else limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (0 if ca == cb else replace_cost)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def _fuzzy_equal(a, b, limit):
+    """Word by word within ``limit`` edits in total; first/last words allow no substitutions."""
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b):
+        return False
+    budget = limit
+    last = len(words_a) - 1
+    for i, (wa, wb) in enumerate(zip(words_a, words_b)):
+        if wa == wb:
+            continue
+        spent = _distance(wa, wb, budget, substitutions=0 < i < last)
+        if spent is None:
+            return False
+        budget -= spent
+    return True
+
+
+class SeedingIndex:
+    def __init__(self, names, fuzzy=False, max_distance=1, min_fuzzy_length=12):
+        self.exact = {}
+        self.by_length = {}
+        self.fuzzy = fuzzy and max_distance > 0
+        self.max_distance = max_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        for name in names:
+            key = normalize_author(name)
+            if not key:
+                continue
+            self.exact.setdefault(key, name)
+            self.exact.setdefault(_sorted_words(key), name)
+            if len(key) >= min_fuzzy_length:
+                self.by_length.setdefault(len(key), []).append((key, name))
+
+    def match(self, author_name):
+        """The registered name ``author_name`` matches, or None."""
+        key = normalize_author(author_name)
+        if not key:
+            return None
+        found = self.exact.get(key) or self.exact.get(_sorted_words(key))
+        if found or not self.fuzzy or len(key) < self.min_fuzzy_length:
+            return found
+        for length in range(len(key) - self.max_distance, len(key) + self.max_distance + 1):
+            for candidate, name in self.by_length.get(length, ()):
+                if _fuzzy_equal(key, candidate, self.max_distance):
+                    return name
+        return None
+
+    def classify(self, author_names):
+        """``{author_name: matched registered name or None}`` with each distinct name looked up once."""
+        return {name: self.match(name) for name in set(author_names)}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _campaign_id(campaign_group):
+    return getattr(campaign_group, 'pk', campaign_group)
+
+
+def seeding_index(campaign_group=None):
+    """Cached SeedingIndex of the global seeding authors plus those of ``campaign_group`` (object or id)."""
+    from django.db.models import Count, Max, Q
+
+    from .models import CommentCampaignGroup, SeedingAuthor
+
+    conf = _config()
+    campaign_id = _campaign_id(campaign_group)
+    if campaign_id is not None and not conf['fuzzy']:
+        conf['fuzzy'] = CommentCampaignGroup.objects.filter(pk=campaign_id, fuzzy_seeding_match=True).exists()
+    rows = SeedingAuthor.objects.filter(Q(campaign_group__isnull=True) | Q(campaign_group_id=campaign_id))
+    # version ของตาราง: เปลี่ยนเมื่อมีการเพิ่ม/แก้/ลบ (ใช้ได้ข้าม process ด้วย) + โหมด fuzzy ของแคมเปญ
+    state = rows.aggregate(count=Count('id'), updated=Max('updated_at'))
+    version = (state['count'], state['updated'], conf['fuzzy'])
+    with _indexes_lock:
+        cached = _indexes.get(campaign_id)
+        if cached and cached[0] == version:
+            return cached[1]
+    index = SeedingIndex(rows.values_list('name', flat=True), **conf)
+    with _indexes_lock:
+        _indexes[campaign_id] = (version, index)
+    return index
+
+
+def split_seeding(comments, campaign_group=None):
+    """Split ``comments`` (FacebookComment rows or dicts with 'author') into (seeding, organic), keeping order."""
+    comments = list(comments)
+    author_of = (lambda c: c.get('author')) if comments and isinstance(comments[0], dict) else (lambda c: c.author)
+    matches = seeding_index(campaign_group).classify(author_of(c) for c in comments)
+    seeding, organic = [], []
+    for c in comments:
+        (seeding if matches[author_of(c)] else organic).append(c)
+    return seeding, organic
+
+
+def is_seeding(author_name, campaign_group=None):
+    return bool(author_name) and seeding_index(campaign_group).match(author_name) is not None
@@ -0,0 +1,252 @@
+# PageInfo/sessions.py
+"""
+Cookie/session pool for the browser scrapers.
+
+Cookie jars are read and normalized (``sameSite`` fixed up for Playwright)
+once per file version, then reused. For every platform the pool holds all
+accounts we own and hands one out per scrape::
+
+    with session_pool().lease('facebook') as session:
+        scraper = FBPostScraperAsync(cookie_file=session.path, ...)
+        posts = await scraper.run()
+        if scraper.login_failed:
+            session.report('checkpoint')
+
+Leases go to the least-busy, healthiest account that is not cooling down.
+Each outcome ('ok', 'failure', 'captcha', 'checkpoint') updates the
+account's health score. Captchas and checkpoints put the account on a
+cooldown, so one bad session no longer stops all scraping. The health state
+lives in this process.
+
+Accounts come from settings (paths relative to BASE_DIR, globs allowed)::
+
+    SCRAPER_SESSIONS = {
+        'facebook': ['PageInfo/cookie.json', 'PageInfo/cookies/facebook/*.json'],
+        'tiktok': ['PageInfo/tiktok_cookies.json', 'PageInfo/cookies/tiktok/*.json'],
+    }
+"""
+import glob
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_ACCOUNTS = {
+    'facebook': ['PageInfo/cookie.json', 'PageInfo/cookies/facebook/*.json'],
+    'tiktok': ['PageInfo/tiktok_cookies.json', 'PageInfo/cookies/tiktok/*.json'],
+}
+
+# วินาทีที่พัก account หลังเจอปัญหา
+COOLDOWNS = {
+    'failure': 10 * 60,      # หลัง error ติดกัน FAILURE_STREAK ครั้ง
+    'captcha': 15 * 60,      # คูณ 2 ทุกครั้งที่เจอซ้ำติดกัน (สูงสุด MAX_COOLDOWN)
+    'checkpoint': 6 * 3600,
+}
+FAILURE_STREAK = 3
+MAX_COOLDOWN = 4 * 3600
+
+OUTCOMES = ('ok', 'failure', 'captcha', 'checkpoint')
+
+_SAME_SITE = {'no_restriction': 'None', 'none': 'None', 'lax': 'Lax', 'strict': 'Strict'}
+
+_cookie_cache = {}
+_cookie_lock = threading.Lock()
+
+
+def normalize_cookies(raw):
+    """Make browser-exported cookies acceptable to Playwright's ``add_cookies``."""
+    cookies = []
+    for cookie in raw:
+        cookie = dict(cookie)
+        same_site = cookie.get('sameSite')
+        if same_site is None:
+            cookie['sameSite'] = 'None'
+        elif isinstance(same_site, str):
+            cookie['sameSite'] = _SAME_SITE.get(same_site.lower(), 'Lax')
+        cookies.append(cookie)
+    return cookies
+
+
+def load_cookies(path):
+    """Normalized cookies of ``path``; the file is only re-read when it changes."""
+    path = str(path)
+    mtime = os.path.getmtime(path)
+    with _cookie_lock:
+        cached = _cookie_cache.get(path)
+        if cached and cached[0] == mtime:
+            return [dict(c) for c in cached[1]]
+    cookies = normalize_cookies(json.loads(Path(path).read_text(encoding='utf-8')))
+    with _cookie_lock:
+        _cookie_cache[path] = (mtime, cookies)
+    return [dict(c) for c in cookies]
+
+
+class NoSessionAvailable(Exception):
+    """Every account of the platform is cooling down (or none is configured)."""
+
+    def __init__(self, platform, retry_at=None):
+        self.platform = platform
+        self.retry_at = retry_at
+        wait = f", next one in {max(retry_at - time.time(), 0):.0f}s" if retry_at else ''
+        super().__init__(f"no usable {platform} session{wait}")
+
+
+class Account:
+    def __init__(self, platform, path):
+        self.platform = platform
+        self.path = str(path)
+        self.name = Path(path).stem
+        self.health = 1.0  # EMA ของอัตราสำเร็จ (0..1)
+        self.in_use = 0
+        self.uses = 0
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        self.failure_streak = 0
+        self.captcha_streak = 0
+        self.cooldown_until = 0.0
+        self.last_outcome = ''
+
+    @property
+    def cookies(self):
+        return load_cookies(self.path)
+
+    def available(self, now=None):
+        return self.cooldown_until <= (now or time.time())
+
+    def record(self, outcome, now=None):
+        now = now or time.time()
+        self.counts[outcome] += 1
+        self.last_outcome = outcome
+        if outcome == 'ok':
+            self.health = 0.8 * self.health + 0.2
+            self.failure_streak = self.captcha_streak = 0
+        elif outcome == 'failure':
+            self.health *= 0.8
+            self.failure_streak += 1
+            if self.failure_streak >= FAILURE_STREAK:
+                self.cooldown_until = now + COOLDOWNS['failure']
+                self.failure_streak = 0
+        elif outcome == 'captcha':
+            self.health *= 0.6
+            self.captcha_streak += 1
+            cooldown = COOLDOWNS['captcha'] * 2 ** (self.captcha_streak - 1)
+            self.cooldown_until = now + min(cooldown, MAX_COOLDOWN)
+        elif outcome == 'checkpoint':
+            self.health = 0.0
+            self.cooldown_until = now + COOLDOWNS['checkpoint']
+
+    def stats(self):
+        return {
+            'platform': self.platform,
+            'account': self.name,
+            'health': round(self.health, 3),
+            'in_use': self.in_use,
+            'uses': self.uses,
+            'cooldown_s': max(round(self.cooldown_until - time.time()), 0),
+            **self.counts,
+        }
+
+    def __repr__(self):
+        return f"<Account {self.platform}:{self.name} health={self.health:.2f}>"
+
+
+class Lease:
+    """One checked-out account; outcome defaults to 'ok', or 'failure' if the block raised."""
+
+    def __init__(self, pool, account):
+        self.pool = pool
+        self.account = account
+        self.outcome = None
+
+    @property
+    def path(self):
+        return self.account.path
+
+    @property
+    def cookies(self):
+        return self.account.cookies
+
+    def report(self, outcome):
+        if outcome not in OUTCOMES:
+            raise ValueError(f"unknown outcome: {outcome}")
+        # เก็บผลที่แย่ที่สุดไว้ (checkpoint > captcha > failure > ok)
+        if self.outcome is None or OUTCOMES.index(outcome) > OUTCOMES.index(self.outcome):
+            self.outcome = outcome
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.report('failure')
+        self.pool.release(self.account, self.outcome or 'ok')
+        return False
+
+
+class SessionPool:
+    def __init__(self, accounts=None):
+        """``accounts``: {platform: [paths or globs]} (default: settings.SCRAPER_SESSIONS)."""
+        self._lock = threading.Lock()
+        self.accounts = {}
+        for platform, patterns in (accounts or _configured_accounts()).items():
+            self.accounts[platform] = [Account(platform, path) for path in _expand(patterns)]
+
+    def acquire(self, platform):
+        now = time.time()
+        with self._lock:
+            accounts = self.accounts.get(platform) or []
+            usable = [a for a in accounts if a.available(now)]
+            if not usable:
+                retry_at = min((a.cooldown_until for a in accounts), default=None)
+                raise NoSessionAvailable(platform, retry_at)
+            # ✅ กระจายงาน: account ที่ว่างที่สุดก่อน แล้วค่อยดู health
+            account = min(usable, key=lambda a: (a.in_use, -a.health))
+            account.in_use += 1
+            account.uses += 1
+            return account
+
+    def release(self, account, outcome='ok'):
+        with self._lock:
+            account.in_use = max(account.in_use - 1, 0)
+            account.record(outcome)
+        if outcome != 'ok':
+            print(f"⚠️ [{account.platform}:{account.name}] {outcome} "
+                  f"(health {account.health:.2f}, cooldown {account.stats()['cooldown_s']}s)")
+
+    def lease(self, platform):
+        return Lease(self, self.acquire(platform))
+
+    def stats(self):
+        with self._lock:
+            return [account.stats() for accounts in self.accounts.values() for account in accounts]
+
+
+def _configured_accounts():
+    custom = getattr(settings, 'SCRAPER_SESSIONS', None) if settings.configured else None
+    return custom or DEFAULT_ACCOUNTS
+
+
+def _expand(patterns):
+    base_dir = Path(getattr(settings, 'BASE_DIR', '.')) if settings.configured else Path('.')
+    paths = []
+    for pattern in patterns:
+        pattern = str(pattern if os.path.isabs(pattern) else base_dir / pattern)
+        for path in sorted(glob.glob(pattern)):
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def session_pool():
+    """Process-wide SessionPool (built on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool()
+        return _pool
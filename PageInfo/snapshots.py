@@ -0,0 +1,193 @@
+# PageInfo/snapshots.py
+"""
+Post metric history (views/likes/comments over time).
+
+FacebookPost/TikTokPost only keep the latest counts. Every time posts are
+stored (add_page, bulk import, refresh_posts) ``record_snapshots`` appends
+one compact PostMetricSnapshot row per post in a single bulk insert. A post
+whose counts have not changed since its last snapshot is skipped, so a
+series is a step function: the value holds until the next point.
+
+Old history is thinned out by ``downsample_snapshots``: the last point per
+hour is kept after ``hourly_after`` days, and the last point per day after
+``daily_after`` days. The chart helpers only read through the
+(post, captured_at) and (page, captured_at) indexes.
+"""
+from datetime import timedelta
+
+from django.db.models import F, Max, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, Lag, TruncDay, TruncHour
+from django.utils import timezone
+
+from .metrics import reactions_total
+from .models import FacebookPost, PostMetricSnapshot
+
+METRICS = ('view_count', 'like_count', 'comment_count', 'share_count', 'save_count', 'total_engagement')
+
+
+def _post_field(post):
+    return 'facebook_post' if isinstance(post, FacebookPost) else 'tiktok_post'
+
+
+def snapshot_for(post, captured_at):
+    """Unsaved PostMetricSnapshot of the current counts of one FacebookPost/TikTokPost."""
+    if isinstance(post, FacebookPost):
+        counts = {
+            'view_count': post.watch_count,
+            'like_count': reactions_total(post.reactions),
+            'save_count': 0,
+        }
+    else:
+        counts = {
+            'view_count': post.view_count,
+            'like_count': post.like_count or 0,
+            'save_count': post.save_count or 0,
+        }
+    return PostMetricSnapshot(
+        page_id=post.page_id,
+        captured_at=captured_at,
+        comment_count=post.comment_count or 0,
+        share_count=post.share_count or 0,
+        total_engagement=post.total_engagement or 0,
+        **counts,
+        **{_post_field(post): post},
+    )
+
+
+def _latest_counts(field, post_ids):
+    """``{post_id: (metric values...)}`` of the newest snapshot of each post."""
+    latest = (
+        PostMetricSnapshot.objects.filter(**{f'{field}_id__in': post_ids})
+        .values(f'{field}_id')
+        .annotate(last_id=Max('id'))
+        .values('last_id')
+    )
+    return {
+        row[0]: row[1:]
+        for row in PostMetricSnapshot.objects.filter(id__in=latest).values_list(f'{field}_id', *METRICS)
+    }
+
+
+def record_snapshots(posts, captured_at=None, batch_size=500):
+    """Append a snapshot for every post in ``posts`` whose counts changed. Returns rows written."""
+    captured_at = captured_at or timezone.now()
+    by_field = {'facebook_post': [], 'tiktok_post': []}
+    for post in posts:
+        by_field[_post_field(post)].append(post)
+
+    rows = []
+    for field, field_posts in by_field.items():
+        if not field_posts:
+            continue
+        latest = _latest_counts(field, [post.pk for post in field_posts])
+        for post in field_posts:
+            snapshot = snapshot_for(post, captured_at)
+            if latest.get(post.pk) == tuple(getattr(snapshot, m) for m in METRICS):
+                continue
+            rows.append(snapshot)
+
+    PostMetricSnapshot.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def post_series(post, start=None, end=None, metric='total_engagement'):
+    """``[(captured_at, value)]`` of one post, oldest first."""
+    qs = PostMetricSnapshot.objects.filter(**{_post_field(post): post})
+    if start:
+        qs = qs.filter(captured_at__gte=start)
+    if end:
+        qs = qs.filter(captured_at__lte=end)
+    return list(qs.order_by('captured_at').values_list('captured_at', metric))
+
+
+def growth_rates(post, start=None, end=None, metric='total_engagement'):
+    """
+    Velocity of one post: ``[(captured_at, value, gain_per_hour)]``.
+    gain_per_hour is None for the first point.
+    """
+    points = []
+    previous = None
+    for captured_at, value in post_series(post, start, end, metric):
+        rate = None
+        if previous is not None and value is not None and previous[1] is not None:
+            hours = (captured_at - previous[0]).total_seconds() / 3600
+            if hours > 0:
+                rate = round((value - previous[1]) / hours, 2)
+        points.append((captured_at, value, rate))
+        previous = (captured_at, value)
+    return points
+
+
+def _value_before(field, start, metric):
+    """Subquery: ``metric`` of the post's last snapshot before ``start`` (uses the (post, captured_at) index)."""
+    return Subquery(
+        PostMetricSnapshot.objects.filter(**{f'{field}_id': OuterRef(f'{field}_id')}, captured_at__lt=start)
+        .order_by('-captured_at')
+        .values(metric)[:1]
+    )
+
+
+def page_daily_gains(page_ids, start, end, metric='total_engagement'):
+    """
+    ``{date: gain}``: how much ``metric`` grew per day across all posts of
+    ``page_ids`` between ``start`` and ``end``. Uses LAG over each post's own
+    snapshots in the range; the first point of each post is compared with
+    that post's last snapshot before ``start``, however old it is (unchanged
+    counts are not recorded and old history is thinned to daily points).
+    """
+    previous_value = Window(
+        Lag(metric),
+        partition_by=[F('facebook_post_id'), F('tiktok_post_id')],
+        order_by=F('captured_at').asc(),
+    )
+    rows = list(
+        PostMetricSnapshot.objects.filter(page_id__in=page_ids, captured_at__gte=start, captured_at__lte=end)
+        .annotate(previous=previous_value)
+        .values_list('id', 'captured_at', metric, 'previous')
+    )
+    first_ids = [row_id for row_id, _, _, previous in rows if previous is None]
+    before = dict(
+        PostMetricSnapshot.objects.filter(id__in=first_ids)
+        .annotate(before=Coalesce(_value_before('facebook_post', start, metric),
+                                  _value_before('tiktok_post', start, metric)))
+        .values_list('id', 'before')
+    ) if first_ids else {}
+
+    gains = {}
+    for row_id, captured_at, value, previous in rows:
+        if previous is None:
+            previous = before.get(row_id)
+        if previous is None or value is None:
+            continue
+        day = timezone.localtime(captured_at).date() if timezone.is_aware(captured_at) else captured_at.date()
+        gains[day] = gains.get(day, 0) + (value - previous)
+    return dict(sorted(gains.items()))
+
+
+def _downsample(qs, trunc):
+    keep = (
+        qs.annotate(bucket=trunc('captured_at'))
+        .values('facebook_post_id', 'tiktok_post_id', 'bucket')
+        .annotate(keep_id=Max('id'))
+        .values('keep_id')
+    )
+    deleted, _ = qs.exclude(id__in=keep).delete()
+    return deleted
+
+
+def downsample_snapshots(hourly_after=7, daily_after=30, now=None):
+    """
+    Thin out old snapshots: keep the last point per post per hour once they are
+    ``hourly_after`` days old and per day once ``daily_after`` days old.
+    Returns the number of rows deleted.
+    """
+    now = now or timezone.now()
+    daily_cutoff = now - timedelta(days=daily_after)
+    hourly_cutoff = now - timedelta(days=hourly_after)
+
+    deleted = _downsample(PostMetricSnapshot.objects.filter(captured_at__lt=daily_cutoff), TruncDay)
+    deleted += _downsample(
+        PostMetricSnapshot.objects.filter(captured_at__gte=daily_cutoff, captured_at__lt=hourly_cutoff),
+        TruncHour,
+    )
+    return deleted
@@ -0,0 +1,11 @@
+from django import template
+
+from PageInfo.thumbnails import thumb_url
+
+register = template.Library()
+
+
+@register.filter
+def thumb(url, size='post'):
+    """{{ post.post_imgs.0|thumb:'post' }} / {{ page.profile_pic|thumb:'avatar' }}"""
+    return thumb_url(url, size)
@@ -0,0 +1,221 @@
+# PageInfo/thumbnails.py
+"""
+Local thumbnail cache for the images shown on the dashboards (post images and
+page avatars from fbcdn / tiktokcdn / our mirror).
+
+Templates never point at the full-size CDN image. They get a thumbnail URL
+instead::
+
+    {% load thumbnails %}
+    <img src="{{ post.post_imgs.0|thumb:'post' }}">
+    <img src="{{ page.profile_pic|thumb:'avatar' }}">
+
+``thumb_url(url, size)`` only signs ``[size, url]`` into the link
+(``/thumb/<token>/``); it does no disk or network I/O, so rendering a page
+with hundreds of images costs nothing extra. The signature means the view
+only fetches URLs we rendered ourselves (it is not an open proxy), and the
+link is the same on every render, so browsers cache it too.
+
+The ``thumbnail`` view serves ``<dir>/<aa>/<sha1(url)>-<px>.webp``:
+
+* hit: the file is streamed with a long ``Cache-Control``; its mtime is
+  bumped (at most once per ``touch_seconds``) to mark it recently used,
+* miss: the image is fetched once through the shared HTTP client, shrunk to
+  fit ``px`` x ``px`` and stored as WebP. When the cache grows past
+  ``max_bytes`` the least recently used files are deleted until it is back
+  under ``low_water`` of the cap,
+* failure (expired URL, not an image): redirect to the original URL.
+
+Defaults can be overridden in settings::
+
+    THUMBNAILS = {
+        'dir': MEDIA_ROOT + '/thumbs',
+        'sizes': {'avatar': 128, 'post': 360},
+        'quality': 75, 'max_bytes': 500_000_000, 'low_water': 0.9,
+        'max_source_bytes': 15_000_000, 'touch_seconds': 3600,
+        'cache_seconds': 30 * 24 * 3600,
+    }
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from .http_client import get_client, run_sync
+
+DEFAULTS = {
+    'dir': None,  # None = MEDIA_ROOT/thumbs
+    'sizes': {'avatar': 128, 'post': 360},
+    'quality': 75,
+    'max_bytes': 500_000_000,
+    'low_water': 0.9,
+    'max_source_bytes': 15_000_000,
+    'touch_seconds': 3600,
+    'cache_seconds': 30 * 24 * 3600,
+}
+
+SALT = 'PageInfo.thumbnails'
+
+_lock = threading.Lock()
+_usage = None  # ขนาดรวมของ cache (ไบต์) ประมาณจากการสแกนครั้งแรก + ไฟล์ที่เขียนเพิ่ม
+
+
+def _config():
+    conf = dict(DEFAULTS)
+    if settings.configured:
+        conf.update(getattr(settings, 'THUMBNAILS', {}) or {})
+    if not conf['dir']:
+        conf['dir'] = os.path.join(settings.MEDIA_ROOT, 'thumbs')
+    return conf
+
+
+def cache_seconds():
+    """Browser cache lifetime of a served thumbnail."""
+    return _config()['cache_seconds']
+
+
+def thumb_url(url, size='post'):
+    """Signed thumbnail link for ``url``; non-http values (static paths, '') are returned unchanged."""
+    if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+        return url
+    if size not in _config()['sizes']:
+        raise ValueError(f"unknown thumbnail size: {size}")
+    # Signer ไม่ใส่ timestamp: URL เดิมได้ token เดิมทุกครั้ง browser จึง cache ได้
+    token = signing.Signer(salt=SALT).sign_object([size, url], compress=True)
+    return reverse('thumbnail', args=[token])
+
+
+def unsign(token):
+    """``(url, size)`` of a token made by ``thumb_url``; raises ``signing.BadSignature``."""
+    size, url = signing.Signer(salt=SALT).unsign_object(token)
+    return url, size
+
+
+def thumbnail_posts(grouped):
+    """
+    Copy of the popup/chart data of group_detail / pageview (``{key: [post, ...]}``)
+    with ``post_imgs`` and ``profile_pic`` (also inside ``page``) pointed at thumbnails.
+    """
+    def convert(post):
+        post = dict(post)
+        if post.get('post_imgs'):
+            post['post_imgs'] = [thumb_url(img, 'post') for img in post['post_imgs'][:1]]
+        if post.get('profile_pic'):
+            post['profile_pic'] = thumb_url(post['profile_pic'], 'avatar')
+        if isinstance(post.get('page'), dict) and post['page'].get('profile_pic'):
+            post['page'] = dict(post['page'], profile_pic=thumb_url(post['page']['profile_pic'], 'avatar'))
+        return post
+
+    return {key: [convert(p) for p in posts] for key, posts in grouped.items()}
+
+
+def cache_path(url, px, conf=None):
+    conf = conf or _config()
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(conf['dir'], digest[:2], f"{digest}-{px}.webp")
+
+
+def make_thumbnail(data, px, quality=75):
+    """Image bytes -> WebP bytes fitting ``px`` x ``px``."""
+    image = Image.open(io.BytesIO(data))
+    # JPEG: ให้ decoder ถอดรหัสที่ขนาดเล็กเลย (เร็วกว่าถอดเต็มแล้วค่อยย่อหลายเท่า)
+    image.draft('RGB', (px, px))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    image.thumbnail((px, px), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _cache_files(root):
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.is_file() and entry.name.endswith('.webp'):
+                yield entry
+
+
+def _disk_usage(root):
+    if not os.path.isdir(root):
+        return 0
+    return sum(entry.stat().st_size for entry in _cache_files(root))
+
+
+def evict(conf=None):
+    """Delete least recently used thumbnails until the cache is under ``low_water`` x ``max_bytes``."""
+    global _usage
+    conf = conf or _config()
+    files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in _cache_files(conf['dir'])]
+    total = sum(size for _, size, _ in files)
+    target = conf['max_bytes'] * conf['low_water']
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    _usage = total
+    print(f"🧹 [thumbs] evicted {removed} files, cache now {total // 1_000_000} MB")
+    return removed
+
+
+def _store(path, data, conf):
+    global _usage
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)  # ✅ request อื่นไม่เห็นไฟล์ที่เขียนไม่ครบ
+    with _lock:
+        if _usage is None:
+            _usage = _disk_usage(conf['dir'])
+        else:
+            _usage += len(data)
+        if _usage > conf['max_bytes']:
+            evict(conf)
+
+
+async def _fetch(url, max_bytes):
+    response = await get_client().get(url, follow_redirects=True)
+    if response.status_code >= 400:
+        raise ValueError(f"HTTP {response.status_code}")
+    data = response.content
+    if not data or len(data) > max_bytes:
+        raise ValueError(f"unexpected size {len(data)}")
+    return data
+
+
+def cached_thumbnail(url, size):
+    """Path of the cached thumbnail of ``url`` (fetched and stored on a miss), or None on failure."""
+    conf = _config()
+    px = conf['sizes'][size]
+    path = cache_path(url, px, conf)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        pass
+    else:
+        now = time.time()
+        if now - mtime > conf['touch_seconds']:
+            os.utime(path, (now, now))  # LRU: ใช้ล่าสุดเมื่อไหร่
+        return path
+
+    try:
+        data = run_sync(_fetch(url, conf['max_source_bytes']))
+        _store(path, make_thumbnail(data, px, conf['quality']), conf)
+    except Exception as e:
+        print(f"❌ [thumbs] {url[:80]}: {e}")
+        return None
+    return path
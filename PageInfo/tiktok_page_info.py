@@ -1,11 +1,19 @@
-import requests
 import re
 import json
 
+from .http_client import get_client, run_sync
+
 
 def get_tiktok_info(url):
     """
-    ดึงข้อมูลโปรไฟล์ TikTok จาก URL
+    ดึงข้อมูลโปรไฟล์ TikTok จาก URL (sync wrapper ของ fetch_tiktok_info)
+    """
+    return run_sync(fetch_tiktok_info(url))
+
+
+async def fetch_tiktok_info(url):
+    """
+    ดึงข้อมูลโปรไฟล์ TikTok จาก URL ผ่าน shared async HTTP client
     """
     # แยก username จาก URL เช่น https://www.tiktok.com/@atlascat_official
     match = re.search(r"tiktok\.com/@([\w\.\-]+)", url)
@@ -25,7 +33,7 @@ def get_tiktok_info(url):
     }
 
     try:
-        response = requests.get(profile_url, headers=headers, timeout=10)
+        response = await get_client().get(profile_url, headers=headers)
         if response.status_code != 200:
             print(f"❌ HTTP Error: {response.status_code}")
             return None
@@ -10,6 +10,10 @@ import os
 import logging
 from typing import List, Dict, Optional, Tuple
 
+from .checkpoints import ScrapeCheckpoint
+from .ratelimit import limiter_for, throttled_goto_sync
+from .sessions import load_cookies as load_cookie_jar
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,6 +25,8 @@ class TikTokPostScraper:
     Can scrape posts from any TikTok profile URL dynamically with improved error handling
     """
 
+    CHECKPOINT_EVERY = 5  # บันทึก checkpoint ทุกกี่โพสต์
+
     def __init__(self, cookies_file: str = None, headless: bool = False, timeout: int = 30000):
         self.cookies_file = cookies_file
         self.headless = headless
@@ -28,6 +34,7 @@ class TikTokPostScraper:
         self.browser = None
         self.context = None
         self.page = None
+        self.captcha_detected = False  # ✅ ให้ session pool รู้ว่า account นี้โดน CAPTCHA
         self.playwright = None
 
     def __enter__(self):
@@ -91,14 +98,8 @@ class TikTokPostScraper:
     def load_cookies(self):
         """Load cookies from file with error handling"""
         try:
-            with open(self.cookies_file, "r", encoding="utf-8") as f:
-                cookies = json.load(f)
-
-            # Sanitize cookies
-            for cookie in cookies:
-                if 'sameSite' in cookie and cookie['sameSite'] not in ['Strict', 'Lax', 'None']:
-                    cookie['sameSite'] = 'Lax'
-
+            # อ่าน + sanitize sameSite ครั้งเดียวต่อไฟล์ (cache ใน PageInfo/sessions.py)
+            cookies = load_cookie_jar(self.cookies_file)
             self.context.add_cookies(cookies)
             logger.info(f"Loaded {len(cookies)} cookies from {self.cookies_file}")
 
@@ -189,13 +190,16 @@ class TikTokPostScraper:
         for attempt in range(retries):
             try:
                 logger.info(f"🔄 Navigating to: {url} (attempt {attempt + 1})")
-                self.page.goto(url, wait_until='domcontentloaded', timeout=self.timeout)
+                # ✅ จังหวะการเปิดหน้าคุมด้วย token bucket ของ tiktok.com (แชร์กับทุก job)
+                throttled_goto_sync(self.page, url, wait_until='domcontentloaded', timeout=self.timeout)
 
                 # Wait for page to stabilize
                 time.sleep(random.uniform(2, 4))
 
                 if self.check_captcha_exists():
                     logger.info("🤖 CAPTCHA detected during navigation")
+                    self.captcha_detected = True
+                    limiter_for(url).report('captcha')
                     # Use a shorter wait time to avoid long hangs on CAPTCHA
                     if not self.solve_captcha(max_wait_time=5):
                         logger.warning("⚠️ CAPTCHA persists - will use default values")
@@ -864,29 +868,54 @@ class TikTokPostScraper:
             logger.error(f"❌ Critical error in scroll_to_load_all_posts: {e}")
             return []
 
-    def scrape_posts_from_profile(self, profile_url: str, max_posts: int = None, scroll_rounds: int = 50) -> List[Dict]:
+    def scrape_posts_from_profile(self, profile_url: str, max_posts: int = None, scroll_rounds: int = 50,
+                                  resume: bool = True) -> List[Dict]:
         """
         Main function to scrape posts from TikTok profile
         First loads all posts, then processes them one by one
+
+        With ``resume`` the post list and every processed post are checkpointed,
+        so a crashed run continues where it stopped instead of scrolling again.
         """
+        checkpoint = ScrapeCheckpoint.for_job(
+            "tiktok_post", profile_url, max_posts=max_posts, scroll_rounds=scroll_rounds
+        ) if resume else None
         try:
-            # Step 1: Load all posts by scrolling
-            logger.info("🔄 Step 1: Loading all posts from profile...")
-            all_posts = self.scroll_to_load_all_posts(profile_url, scroll_rounds)
-
-            if not all_posts:
-                logger.error("❌ No posts found or failed to load posts")
-                return []
-
-            # Step 2: Limit posts if max_posts is specified
-            posts_to_process = all_posts[:max_posts] if max_posts else all_posts
-            logger.info(f"📋 Step 2: Processing {len(posts_to_process)} posts (out of {len(all_posts)} total)")
+            if checkpoint and checkpoint.load() and checkpoint.results:
+                # Step 1-2 (resumed): reuse the post list of the crashed run
+                posts_to_process = checkpoint.results
+                processed_urls = checkpoint.seen_ids
+                total_found = checkpoint.position.get("total_posts", len(posts_to_process))
+                logger.info(f"♻️ Resuming: {len(processed_urls)}/{len(posts_to_process)} posts already processed")
+            else:
+                # Step 1: Load all posts by scrolling
+                logger.info("🔄 Step 1: Loading all posts from profile...")
+                all_posts = self.scroll_to_load_all_posts(profile_url, scroll_rounds)
+
+                if not all_posts:
+                    logger.error("❌ No posts found or failed to load posts")
+                    return []
+
+                # Step 2: Limit posts if max_posts is specified
+                posts_to_process = all_posts[:max_posts] if max_posts else all_posts
+                processed_urls = set()
+                total_found = len(all_posts)
+                if checkpoint:
+                    checkpoint.save(posts_to_process, processed_urls, total_posts=total_found)
+            logger.info(f"📋 Step 2: Processing {len(posts_to_process)} posts (out of {total_found} total)")
 
             # Step 3: Process each post to get detailed information
             logger.info("🔄 Step 3: Extracting detailed information from each post...")
             successful_posts = 0
 
+            def mark_processed(post):
+                processed_urls.add(post.get("post_url"))
+                if checkpoint and len(processed_urls) % self.CHECKPOINT_EVERY == 0:
+                    checkpoint.save(posts_to_process, processed_urls)
+
             for i, post in enumerate(posts_to_process):
+                if post.get("post_url") in processed_urls:
+                    continue
                 try:
                     logger.info(
                         f"🔄 Processing post {i + 1}/{len(posts_to_process)}: {post.get('post_url', 'Unknown URL')}")
@@ -904,6 +933,7 @@ class TikTokPostScraper:
                             "shared": 0,
                             "saved": 0
                         })
+                        mark_processed(post)
                         continue
 
                     # Extract detailed post data
@@ -935,7 +965,7 @@ class TikTokPostScraper:
                     logger.info("=" * 80)
 
                     successful_posts += 1
-                    time.sleep(self.human_like_delay())
+                    mark_processed(post)
 
                 except Exception as e:
                     logger.error(f"❌ Error processing post {i + 1}: {e}")
@@ -950,11 +980,14 @@ class TikTokPostScraper:
                         "shared": 0,
                         "saved": 0
                     })
+                    mark_processed(post)
                     continue
 
             logger.info(f"🎉 Scraping completed!")
             logger.info(f"✅ Successfully processed {successful_posts} posts out of {len(posts_to_process)}")
-            logger.info(f"📊 Total posts found: {len(all_posts)}")
+            logger.info(f"📊 Total posts found: {total_found}")
+            if checkpoint:
+                checkpoint.clear()
 
             return posts_to_process  # Return processed posts instead of all_posts
 
@@ -977,6 +1010,7 @@ def scrape_tiktok_posts_for_django(profile_url: str,
         'success': False,
         'data': [],
         'message': '',
+        'captcha_detected': False,
         'stats': {
             'total_posts': 0,
             'processed_posts': 0,
@@ -1014,6 +1048,7 @@ def scrape_tiktok_posts_for_django(profile_url: str,
                 max_posts=max_posts,
                 scroll_rounds=scroll_rounds
             )
+            result['captcha_detected'] = scraper.captcha_detected
 
             if posts_data:
                 # Ensure all posts have the required fields with safe defaults
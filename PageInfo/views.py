@@ -1,16 +1,28 @@
 from datetime import datetime, timedelta, timezone  # ใส่ไว้บนสุดของ views.py ด้วย
+from datetime import timezone as dt_timezone
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Prefetch
 from django.conf import settings
 from django.db import connection
-from django.db.models import Count
+from django.db.models import Count, F, FloatField, Max, Q, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, ExtractHour, ExtractIsoWeekDay
 from django.utils import timezone
-from django.core.files import File
-from .seeding_utils import is_seeding
+from .seeding_utils import split_seeding
+from .metrics import parse_count
+from .search import search_facebook_posts, search_tiktok_posts, search_comments, paginate
+from .hashtags import top_hashtags as top_hashtags_for
+from .pagination import keyset_paginate
+from .http_client import run_sync
+from .page_import import (
+    PLATFORMS_WITH_POSTS, fetch_profile_fields, import_pages, save_posts, scrape_posts,
+)
 from urllib.parse import unquote
 from urllib.parse import urlparse
 from django.urls import reverse
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.core import signing
+from django.utils.cache import patch_cache_control
 from django.views.decorators.http import require_POST
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
@@ -23,28 +35,20 @@ from .forms import CommentDashboardForm  # ✅ อย่าลืม import
 from .models import FacebookComment, FBCommentDashboard, CommentCampaignGroup
 from .models import PageGroup, PageInfo, FollowerHistory
 from .models import FacebookPost, TikTokPost
-from .forms import PageGroupForm, PageURLForm, CommentDashboardForm
-from .fb_comment_info import run_fb_comment_scraper
-from .fb_page_info import PageInfo as FBPageInfo
-from .fb_page_info import PageFollowers  # ✅ เพิ่มบรรทัดนี้
-from .tiktok_page_info import get_tiktok_info  # แก้เป็น import get_tiktok_info
-from .ig_page_info import get_instagram_info
-from .lm8_page_info import get_lemon8_info  # ✅ เพิ่มบรรทัดนี้
-from .yt_page_info import get_youtube_info
-from .fb_post import FBPostScraperAsync
-from .fb_video import FBVideoScraperAsync
+from .forms import PageGroupForm, PageURLForm, BulkPageImportForm, CommentDashboardForm
 from .fb_comment_info import run_fb_comment_scraper as run_seeding_comment_scraper
-from .fb_comment import run_fb_comment_scraper as run_activity_comment_scraper
-from .fb_like import run_fb_like_scraper
-from .fb_share import run_fb_share_scraper
-from .fb_reel import FBReelScraperAsync
-from .fb_live import FBLiveScraperAsync
+from .fb_activity import match_activity, people_keys, run_activity_scraper
+from .comment_sync import known_keys, save_new_comments
+from .post_screenshots import attach_screenshot
+from .image_mirror import mirror_configured, mirror_model_images
+from .refresh import sync_states
+from .thumbnails import cached_thumbnail, thumb_url, thumbnail_posts
+from .thumbnails import cache_seconds as thumbnail_cache_seconds, unsign as unsign_thumbnail
 from collections import Counter
 from collections import defaultdict
 import asyncio
 import calendar
 import re
-import os
 import json  # 👈 ต้อง import นี้
 
 def parse_timestamp(post):
@@ -135,14 +139,9 @@ def comment_dashboard_detail(request, dashboard_id):
         )
         keyword_group_comments[kg] = list(comment_list)
 
-    # Prepare all comments data for CSV export (with sorting by reaction count)
-    comment_values = list(comments.values('author', 'content', 'sentiment', 'category',
-                                         'keyword_group', 'reason', 'reaction', 'reply'))
-    # Sort by reaction count (descending) if clean_reaction is available
-    try:
-        comment_values.sort(key=lambda x: clean_reaction(x['reaction']), reverse=True)
-    except Exception:
-        pass
+    # Prepare all comments data for CSV export (sorted by reaction count in SQL)
+    comment_values = list(comments.order_by('-reaction_count').values('author', 'content', 'sentiment', 'category',
+                                                                      'keyword_group', 'reason', 'reaction', 'reply'))
 
     # Prepare context for template
     context = {
@@ -162,11 +161,9 @@ def comment_dashboard_detail(request, dashboard_id):
 
     # Separate comments into seeding vs organic if dashboard type is 'seeding'
     if dashboard.dashboard_type == "seeding":
-        seeding_comments = [c for c in comments if is_seeding(c.author)]
-        organic_comments = [c for c in comments if not is_seeding(c.author)]
-        # Sort each list by cleaned reaction count (descending)
-        seeding_comments = sorted(seeding_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
-        organic_comments = sorted(organic_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
+        # Ordered by reaction_count (descending) in SQL, then split in a single pass
+        seeding_comments, organic_comments = split_seeding(
+            comments.order_by('-reaction_count'), campaign_group=dashboard.campaign_group_id)
         context.update({
             "seeding_comments": seeding_comments,
             "organic_comments": organic_comments,
@@ -174,14 +171,12 @@ def comment_dashboard_detail(request, dashboard_id):
 
     # If dashboard type is 'activity', separate into liked vs unliked comments
     elif dashboard.dashboard_type == "activity":
-        liked_comments = [c for c in comments if c.like_status == "ถูกใจแล้ว"]
-        unliked_comments = [c for c in comments if c.like_status != "ถูกใจแล้ว"]
-        # (Optionally sort by reaction count if needed, similar to above)
-        liked_comments = sorted(liked_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
-        unliked_comments = sorted(unliked_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
+        liked_comments = comments.filter(liked=True).order_by('-reaction_count')
+        unliked_comments = comments.filter(liked=False).order_by('-reaction_count')
         context.update({
             "liked_comments": liked_comments,
             "unliked_comments": unliked_comments,
+            **activity_counts(comments),
         })
 
     return render(request, 'PageInfo/comment_dashboard.html', context)
@@ -216,51 +211,24 @@ def clean_reaction(value):
     ถ้าเป็น string เช่น 'ถูกใจ 5' จะดึงเลข 5
     ถ้าไม่มีตัวเลข จะคืน 0
     """
-    if not value:
-        return 0
-    if isinstance(value, int):
-        return value
-    value_str = str(value)
-    digits = ''.join(c for c in value_str if c.isdigit())
-    return int(digits) if digits else 0
-
-async def run_activity_pipeline(post_url, dashboard):
-    # ✅ ดึงคอมเมนต์
-    comment_result = await run_fb_comment_scraper(post_url)
-    comments = comment_result.get("comments", [])
-
-    # ✅ ดึง likes
-    likes = await run_fb_like_scraper(post_url)
-
-    # ✅ ดึง shares
-    shares = await run_fb_share_scraper(post_url)
-
-    # ✅ สร้าง set ของชื่อเพื่อเช็คเร็ว
-    like_names = set(likes)
-    share_names = set(shares)
-
-    # ✅ เก็บใน DB พร้อมอัปเดต status
-    for c in comments:
-        author = c.get("author")
-        if not author:
-            continue
+    return parse_count(value)
 
-        like_status = "liked" if author in like_names else "not_liked"
-        share_status = "shared" if author in share_names else "not_shared"
-
-        FacebookComment.objects.create(
-            post_url=post_url,
-            dashboard=dashboard,
-            author=author,
-            profile_img_url=c.get("profile_img_url"),
-            content=c.get("content"),
-            reaction=c.get("reaction"),
-            timestamp_text=c.get("timestamp_text"),
-            image_url=c.get("image_url"),
-            reply=c.get("reply"),
-            like_status=like_status,
-            share_status=share_status,
-        )
+def activity_counts(comments):
+    """จำนวน liked/unliked/shared ของคอมเมนต์ชุดนี้ใน query เดียว"""
+    return comments.aggregate(
+        liked_count=Count('id', filter=Q(liked=True)),
+        unliked_count=Count('id', filter=Q(liked=False)),
+        shared_count=Count('id', filter=Q(shared=True)),
+    )
+
+def run_activity_pipeline(post_url, dashboard):
+    # ✅ ดึงคอมเมนต์ ไลก์ และแชร์พร้อมกันเป็น 3 tab ใน browser เดียว
+    result = asyncio.run(run_activity_scraper(post_url))
+    comments = result["comments"]
+
+    # ✅ liked/shared ถูก match ด้วย profile id มาแล้ว (fb_activity.match_activity)
+    save_new_comments(dashboard, post_url, [c for c in comments if c.get("author")])
+    attach_screenshot(dashboard, result.get("post_screenshot_path"))
 
 def add_activity_dashboard(request):
     if request.method == "POST":
@@ -272,13 +240,14 @@ def add_activity_dashboard(request):
 
         # ✅ สร้าง dashboard ก่อน
         dashboard = FBCommentDashboard.objects.create(
+            post_id=normalize_url(post_url),
             link_url=post_url,
             dashboard_name=dashboard_name or post_url,
             dashboard_type="activity"
         )
 
         # ✅ เรียกฟังก์ชัน pipeline
-        asyncio.run(run_activity_pipeline(post_url, dashboard))
+        run_activity_pipeline(post_url, dashboard)
 
         return redirect(f"/comment-dashboard/?post_url={post_url}")
 
@@ -333,7 +302,9 @@ def comment_dashboard_view(request):
     if not target_post_url:
         return HttpResponse("❌ ไม่พบ post_url", status=400)
 
-    dashboard = FBCommentDashboard.objects.filter(link_url__icontains=target_post_url).order_by("-created_at").first()
+    # Dashboards and comments store the normalized URL, so an exact (indexed) match is enough
+    target_post_url = normalize_url(target_post_url)
+    dashboard = FBCommentDashboard.objects.filter(post_id=target_post_url).order_by("-created_at").first()
 
     if not dashboard:
         return HttpResponse("❌ ไม่พบ dashboard", status=404)
@@ -428,11 +399,8 @@ def comment_dashboard_view(request):
     }
 
     if dashboard.dashboard_type == "seeding":
-        seeding_comments = [c for c in all_comments if is_seeding(c.author)]
-        organic_comments = [c for c in all_comments if not is_seeding(c.author)]
-
-        seeding_comments = sorted(seeding_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
-        organic_comments = sorted(organic_comments, key=lambda x: clean_reaction(x.reaction), reverse=True)
+        seeding_comments, organic_comments = split_seeding(
+            all_comments.order_by('-reaction_count'), campaign_group=dashboard.campaign_group_id)
 
         context.update({
             "seeding_comments": seeding_comments,
@@ -440,13 +408,14 @@ def comment_dashboard_view(request):
         })
 
     elif dashboard.dashboard_type == "activity":
-        liked_comments = [c for c in all_comments if c.like_status == "ถูกใจแล้ว"]
-        unliked_comments = [c for c in all_comments if c.like_status != "ถูกใจแล้ว"]
+        liked_comments = all_comments.filter(liked=True)
+        unliked_comments = all_comments.filter(liked=False)
 
         context.update({
             "comments": activity_comments,
             "liked_comments": liked_comments,
             "unliked_comments": unliked_comments,
+            **activity_counts(all_comments),
         })
 
     return render(request, "PageInfo/comment_dashboard.html", context)
@@ -461,6 +430,10 @@ def add_comment_url(request):
         if not campaign_group_id:
             return HttpResponse("❌ ไม่พบ campaign_group_id", status=400)
 
+        valid_types = dict(FBCommentDashboard._meta.get_field('dashboard_type').choices)
+        if dashboard_type not in valid_types:
+            return HttpResponse("❌ dashboard_type ไม่ถูกต้อง", status=400)
+
         try:
             campaign_group = CommentCampaignGroup.objects.get(id=campaign_group_id)
         except CommentCampaignGroup.DoesNotExist:
@@ -479,6 +452,7 @@ def add_comment_url(request):
 
         dashboard = FBCommentDashboard.objects.create(
             post_id=normalized_link_url,
+            link_url=link_url,
             dashboard_name=dashboard_name[:255] if dashboard_name else "",
             dashboard_type=dashboard_type,
             campaign_group=campaign_group
@@ -487,51 +461,18 @@ def add_comment_url(request):
         if dashboard_type == "seeding":
             result = asyncio.run(run_seeding_comment_scraper(link_url))
             comments = result.get("comments", [])
-            screenshot_path = result.get("post_screenshot_path")
-
-            for c in comments:
-                FacebookComment.objects.create(
-                    post_url=normalized_link_url,
-                    dashboard=dashboard,
-                    author=c.get("author"),
-                    profile_img_url=c.get("profile_img_url"),
-                    content=c.get("content"),
-                    reaction=c.get("reaction"),
-                    timestamp_text=c.get("timestamp_text"),
-                    image_url=c.get("image_url"),
-                    reply=c.get("reply"),
-                )
-
-            if screenshot_path:
-                abs_path = os.path.join("media", screenshot_path)
-                if os.path.exists(abs_path):
-                    with open(abs_path, "rb") as f:
-                        dashboard.screenshot_path.save(os.path.basename(abs_path), File(f), save=True)
+
+            save_new_comments(dashboard, normalized_link_url, comments)
 
         elif dashboard_type == "activity":
-            result = asyncio.run(run_activity_comment_scraper(link_url))
-            comments = result.get("comments", [])
-            likes = asyncio.run(run_fb_like_scraper(link_url))
-            shares = asyncio.run(run_fb_share_scraper(link_url))
-
-            like_names = set(likes)
-            share_names = set(shares)
-
-            for c in comments:
-                name = c.get("author")
-                FacebookComment.objects.create(
-                    post_url=normalized_link_url,
-                    dashboard=dashboard,
-                    author=name,
-                    profile_img_url=c.get("profile_img_url"),
-                    content=c.get("content"),
-                    reaction=c.get("reaction"),
-                    timestamp_text=c.get("timestamp_text"),
-                    image_url=c.get("image_url"),
-                    reply=c.get("reply"),
-                    like_status="ถูกใจแล้ว" if name in like_names else "ยังไม่ถูกใจ",
-                    share_status="แชร์แล้ว" if name in share_names else "ยังไม่แชร์",
-                )
+            # ✅ คอมเมนต์ ไลก์ และแชร์ดึงพร้อมกันใน browser เดียว
+            result = asyncio.run(run_activity_scraper(link_url))
+            comments = result["comments"]
+
+            save_new_comments(dashboard, normalized_link_url, comments)
+
+        # ✅ รูปโพสต์ถูกบันทึกลง storage ของ field แล้ว (post_screenshots.py) แค่ผูกชื่อไฟล์
+        attach_screenshot(dashboard, result.get("post_screenshot_path"))
 
         # ✅ เปลี่ยน redirect จากใช้ ID → เป็น group_name ตาม urls.py
         return redirect('posts_campaign', group_name=campaign_group.group_name)
@@ -539,6 +480,68 @@ def add_comment_url(request):
     else:
         return redirect('index')
 
+@login_required
+@require_POST
+def refresh_comment_dashboard(request, dashboard_id):
+    """
+    ดึงคอมเมนต์ใหม่ของ dashboard แบบ incremental: เรียงใหม่ล่าสุดก่อนแล้วหยุดเมื่อเจอคอมเมนต์ที่เก็บไว้แล้ว
+    บันทึกเฉพาะคอมเมนต์ที่ยังไม่มี (เทียบ comment_id ของ FB แล้วค่อย fingerprint)
+    """
+    dashboard = get_object_or_404(FBCommentDashboard, id=dashboard_id)
+    link_url = dashboard.link_url or dashboard.post_id
+    post_url = normalize_url(link_url)
+    keys = known_keys(dashboard)
+
+    if dashboard.dashboard_type == "activity":
+        result = asyncio.run(run_activity_scraper(link_url, known_keys=keys))
+        created = save_new_comments(dashboard, post_url, result["comments"])
+        # ✅ คนที่คอมเมนต์ไว้ก่อนแล้วเพิ่งมากดไลก์/แชร์ทีหลัง
+        existing = FacebookComment.objects.filter(dashboard=dashboard)
+        like_ids, _ = people_keys(result["likes"])
+        share_ids, _ = people_keys(result["shares"])
+        existing.filter(liked=False, author_profile_id__in=like_ids).update(liked=True)
+        existing.filter(shared=False, author_profile_id__in=share_ids).update(shared=True)
+        # แถวเก่าที่ไม่มี profile id: เทียบชื่อแทน
+        rows = [{"id": pk, "author": author}
+                for pk, author in existing.filter(author_profile_id='').values_list('id', 'author')]
+        match_activity(rows, result["likes"], result["shares"])
+        existing.filter(id__in=[r["id"] for r in rows if r["liked"]]).update(liked=True)
+        existing.filter(id__in=[r["id"] for r in rows if r["shared"]]).update(shared=True)
+    else:
+        result = asyncio.run(run_seeding_comment_scraper(link_url, known_keys=keys))
+        created = save_new_comments(dashboard, post_url, result.get("comments", []))
+
+    attach_screenshot(dashboard, result.get("post_screenshot_path"))
+    print(f"✅ refresh dashboard {dashboard.id}: +{len(created)} new comments "
+          f"(scraped {len(result.get('comments', []))})")
+    return redirect('comment_dashboard_detail', dashboard_id=dashboard.id)
+
+@login_required
+def search_content(request):
+    query = (request.GET.get("q") or "").strip()
+    result_type = request.GET.get("type") or "facebook"
+
+    searches = {
+        "facebook": search_facebook_posts,
+        "tiktok": search_tiktok_posts,
+        "comments": search_comments,
+    }
+    if result_type not in searches:
+        result_type = "facebook"
+
+    counts = {}
+    results = None
+    if query:
+        counts = {key: fn(query).count() for key, fn in searches.items()}
+        results = paginate(searches[result_type](query), request.GET.get("page"))
+
+    return render(request, "PageInfo/search.html", {
+        "query": query,
+        "result_type": result_type,
+        "counts": counts,
+        "results": results,
+    })
+
 def get_pillar_summary_from_pages(page_ids):
     from django.db import connection
     if not page_ids:
@@ -555,310 +558,103 @@ def get_pillar_summary_from_pages(page_ids):
         return [{'pillar': row[0], 'post_count': row[1]} for row in cursor.fetchall()]
 
 
-def extract_top_hashtags(posts, top_n=50):
-    hashtag_counter = Counter()
-    for post in posts:
-        content = getattr(post, 'post_content', '') or ''
-        hashtags = re.findall(r"#\S+", content)
-        for tag in hashtags:
-            hashtag_counter[tag.lower()] += 1
-    return hashtag_counter.most_common(top_n)
-
-def clean_number(value):
-    if isinstance(value, str):
-        value = value.lower().replace(',', '').replace(' videos', '').replace(' views', '').replace(' subscribers', '').strip()
-        if 'k' in value:
-            return int(float(value.replace('k', '')) * 1_000)
-        elif 'm' in value:
-            return int(float(value.replace('m', '')) * 1_000_000)
-        elif 'b' in value:
-            return int(float(value.replace('b', '')) * 1_000_000_000)
-        try:
-            return int(value)
-        except ValueError:
-            return 0
-    elif isinstance(value, (int, float)):
-        return int(value)
-    else:
-        return 0
+PLATFORM_LABELS = {
+    'facebook': 'Facebook',
+    'tiktok': 'TikTok',
+    'instagram': 'Instagram',
+    'lemon8': 'Lemon8',
+    'youtube': 'YouTube',
+}
 
-async def run_fb_post_video_reel_live_scraper(url, cookie_path, cutoff_dt):
-    posts_scraper = FBPostScraperAsync(cookie_file=cookie_path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
-    videos_scraper = FBVideoScraperAsync(cookie_file=cookie_path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
-    reels_scraper = FBReelScraperAsync(cookie_file=cookie_path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
-    lives_scraper = FBLiveScraperAsync(cookie_file=cookie_path, headless=True, page_url=url, cutoff_dt=cutoff_dt)
 
-    posts = await posts_scraper.run()
-    videos = await videos_scraper.run()
-    reels = await reels_scraper.run()
-    lives = await lives_scraper.run()
+def mirror_new_pages(page_ids):
+    """Mirror the CDN profile pictures of pages just created (no-op when no mirror is configured)."""
+    if not page_ids or not mirror_configured():
+        return
+    try:
+        mirror_model_images(PageInfo, ['profile_pic'], queryset=PageInfo.objects.filter(id__in=page_ids))
+    except Exception as e:
+        # ✅ mirror ไม่สำเร็จก็ไม่ทำให้การเพิ่มเพจล้ม: `manage.py mirror_images --target pages` เก็บตกได้
+        print(f"❌ [mirror] profile_pic of pages {page_ids}: {e}")
 
-    return (posts or []) + (videos or []) + (reels or []) + (lives or [])
 
 @login_required
 def add_page(request, group_id):
     group = PageGroup.objects.get(id=group_id)
+    bulk_form = BulkPageImportForm()
 
     if request.method == 'POST':
         form = PageURLForm(request.POST)
         if form.is_valid():
             url = form.cleaned_data['url']
             platform = form.cleaned_data['platform']
-            allowed_fields = {f.name for f in PageInfo._meta.get_fields()}
+            context = {'form': form, 'bulk_form': bulk_form, 'group': group}
 
-            if platform == 'facebook':
-                fb_data = FBPageInfo(url)
-                if 'page_id' in fb_data:
-                    follower_data = PageFollowers(fb_data['page_id'])
-                    if follower_data:
-                        fb_data.update(follower_data)
+            if platform == 'instagram' and not re.search(r"instagram\.com/([\w\.\-]+)/?", url):
+                form.add_error(None, "❌ URL Instagram ไม่ถูกต้อง")
+                return render(request, 'PageInfo/add_page.html', context)
 
-                filtered_data = {k: v for k, v in fb_data.items() if k in allowed_fields}
-                for key in ['page_likes_count', 'page_followers_count']:
-                    value = filtered_data.get(key)
-                    if isinstance(value, str):
-                        filtered_data[key] = int(value.replace(',', ''))
-                filtered_data['platform'] = 'facebook'
+            # ✅ ดึงข้อมูลโปรไฟล์ก่อน
+            filtered_data = run_sync(fetch_profile_fields(platform, url))
+            if not filtered_data:
+                form.add_error(None, f"❌ ไม่สามารถดึงข้อมูล {PLATFORM_LABELS[platform]} ได้ กรุณาตรวจสอบ URL หรือรอสักครู่")
+                return render(request, 'PageInfo/add_page.html', context)
 
-                # ✅ สร้าง PageInfo ก่อน
-                page_obj = PageInfo.objects.create(page_group=group, **filtered_data)
+            # ✅ สร้าง PageInfo ก่อน
+            page_obj = PageInfo.objects.create(page_group=group, **filtered_data)
+            mirror_new_pages([page_obj.id])
 
+            # ✅ ดึงโพสต์ 30 วันล่าสุด (Facebook / TikTok)
+            if platform in PLATFORMS_WITH_POSTS:
                 try:
-                    cutoff_date = datetime.now() - timedelta(days=30)
-                    cookie_path = os.path.join(settings.BASE_DIR, 'PageInfo', 'cookie.json')
-                    posts = asyncio.run(run_fb_post_video_reel_live_scraper(url, cookie_path, cutoff_date))
-
-                    for post in posts or []:
-                        post_type = post.get("post_type", "post")
-                        post_url = post.get("video_url") if post_type in ["video", "reel", "live"] else post.get(
-                            "post_url")
-                        post_imgs = (post.get("post_imgs") or []) + (
-                            [post.get("video_thumbnail")] if post.get("video_thumbnail") else [])
-
-                        # ✅ Fallback เวลา: ใช้ post_timestamp_dt หรือ post_date
-                        post_timestamp_dt = post.get("post_timestamp_dt") or post.get("post_date")
-                        if post_timestamp_dt and timezone.is_naive(post_timestamp_dt):
-                            post_timestamp_dt = timezone.make_aware(post_timestamp_dt)
-
-                        # ✅ สร้างข้อความเวลา หากไม่มี
-                        post_timestamp_text = post.get("post_timestamp_text")
-                        if not post_timestamp_text and post_timestamp_dt:
-                            try:
-                                post_timestamp_text = post_timestamp_dt.strftime("วัน%Aที่ %-d %B %Y เวลา %H:%M น.")
-                            except:
-                                post_timestamp_text = post_timestamp_dt.strftime("วัน%Aที่ %d %B %Y เวลา %H:%M น.")
-
-                        FacebookPost.objects.update_or_create(
-                            post_id=post["post_id"],
-                            defaults={
-                                'page': page_obj,
-                                'post_url': post_url,
-                                'post_type': post_type,
-                                'post_timestamp_dt': post_timestamp_dt,
-                                'post_timestamp_text': post_timestamp_text or "",
-                                'post_content': post.get('post_content', ""),
-                                'post_imgs': post_imgs,
-                                'reactions': post.get('reactions', {}),
-                                'comment_count': post.get('comment_count', 0),
-                                'share_count': post.get('share_count', 0),
-                                'watch_count': post.get('watch_count'),
-                            }
-                        )
+                    posts = run_sync(scrape_posts(platform, url))
+                    saved = save_posts(page_obj, platform, posts)
+                    print(f"✅ บันทึกข้อมูล {saved} โพสต์ {PLATFORM_LABELS[platform]} สำเร็จ")
                 except Exception as e:
-                    print("❌ Error fetching posts:", e)
-
-            elif platform == 'tiktok':
-                # ✅ ดึงข้อมูลโปรไฟล์ก่อน
-                tiktok_data = get_tiktok_info(url)
-                if not tiktok_data:
-                    form.add_error(None, "❌ ไม่สามารถดึงข้อมูล TikTok ได้ กรุณาตรวจสอบ URL หรือรอสักครู่")
-                    return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
-
-                # ✅ สร้าง PageInfo สำหรับ TikTok
-                filtered_data = {
-                    'page_username': tiktok_data.get('username'),
-                    'page_name': tiktok_data.get('nickname'),
-                    'page_followers': tiktok_data.get('followers', 0),
-                    'page_likes': tiktok_data.get('likes', 0),
-                    'following_count': tiktok_data.get('following', 0),
-                    'page_videos_count': tiktok_data.get('video_count', 0),
-                    'page_description': tiktok_data.get('bio'),
-                    'profile_pic': tiktok_data.get('profile_pic'),
-                    'page_url': tiktok_data.get('url'),
-                    'verified': tiktok_data.get('verified', False),
-                    'platform': 'tiktok'
-                }
+                    # ✅ ถึงแม้จะ error ก็ยังคง PageInfo ไว้
+                    print(f"❌ Error fetching {PLATFORM_LABELS[platform]} posts: {e}")
 
-                # ✅ กรองเฉพาะ field ที่มีใน model
-                filtered_data = {k: v for k, v in filtered_data.items() if k in allowed_fields}
+            return redirect('group_detail', group_id=group.id)
 
-                # ✅ สร้าง PageInfo ก่อน
-                page_obj = PageInfo.objects.create(page_group=group, **filtered_data)
-                print(f"✅ สร้าง PageInfo สำหรับ TikTok สำเร็จ: {page_obj.page_username}")
+    else:
+        form = PageURLForm()
 
-                # ✅ ดึงข้อมูลโพสต์ TikTok
-                try:
-                    from .tiktok_post import scrape_tiktok_posts_for_django, filter_recent_posts
-
-                    # กำหนดพาธไฟล์ cookies ที่บันทึกไว้
-                    cookie_path = os.path.join(settings.BASE_DIR, 'PageInfo', 'tiktok_cookies.json')
-
-                    # เรียก scraper และรับผลลัพธ์เป็น dict
-                    scrape_result = scrape_tiktok_posts_for_django(
-                        profile_url=url,
-                        cookies_file=cookie_path,
-                        max_posts=None,
-                        headless=True,
-                        scroll_rounds=50,
-                        timeout=30000
-                    )
-
-                    # ตรวจสอบว่าการดึงข้อมูลสำเร็จหรือไม่
-                    if not scrape_result.get('success'):
-                        print(f"❌ Error fetching TikTok posts: {scrape_result.get('message')}")
-                        # ถึงแม้จะ error ก็ยังคง PageInfo ไว้
-                        pass
-                    else:
-                        posts_data = scrape_result.get('data', [])
-                        # หากต้องการกรองเฉพาะโพสต์ช่วง 30 วันที่ผ่านมา สามารถใช้ filter_recent_posts
-                        posts_data = filter_recent_posts(posts_data, days=30)
-                        print(f"📋 ดึงข้อมูล {len(posts_data)} โพสต์จาก TikTok")
-
-                        for post in posts_data:
-                            # ✅ แปลงวันที่จาก timestamp_unix หรือ string เป็น datetime object
-                            post_timestamp_dt = None
-                            post_timestamp_text = post.get('timestamp', '')
-                            # ใช้ timestamp_unix ถ้ามี
-                            ts_unix = post.get('timestamp_unix')
-                            if ts_unix:
-                                try:
-                                    # แปลง unix timestamp เป็น datetime (UTC) แล้วแปลงเป็นเขตเวลาปัจจุบัน
-                                    dt_utc = datetime.fromtimestamp(int(ts_unix), tz=timezone.utc)
-                                    post_timestamp_dt = dt_utc.astimezone(timezone.get_default_timezone())
-                                except Exception as e:
-                                    print(f"⚠️ ไม่สามารถแปลง timestamp_unix '{ts_unix}': {e}")
-                                    post_timestamp_dt = None
-                            # หากไม่มี timestamp_unix ลอง parse จาก string 'dd/mm/YYYY'
-                            if post_timestamp_dt is None and post_timestamp_text and post_timestamp_text != 'ไม่พบวันที่':
-                                try:
-                                    dt = datetime.strptime(post_timestamp_text, '%d/%m/%Y')
-                                    if timezone.is_naive(dt):
-                                        post_timestamp_dt = timezone.make_aware(dt)
-                                    else:
-                                        post_timestamp_dt = dt
-                                except ValueError as e:
-                                    print(f"⚠️ ไม่สามารถแปลงวันที่ '{post_timestamp_text}': {e}")
-                                    post_timestamp_dt = None
-
-                            # ✅ สร้างหรืออัปเดต TikTokPost (ตัดทอนค่า URL ไม่เกิน max_length)
-                            TikTokPost.objects.update_or_create(
-                                post_url=(post.get('post_url') or '')[:500],
-                                defaults={
-                                    'page': page_obj,
-                                    'post_content': post.get('post_content', ''),
-                                    'post_imgs': (post.get('post_thumbnail') or '')[:500],
-                                    'post_timestamp': post_timestamp_text,
-                                    'post_timestamp_dt': post_timestamp_dt,
-                                    'like_count': post.get('reaction', 0),
-                                    'comment_count': post.get('comment', 0),
-                                    'share_count': post.get('shared', 0),
-                                    'save_count': post.get('saved', 0),
-                                    'view_count': post.get('views', 0),
-                                    'platform': 'tiktok'
-                                }
-                            )
-
-                        print(f"✅ บันทึกข้อมูล {len(posts_data)} โพสต์ TikTok สำเร็จ")
+    return render(request, 'PageInfo/add_page.html', {'form': form, 'bulk_form': bulk_form, 'group': group})
 
-                except Exception as e:
-                    print(f"❌ Error fetching TikTok posts: {e}")
-                    # ✅ ถึงแม้จะ error ก็ยังคง PageInfo ไว้
-                    pass
 
-            elif platform == 'instagram':
-                match = re.search(r"instagram\.com/([\w\.\-]+)/?", url)
-                if match:
-                    username = match.group(1)
-                    ig_data = get_instagram_info(username)
-                    if ig_data:
-                        filtered_data = {
-                            'page_username': ig_data.get('username'),
-                            'page_name': ig_data.get('username'),
-                            'page_followers': ig_data.get('followers_count'),
-                            'page_website': ig_data.get('website'),
-                            'page_category': ig_data.get('category'),
-                            'post_count': ig_data.get('post_count'),
-                            'page_description': ig_data.get('bio'),
-                            'profile_pic': ig_data.get('profile_pic'),
-                            'page_url': ig_data.get('url'),
-                            'platform': 'instagram'
-                        }
-                        filtered_data = {k: v for k, v in filtered_data.items() if k in allowed_fields}
-                        PageInfo.objects.create(page_group=group, **filtered_data)
-                    else:
-                        form.add_error(None, "❌ ไม่สามารถดึงข้อมูล Instagram ได้ กรุณาตรวจสอบ URL หรือรอสักครู่")
-                        return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
-                else:
-                    form.add_error(None, "❌ URL Instagram ไม่ถูกต้อง")
-                    return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
-
-            elif platform == 'lemon8':
-                lm8_data = get_lemon8_info(url)
-                if lm8_data:
-                    allowed_fields = {f.name for f in PageInfo._meta.get_fields()}
-                    filtered_data = {
-                        'page_username': lm8_data.get('username'),
-                        'page_name': lm8_data.get('username'),
-                        'page_followers': lm8_data.get('followers_count'),
-                        'page_likes': lm8_data.get('likes_count'),
-                        'following_count': lm8_data.get('following_count'),
-                        'age': lm8_data.get('age'),
-                        'page_description': lm8_data.get('bio'),
-                        'page_website': lm8_data.get('website'),
-                        'profile_pic': lm8_data.get('profile_pic'),
-                        'page_url': lm8_data.get('url'),
-                        'platform': 'lemon8'
-                    }
-                    filtered_data = {k: v for k, v in filtered_data.items() if k in allowed_fields}
-                    PageInfo.objects.create(page_group=group, **filtered_data)
-                else:
-                    form.add_error(None, "❌ ไม่สามารถดึงข้อมูล Lemon8 ได้ กรุณาตรวจสอบ URL หรือรอสักครู่")
-                    return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
-
-            elif platform == 'youtube':
-                from .yt_page_info import get_youtube_info
-                yt_data = get_youtube_info(url)
-                if yt_data:
-                    allowed_fields = {f.name for f in PageInfo._meta.get_fields()}
-                    yt_data['subscribers_count'] = clean_number(yt_data.get('subscribers_count'))
-                    yt_data['videos_count'] = clean_number(yt_data.get('videos_count'))
-                    yt_data['total_views'] = clean_number(yt_data.get('total_views'))
-                    filtered_data = {
-                        'page_username': yt_data.get('username'),
-                        'page_name': yt_data.get('page_name'),
-                        'page_followers': yt_data.get('subscribers_count'),
-                        'profile_pic': yt_data.get('profile_pic'),
-                        'page_url': yt_data.get('page_url'),
-                        'page_description': yt_data.get('bio'),
-                        'page_address': yt_data.get('country'),
-                        'page_join_date': yt_data.get('join_date'),
-                        'page_videos_count': yt_data.get('videos_count'),
-                        'page_total_views': yt_data.get('total_views'),
-                        'page_website': yt_data.get('page_website'),
-                        'platform': 'youtube'
-                    }
-                    filtered_data = {k: v for k, v in filtered_data.items() if k in allowed_fields}
-                    PageInfo.objects.create(page_group=group, **filtered_data)
-                else:
-                    form.add_error(None, "❌ ไม่สามารถดึงข้อมูล YouTube ได้ กรุณาตรวจสอบ URL หรือรอสักครู่")
-                    return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
+@login_required
+def bulk_add_pages(request, group_id):
+    group = get_object_or_404(PageGroup, id=group_id)
 
-            return redirect('group_detail', group_id=group.id)
+    if request.method != 'POST':
+        return redirect('add_page', group_id=group.id)
 
-    else:
-        form = PageURLForm()
+    bulk_form = BulkPageImportForm(request.POST, request.FILES)
+    if not bulk_form.is_valid():
+        return render(request, 'PageInfo/add_page.html', {
+            'form': PageURLForm(), 'bulk_form': bulk_form, 'group': group,
+        })
 
-    return render(request, 'PageInfo/add_page.html', {'form': form, 'group': group})
+    def report(result):
+        icon = '✅' if result.ok else '❌'
+        print(f"{icon} [{result.platform or '?'}] {result.url} -> {result.status} "
+              f"({result.elapsed:.1f}s) {result.message}")
+
+    # ✅ ใน request สร้างแค่ PageInfo (HTTP ล้วน) ไม่เปิด browser ดึงโพสต์ ไม่งั้นเกิน timeout ของ gunicorn/proxy
+    # โพสต์ของเพจใหม่ให้ refresh_posts ดึง: state ใหม่ยังไม่เคย scrape จึงถึงคิวทันทีในรอบถัดไป
+    results = import_pages(group, bulk_form.cleaned_data['url_list'], scrape_posts_too=False, on_result=report)
+    created_ids = [result.page_id for result in results if result.status == 'created']
+    if created_ids:
+        sync_states(PageInfo.objects.filter(id__in=created_ids))
+        mirror_new_pages(created_ids)
+    summary = Counter(result.status for result in results)
+
+    return render(request, 'PageInfo/bulk_import_result.html', {
+        'group': group,
+        'results': results,
+        'summary': dict(summary),
+        'created_count': summary.get('created', 0),
+    })
 
 
 
@@ -876,15 +672,69 @@ def create_group(request):
     # ส่งฟอร์มไปยัง template
     return render(request, 'PageInfo/index.html', {'form': form})
 
+def _unified_facebook_post(f_post):
+    """FacebookPost -> dict schema เดียวกับ TikTok สำหรับ group_detail"""
+    reactions = f_post.reactions or {}
+    if isinstance(reactions, str):
+        try:
+            reactions = json.loads(reactions)
+        except json.JSONDecodeError:
+            reactions = {}
+    return {
+        'platform': 'facebook',
+        'post_id': f_post.post_id,
+        'post_url': None,
+        'post_content': f_post.post_content,
+        'post_imgs': f_post.post_imgs or [],
+        'post_timestamp_dt': f_post.post_timestamp_dt,
+        'post_timestamp_str': f_post.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if f_post.post_timestamp_dt else '',
+        'like_count': reactions.get('ถูกใจ', 0),
+        'comment_count': f_post.comment_count or 0,
+        'share_count': f_post.share_count or 0,
+        'save_count': 0,
+        'view_count': 0,
+        'reactions': reactions,
+        'total_engagement': f_post.total_engagement,
+        'engagement_rate': f_post.engagement_rate,
+        'page_name': f_post.page.page_name if f_post.page else '',
+        'profile_pic': f_post.page.profile_pic if f_post.page else '',
+        'content_pillar': f_post.content_pillar or '',
+    }
+
+
+def _unified_tiktok_post(t_post):
+    """TikTokPost -> dict schema เดียวกับ Facebook สำหรับ group_detail"""
+    return {
+        'platform': 'tiktok',
+        'post_id': None,
+        'post_url': t_post.post_url,
+        'post_content': t_post.post_content,
+        'post_imgs': [t_post.post_imgs] if t_post.post_imgs else [],
+        'post_timestamp_dt': t_post.post_timestamp_dt,
+        'post_timestamp_str': t_post.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if t_post.post_timestamp_dt else (t_post.post_timestamp or ''),
+        'like_count': t_post.like_count or 0,
+        'comment_count': t_post.comment_count or 0,
+        'share_count': t_post.share_count or 0,
+        'save_count': t_post.save_count or 0,
+        'view_count': t_post.view_count or 0,
+        'reactions': None,
+        'total_engagement': t_post.total_engagement,
+        'engagement_rate': t_post.engagement_rate,
+        'page_name': t_post.page.page_name if t_post.page else '',
+        'profile_pic': t_post.page.profile_pic if t_post.page else '',
+        'content_pillar': '',
+    }
+
+
 @login_required
 def group_detail(request, group_id):
     group = get_object_or_404(PageGroup, id=group_id)
     pages = group.pages.all().order_by('-page_followers_count')
     # ดึงโพสต์ Facebook ทั้งหมดของเพจในกลุ่ม
-    posts = FacebookPost.objects.filter(page__in=pages)
+    posts = FacebookPost.objects.filter(page__in=pages).select_related('page')
 
     # ดึงโพสต์ TikTok ของเพจในกลุ่ม (ถ้ามี) เพื่อแสดงในหน้า group_detail
-    tiktok_posts = TikTokPost.objects.filter(page__in=pages).order_by('-post_timestamp_dt')
+    tiktok_posts = TikTokPost.objects.filter(page__in=pages).select_related('page').order_by('-post_timestamp_dt')
     # 👇 Ensure TikTok posts have a datetime for timestamp
     # Some TikTok posts may only have a date string (e.g. "dd/mm/YYYY"), so parse it into a datetime
     from datetime import datetime
@@ -909,74 +759,28 @@ def group_detail(request, group_id):
 
     # 🔟 Top 10 Posts across all platforms by engagement
     # Build a unified list of posts combining Facebook and TikTok with a consistent schema
-    unified_posts = []
-    # Handle Facebook posts
-    for f_post in posts:
-        # Compute total engagement for facebook as likes + comments + shares
-        likes_count = 0
-        if isinstance(f_post.reactions, dict):
-            likes_count = f_post.reactions.get('ถูกใจ', 0)
-        total_eng_f = likes_count + (f_post.comment_count or 0) + (f_post.share_count or 0)
-        unified_posts.append({
-            'platform': 'facebook',
-            'post_id': f_post.post_id,
-            'post_url': None,
-            'post_content': f_post.post_content,
-            'post_imgs': f_post.post_imgs or [],
-            'post_timestamp_dt': f_post.post_timestamp_dt,
-            'post_timestamp_str': f_post.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if f_post.post_timestamp_dt else '',
-            'like_count': likes_count,
-            'comment_count': f_post.comment_count or 0,
-            'share_count': f_post.share_count or 0,
-            'save_count': 0,
-            'view_count': 0,
-            'reactions': f_post.reactions or {},
-            'total_engagement': total_eng_f,
-            'page_name': f_post.page.page_name if f_post.page else '',
-            'profile_pic': f_post.page.profile_pic if f_post.page else '',
-            'content_pillar': f_post.content_pillar or '',
-        })
-    # Handle TikTok posts
-    for t_post in tiktok_posts:
-        total_eng_t = (t_post.like_count or 0) + (t_post.comment_count or 0) + (t_post.share_count or 0) + (t_post.save_count or 0)
-        unified_posts.append({
-            'platform': 'tiktok',
-            'post_id': None,
-            'post_url': t_post.post_url,
-            'post_content': t_post.post_content,
-            'post_imgs': [t_post.post_imgs] if t_post.post_imgs else [],
-            'post_timestamp_dt': t_post.post_timestamp_dt,
-            'post_timestamp_str': t_post.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if t_post.post_timestamp_dt else (t_post.post_timestamp or ''),
-            'like_count': t_post.like_count or 0,
-            'comment_count': t_post.comment_count or 0,
-            'share_count': t_post.share_count or 0,
-            'save_count': t_post.save_count or 0,
-            'view_count': t_post.view_count or 0,
-            'reactions': None,
-            'total_engagement': total_eng_t,
-            'page_name': t_post.page.page_name if t_post.page else '',
-            'profile_pic': t_post.page.profile_pic if t_post.page else '',
-            'content_pillar': '',
-        })
-    # Sort unified posts by total engagement descending and then by view_count for tiktok as secondary
+    unified_posts = [_unified_facebook_post(f_post) for f_post in posts]
+    unified_posts += [_unified_tiktok_post(t_post) for t_post in tiktok_posts]
+
+    # ✅ Top 10 จากคอลัมน์ total_engagement ที่เก็บไว้ (ORDER BY ใน DB) แล้วรวมสองแพลตฟอร์ม
+    top_candidates = [
+        _unified_facebook_post(f_post)
+        for f_post in posts.select_related('page').order_by('-total_engagement', '-id')[:10]
+    ] + [
+        _unified_tiktok_post(t_post)
+        for t_post in TikTokPost.objects.filter(page__in=pages).select_related('page')
+        .order_by('-total_engagement', F('view_count').desc(nulls_last=True), '-id')[:10]
+    ]
     unified_sorted = sorted(
-        unified_posts,
+        top_candidates,
         key=lambda p: (p['total_engagement'], p.get('view_count', 0)),
         reverse=True
     )[:10]
 
     unified_top_posts = []
     for p in unified_sorted:
-        # Compute engagement rate: use total_engagement divided by view_count (if available) or followers? Use simple ratio: total_engagement / 100 as placeholder
-        engagement_rate = 0.0
-        if p['platform'] == 'tiktok':
-            # avoid division by zero
-            if p['view_count']:
-                engagement_rate = round((p['total_engagement'] / p['view_count']) * 100, 2)
-            else:
-                engagement_rate = 0.0
-        else:
-            engagement_rate = round((p['total_engagement'] / 100), 1)
+        # engagement_rate เก็บไว้ตอน ingest (% ของผู้ติดตาม, TikTok ใช้ view ถ้าไม่รู้ผู้ติดตาม)
+        engagement_rate = round(p['engagement_rate'], 2) if p['engagement_rate'] is not None else 0.0
         unified_top_posts.append({
             'platform': p['platform'],
             'post_id': p['post_id'],
@@ -1004,12 +808,10 @@ def group_detail(request, group_id):
     # จัดลำดับโพสต์ TikTok ตามจำนวนผู้ชม (view_count)
     top10_tiktok_posts_data = []
     if tiktok_posts:
-        # หาผลรวม top 10 ตาม view_count หรือ like_count หากไม่มี view_count ให้ใช้ 0
-        top10_tiktok_posts = sorted(
-            tiktok_posts,
-            key=lambda p: (p.view_count or 0),
-            reverse=True
-        )[:10]
+        top10_tiktok_posts = (
+            TikTokPost.objects.filter(page__in=pages).select_related('page')
+            .order_by(F('view_count').desc(nulls_last=True), '-id')[:10]
+        )
 
         for t_post in top10_tiktok_posts:
             top10_tiktok_posts_data.append({
@@ -1032,28 +834,12 @@ def group_detail(request, group_id):
 
     # 📊 Followers Chart & Interaction Pie Chart
     chart_data = []
-    # Calculate total interactions by summing total engagement for Facebook and TikTok posts separately
+    # Calculate total interactions per page from the stored total_engagement column (GROUP BY in SQL)
     interaction_totals = defaultdict(int)
-    # Facebook posts
-    for f_post in posts:
-        if not f_post.page:
-            continue
-        # Sum up like_count from reactions and comments/shares
-        reactions = f_post.reactions or {}
-        if isinstance(reactions, str):
-            try:
-                reactions = json.loads(reactions)
-            except json.JSONDecodeError:
-                reactions = {}
-        like_count = reactions.get('ถูกใจ', 0)
-        total_eng = like_count + (f_post.comment_count or 0) + (f_post.share_count or 0)
-        interaction_totals[str(f_post.page.id)] += total_eng
-    # TikTok posts
-    for t_post in tiktok_posts:
-        if not t_post.page:
-            continue
-        total_eng = (t_post.like_count or 0) + (t_post.comment_count or 0) + (t_post.share_count or 0) + (t_post.save_count or 0)
-        interaction_totals[str(t_post.page.id)] += total_eng
+    for model in (FacebookPost, TikTokPost):
+        rows = model.objects.filter(page__in=pages).values('page_id').annotate(total=Sum('total_engagement'))
+        for row in rows:
+            interaction_totals[str(row['page_id'])] += row['total'] or 0
     total_interactions = sum(interaction_totals.values())
     interaction_data = []
     for i, page in enumerate(pages):
@@ -1072,7 +858,7 @@ def group_detail(request, group_id):
             'id': page.id,
             'name': page.page_name or page.page_username or 'Unnamed',
             'followers': follower_count,
-            'profile_pic': page.profile_pic or '',
+            'profile_pic': thumb_url(page.profile_pic or '', 'avatar'),
             'platform': page.platform or 'facebook',
             'color': colors[i % len(colors)]
         })
@@ -1093,7 +879,6 @@ def group_detail(request, group_id):
             except json.JSONDecodeError:
                 reactions = {}
         like_count = reactions.get('ถูกใจ', 0)
-        total_eng = like_count + (f_post.comment_count or 0) + (f_post.share_count or 0)
         post_entry = {
             'platform': 'facebook',
             'post_id': f_post.post_id,
@@ -1107,7 +892,7 @@ def group_detail(request, group_id):
             'like_count': like_count,
             'save_count': 0,
             'view_count': 0,
-            'total_engagement': total_eng,
+            'total_engagement': f_post.total_engagement,
             # duplicate page info at top level for convenience
             'profile_pic': f_post.page.profile_pic,
             'page_name': f_post.page.page_name,
@@ -1143,7 +928,7 @@ def group_detail(request, group_id):
             'like_count': t_post.like_count or 0,
             'save_count': t_post.save_count or 0,
             'view_count': t_post.view_count or 0,
-            'total_engagement': (t_post.like_count or 0) + (t_post.comment_count or 0) + (t_post.share_count or 0) + (t_post.save_count or 0),
+            'total_engagement': t_post.total_engagement,
             # duplicate page info at top level
             'profile_pic': t_post.page.profile_pic,
             'page_name': t_post.page.page_name,
@@ -1245,6 +1030,12 @@ def group_detail(request, group_id):
         '-post_count') if posts else []
     posts_by_pillar = [{"pillar": post.content_pillar, "post": post} for post in posts]
 
+    # ✅ Top hashtags ของทั้งกลุ่ม (ทุกเพจ ทุกแพลตฟอร์ม) จากตาราง PostHashtag ใน query เดียว
+    group_top_hashtags = [
+        {'tag': tag, 'count': count}
+        for tag, count in top_hashtags_for(page_ids=[p.id for p in pages], limit=20)
+    ]
+
     return render(request, 'PageInfo/group_detail.html', {
         'group': group,
         'pages': pages,
@@ -1254,9 +1045,10 @@ def group_detail(request, group_id):
         'bar_day_values': json.dumps(bar_day_values),
         'bar_day_colors': json.dumps(bar_day_colors),
         'bubble_data': json.dumps(bubble_data),
-        'posts_grouped_json': json.dumps(posts_grouped_by_time),
-        'posts_by_day_json': json.dumps(posts_grouped_by_day),
-        'followers_posts_map': json.dumps(followers_posts_map),
+        # ✅ popup แสดงรูปย่อจาก cache ในเครื่อง ไม่ดึงรูปเต็มจาก CDN
+        'posts_grouped_json': json.dumps(thumbnail_posts(posts_grouped_by_time)),
+        'posts_by_day_json': json.dumps(thumbnail_posts(posts_grouped_by_day)),
+        'followers_posts_map': json.dumps(thumbnail_posts(followers_posts_map)),
         # unified top posts across platforms for display
         'unified_top_posts': unified_top_posts,
         # separate lists for backward compatibility
@@ -1264,6 +1056,7 @@ def group_detail(request, group_id):
         'tiktok_posts_top10': top10_tiktok_posts_data,
         "pillar_summary": pillar_summary,
         'posts_by_pillar': posts_by_pillar,
+        'group_top_hashtags': group_top_hashtags,
         'sidebar': sidebar,
         # include JSON for pillar summary and top posts for export functions
         'pillar_summary_json': json.dumps(list(pillar_summary.values('content_pillar', 'post_count')) if pillar_summary else []),
@@ -1321,6 +1114,177 @@ def sidebar_context(request):
     }
 
 
+def _tiktok_post_row(p):
+    """แปลง TikTokPost เป็น dict สำหรับตาราง/Top/Flop ใน pageview"""
+    timestamp_text = p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if p.post_timestamp_dt else (p.post_timestamp or '')
+    # อัตราปฏิสัมพันธ์: engagement_rate ที่เก็บไว้ตอน ingest (% ผู้ติดตาม หรือ % view)
+    interaction_rate = f"{p.engagement_rate:.2f}%" if p.engagement_rate is not None else '-'
+    return {
+        'post_url': p.post_url,
+        'post_content': p.post_content or '',
+        'post_imgs': [p.post_imgs] if p.post_imgs else [],
+        'post_timestamp': timestamp_text,
+        'post_timestamp_dt': p.post_timestamp_dt,
+        'view_count': p.view_count or 0,
+        'like_count': p.like_count or 0,
+        'comment_count': p.comment_count or 0,
+        'share_count': p.share_count or 0,
+        'save_count': p.save_count or 0,
+        'page_name': p.page.page_name if p.page else '',
+        'profile_pic': p.page.profile_pic if p.page else '',
+        'total_engagement': p.total_engagement,
+        'interaction_rate': interaction_rate,
+    }
+
+
+def _facebook_post_row(post):
+    """เติมค่าที่ใช้แสดงผลในตารางโพสต์ Facebook (like_count, interaction_rate, ...)"""
+    reactions = post.reactions or {}
+    if isinstance(reactions, str):
+        try:
+            reactions = json.loads(reactions)
+        except json.JSONDecodeError:
+            reactions = {}
+    post.reactions = reactions
+    post.like_count = reactions.get("ถูกใจ", 0)
+    post.comment_count = post.comment_count or 0
+    post.share_count = post.share_count or 0
+
+    post.reach = getattr(post, 'reach_per_post', None)
+    post.impressions = getattr(post, 'impressions', None)
+
+    if post.reach and isinstance(post.reach, (int, float)) and post.reach > 0:
+        post.interaction_rate = f"{post.total_engagement / post.reach:.4%}"
+    elif post.engagement_rate is not None:
+        post.interaction_rate = f"{post.engagement_rate:.2f}%"
+    else:
+        post.interaction_rate = "0%"
+    if not post.reach:
+        post.reach = "-"
+
+    if post.impressions and isinstance(post.impressions, (int, float)) and post.impressions > 0:
+        post.impression_per_view = f"{post.total_engagement / post.impressions:.4f}"
+    else:
+        post.impression_per_view = "-"
+
+    post.negative_sentiment_share = "0%"
+    return post
+
+
+SCATTER_DAYS = 90  # scatter ของ pageview: โพสต์ในช่วงนี้นับย้อนจากโพสต์ล่าสุด
+SCATTER_MAX_POINTS = 1000
+BUCKET_POSTS_LIMIT = 100  # โพสต์สูงสุดต่อ popup ของ bar chart / bubble chart
+
+
+def _posting_time(posts_qs):
+    """Dated posts annotated with ``iso_weekday`` (1=Monday) and ``hour`` (UTC, as the charts always used)."""
+    return posts_qs.filter(post_timestamp_dt__isnull=False).annotate(
+        iso_weekday=ExtractIsoWeekDay('post_timestamp_dt', tzinfo=dt_timezone.utc),
+        hour=ExtractHour('post_timestamp_dt', tzinfo=dt_timezone.utc),
+    )
+
+
+def _post_time_buckets(posts_qs, **sums):
+    """
+    ``{(weekday 0=Monday, 2-hour slot): {'count': n, <name>: total}}`` with the
+    ``sums`` expressions added up in SQL (one row per weekday and hour, not per post).
+    """
+    rows = (
+        _posting_time(posts_qs).order_by().values('iso_weekday', 'hour')
+        .annotate(count=Count('id'), **{name: Sum(expr) for name, expr in sums.items()})
+    )
+    buckets = {}
+    for row in rows:
+        bucket = buckets.setdefault((row['iso_weekday'] - 1, row['hour'] // 2 * 2), dict.fromkeys(['count', *sums], 0))
+        for name in bucket:
+            bucket[name] += round(row[name] or 0)
+    return buckets
+
+
+def _scatter_posts(posts_qs):
+    """Newest dated posts for the engagement scatter: ``SCATTER_DAYS`` back from the newest, at most ``SCATTER_MAX_POINTS``."""
+    dated = posts_qs.filter(post_timestamp_dt__isnull=False)
+    newest = dated.aggregate(newest=Max('post_timestamp_dt'))['newest']
+    if newest is None:
+        return []
+    return list(
+        dated.filter(post_timestamp_dt__gte=newest - timedelta(days=SCATTER_DAYS))
+        .order_by('-post_timestamp_dt', '-id')[:SCATTER_MAX_POINTS]
+    )
+
+
+def _tiktok_popup_post(p):
+    return {
+        "platform": "tiktok",
+        "post_url": p.post_url,
+        "post_imgs": [p.post_imgs] if p.post_imgs else [],
+        "post_content": p.post_content or '',
+        "post_timestamp": p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M'),
+        # Always include page details for popup rendering
+        "profile_pic": p.page.profile_pic if p.page else '',
+        "page_name": p.page.page_name if p.page else '',
+        "like_count": p.like_count or 0,
+        "comment_count": p.comment_count or 0,
+        "share_count": p.share_count or 0,
+        "save_count": p.save_count or 0,
+        "view_count": p.view_count or 0,
+        "total_engagement": p.total_engagement,
+    }
+
+
+def _facebook_popup_post(post):
+    reactions = post.reactions or {}
+    if isinstance(reactions, str):
+        try:
+            reactions = json.loads(reactions)
+        except json.JSONDecodeError:
+            reactions = {}
+    return {
+        "post_id": post.post_id,
+        "post_url": post.post_url or f"https://www.facebook.com/{post.post_id}",
+        "post_imgs": post.post_imgs,
+        "post_content": post.post_content,
+        "post_timestamp": post.post_timestamp_text,
+        # Always include page details for popup rendering
+        "profile_pic": post.page.profile_pic if post.page else '',
+        "page_name": post.page.page_name if post.page else '',
+        "platform": "facebook",
+        "comment_count": post.comment_count or 0,
+        "share_count": post.share_count or 0,
+        "total_engagement": post.total_engagement,
+        "reactions": reactions,
+    }
+
+
+@login_required
+def pageview_bucket_posts(request, page_id):
+    """
+    โพสต์ของแท่งใน Posts by Day (?day=0-6) หรือช่องใน Best Times (?day=&slot=0,2,..22)
+    ของ pageview: popup โหลดทีละช่องตอนคลิก แทนการฝังโพสต์ทั้งประวัติไว้ใน HTML
+    """
+    page = get_object_or_404(PageInfo, id=page_id)
+    try:
+        weekday = int(request.GET.get("day", ""))
+        slot = int(request.GET["slot"]) if request.GET.get("slot") else None
+    except ValueError:
+        return HttpResponse("❌ day / slot ไม่ถูกต้อง", status=400)
+    if weekday not in range(7) or (slot is not None and slot not in range(0, 24, 2)):
+        return HttpResponse("❌ day / slot ไม่ถูกต้อง", status=400)
+
+    if page.platform == "tiktok":
+        posts_qs, to_popup = TikTokPost.objects.filter(page=page), _tiktok_popup_post
+    elif page.platform == "facebook":
+        posts_qs, to_popup = FacebookPost.objects.filter(page=page), _facebook_popup_post
+    else:
+        return JsonResponse({"posts": [], "limit": BUCKET_POSTS_LIMIT})
+
+    posts_qs = _posting_time(posts_qs.select_related('page')).filter(iso_weekday=weekday + 1)
+    if slot is not None:
+        posts_qs = posts_qs.filter(hour__in=[slot, slot + 1])
+    posts = [to_popup(p) for p in posts_qs.order_by('-post_timestamp_dt', '-id')[:BUCKET_POSTS_LIMIT]]
+    return JsonResponse({"posts": thumbnail_posts({"posts": posts})["posts"], "limit": BUCKET_POSTS_LIMIT})
+
+
 @login_required
 def pageview(request, page_id):
     page = get_object_or_404(PageInfo, id=page_id)
@@ -1333,148 +1297,56 @@ def pageview(request, page_id):
 
     # หากเป็นเพจ TikTok ให้เตรียมข้อมูลและ return ทันที
     if page.platform == "tiktok":
-        # 📲 ดึงโพสต์ TikTok ทั้งหมดของเพจนี้
-        tiktok_posts_qs = TikTokPost.objects.filter(page=page).order_by('-post_timestamp_dt')
-        # แปลง queryset เป็น list ของ dict เพื่อใช้ใน template
-        tiktok_posts_data = []
-        for p in tiktok_posts_qs:
-            # เตรียมข้อมูล timestamp และ interaction สำหรับตารางและกราฟ
-            timestamp_text = p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M') if p.post_timestamp_dt else (p.post_timestamp or '')
-            total_engagement = (p.like_count or 0) + (p.comment_count or 0) + (p.share_count or 0) + (p.save_count or 0)
-            # อัตราปฏิสัมพันธ์: ใช้ engagement ต่อจำนวน view หากมี view
-            if p.view_count and p.view_count > 0:
-                interaction_rate = f"{(total_engagement / p.view_count):.2%}"
-            else:
-                interaction_rate = '-'
-            tiktok_posts_data.append({
-                'post_url': p.post_url,
-                'post_content': p.post_content or '',
-                'post_imgs': [p.post_imgs] if p.post_imgs else [],
-                'post_timestamp': timestamp_text,
-                'post_timestamp_dt': p.post_timestamp_dt,
-                'view_count': p.view_count or 0,
-                'like_count': p.like_count or 0,
-                'comment_count': p.comment_count or 0,
-                'share_count': p.share_count or 0,
-                'save_count': p.save_count or 0,
-                'page_name': p.page.page_name if p.page else '',
-                'profile_pic': p.page.profile_pic if p.page else '',
-                'total_engagement': total_engagement,
-                'interaction_rate': interaction_rate,
-            })
-
-        # จัดลำดับโพสต์สำหรับ Top 10 และ Flop 10 ตาม view_count
-        tiktok_posts_top10 = sorted(tiktok_posts_data, key=lambda x: x['view_count'], reverse=True)[:10]
-        tiktok_posts_flop10 = sorted(tiktok_posts_data, key=lambda x: x['view_count'])[:10]
+        # 📲 โพสต์ TikTok ของเพจนี้ (ตารางแสดงทีละหน้าแบบ keyset, ไม่โหลดทั้งประวัติ)
+        tiktok_posts_qs = TikTokPost.objects.filter(page=page).select_related('page')
+        posts_page = keyset_paginate(tiktok_posts_qs, request.GET.get('after'))
+        tiktok_posts_data = [_tiktok_post_row(p) for p in posts_page]
+
+        # จัดลำดับโพสต์สำหรับ Top 10 และ Flop 10 ตาม view_count ด้วย ORDER BY ใน DB
+        tiktok_posts_top10 = [
+            _tiktok_post_row(p)
+            for p in tiktok_posts_qs.order_by(F('view_count').desc(nulls_last=True), '-id')[:10]
+        ]
+        tiktok_posts_flop10 = [
+            _tiktok_post_row(p)
+            for p in tiktok_posts_qs.order_by(F('view_count').asc(nulls_first=True), 'id')[:10]
+        ]
 
-        # สร้าง scatter chart (วันที่ vs. engagement)
+        # สร้าง scatter chart (วันที่ vs. engagement): เฉพาะช่วงล่าสุด ไม่ส่งโพสต์ทั้งประวัติไปที่ browser
         tiktok_scatter = []
         # เก็บวันที่ทั้งหมดเพื่อหาช่วงวันที่
         scatter_dates = []
-        for item in tiktok_posts_data:
-            if item.get('post_timestamp_dt'):
-                # ใช้ datetime จริงสำหรับแกน X
-                scatter_dates.append(item['post_timestamp_dt'].date())
-                tiktok_scatter.append({
-                    'x': item['post_timestamp_dt'].strftime('%Y-%m-%d %H:%M'),
-                    'y': item['total_engagement'],
-                    'content': (item['post_content'][:30] + '...') if item.get('post_content') else '',
-                    'page_name': item.get('page_name', page.page_name),
-                    'timestamp_text': item['post_timestamp'],
-                    'img': item['post_imgs'][0] if item['post_imgs'] else None,
-                    'link': item['post_url'],
-                })
-            else:
-                # ถ้าไม่มี datetime ให้ข้ามใน scatter chart
-                continue
+        for p in _scatter_posts(tiktok_posts_qs):
+            # ใช้ datetime จริงสำหรับแกน X
+            scatter_dates.append(p.post_timestamp_dt.date())
+            tiktok_scatter.append({
+                'x': p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M'),
+                'y': p.total_engagement,
+                'content': (p.post_content[:30] + '...') if p.post_content else '',
+                'page_name': page.page_name,
+                'timestamp': p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M'),
+                'timestamp_text': p.post_timestamp_dt.strftime('%Y-%m-%d %H:%M'),
+                'img': thumb_url(p.post_imgs, 'post') or None,
+                'link': p.post_url,
+            })
 
         # หาวันแรกและวันสุดท้ายสำหรับหัวกราฟ
         start_date = ''
         end_date = ''
         if scatter_dates:
-            scatter_dates_sorted = sorted(scatter_dates)
-            start_date = scatter_dates_sorted[0].strftime('%d %b')
-            end_date = scatter_dates_sorted[-1].strftime('%d %b')
-
-        # นับจำนวนโพสต์ตามวันในสัปดาห์
+            start_date = min(scatter_dates).strftime('%d %b')
+            end_date = max(scatter_dates).strftime('%d %b')
+
+        # ✅ นับโพสต์/ปฏิสัมพันธ์ตามวันและช่วง 2 ชั่วโมงด้วย GROUP BY ใน DB
+        # โพสต์ในแต่ละช่อง popup โหลดเองทีหลังจาก pageview_bucket_posts
+        heatmap_counter = _post_time_buckets(
+            tiktok_posts_qs,
+            likes=F('like_count'), comments=F('comment_count'), shares=F('share_count'),
+            saves=F('save_count'), engagement=F('total_engagement'),
+        )
         weekday_counter = Counter()
-        posts_by_day_json = defaultdict(list)
-        posts_grouped_by_time = defaultdict(list)
-        # เตรียม heatmap สำหรับ best time chart
-        heatmap_counter = {}
-        hour_bins = list(range(0, 24, 2))  # กลุ่มชั่วโมงทุก 2 ชั่วโมง
-        for p in tiktok_posts_qs:
-            dt = p.post_timestamp_dt
-            if not dt:
-                continue
-            weekday_index = dt.weekday()
-            weekday_name = dt.strftime('%A')
-            weekday_counter[weekday_name] += 1
-            hour = dt.hour
-            hour_slot = (hour // 2) * 2
-            key = f"{weekday_index}_{hour_slot}"
-
-            # ตัวแปรปฏิสัมพันธ์
-            likes = p.like_count or 0
-            comments = p.comment_count or 0
-            shares = p.share_count or 0
-            saves = p.save_count or 0
-            views = p.view_count or 0
-            total_engagement = likes + comments + shares
-
-            # posts_by_day_json สำหรับ popup วัน
-            posts_by_day_json[str(weekday_index)].append({
-                "platform": "tiktok",
-                "post_url": p.post_url,
-                "post_imgs": [p.post_imgs] if p.post_imgs else [],
-                "post_content": p.post_content or '',
-                "post_timestamp": dt.strftime('%Y-%m-%d %H:%M'),
-                # Always include page details for popup rendering
-                "profile_pic": p.page.profile_pic if p.page else '',
-                "page_name": p.page.page_name if p.page else '',
-                "like_count": likes,
-                "comment_count": comments,
-                "share_count": shares,
-                "save_count": saves,
-                "view_count": views,
-                "total_engagement": likes + comments + shares + saves,
-            })
-
-            # posts_grouped_by_time สำหรับ popup Best Times chart
-            posts_grouped_by_time[key].append({
-                "platform": "tiktok",
-                "post_url": p.post_url,
-                "post_imgs": [p.post_imgs] if p.post_imgs else [],
-                "post_content": p.post_content or '',
-                "post_timestamp": dt.strftime('%Y-%m-%d %H:%M'),
-                # Always include page details for popup rendering
-                "profile_pic": p.page.profile_pic if p.page else '',
-                "page_name": p.page.page_name if p.page else '',
-                "like_count": likes,
-                "comment_count": comments,
-                "share_count": shares,
-                "save_count": saves,
-                "view_count": views,
-                "total_engagement": likes + comments + shares + saves,
-            })
-
-            # รวมข้อมูล heatmap สำหรับ bubble chart
-            heat_key = (weekday_name, hour_slot)
-            if heat_key not in heatmap_counter:
-                heatmap_counter[heat_key] = {
-                    "count": 0,
-                    "likes": 0,
-                    "comments": 0,
-                    "shares": 0,
-                    "saves": 0,
-                    "engagement": 0,
-                }
-            heatmap_counter[heat_key]["count"] += 1
-            heatmap_counter[heat_key]["likes"] += likes
-            heatmap_counter[heat_key]["comments"] += comments
-            heatmap_counter[heat_key]["shares"] += shares
-            heatmap_counter[heat_key]["saves"] += saves
-            heatmap_counter[heat_key]["engagement"] += likes + comments + shares + saves
+        for (weekday_index, _), val in heatmap_counter.items():
+            weekday_counter[calendar.day_name[weekday_index]] += val["count"]
 
         # สร้าง bar chart ข้อมูลวัน
         posts_by_day_data = [{"day": day, "count": weekday_counter.get(day, 0)} for day in calendar.day_name]
@@ -1501,11 +1373,12 @@ def pageview(request, page_id):
         day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         best_times_bubble = []
 
-        for (day_name, hour_slot), val in heatmap_counter.items():
-            key_str = f"{day_order.index(day_name)}_{hour_slot}"
+        for (weekday_index, hour_slot), val in heatmap_counter.items():
+            day_name = day_order[weekday_index]
+            key_str = f"{weekday_index}_{hour_slot}"
             tooltip_label = f"{day_name} {hour_slot:02d}:00 - {hour_slot + 2:02d}:00"
             bubble = {
-                "x": day_order.index(day_name),
+                "x": weekday_index,
                 "y": hour_slot,
                 "r": max(4, min(20, val["count"] * 3)),
                 "count": val["count"],
@@ -1532,7 +1405,7 @@ def pageview(request, page_id):
         ]
 
         # คำนวณ Top 50 Hashtags สำหรับ TikTok
-        top_hashtags_raw = extract_top_hashtags(tiktok_posts_qs)  # ดึง (tag, count)
+        top_hashtags_raw = top_hashtags_for(page_ids=[page.id])  # ดึง (tag, count) จากตาราง PostHashtag
         top_count_max = top_hashtags_raw[0][1] if top_hashtags_raw else 1
         top_hashtags = []
         for tag, count in top_hashtags_raw:
@@ -1571,9 +1444,11 @@ def pageview(request, page_id):
         return render(request, 'PageInfo/pageview.html', {
             'page': page,
             'tiktok_posts': tiktok_posts_data,
+            'posts_page': posts_page,
             'tiktok_posts_top10': tiktok_posts_top10,
             'tiktok_posts_flop': tiktok_posts_flop10,
             'scatter_data': json.dumps(tiktok_scatter, ensure_ascii=False),
+            'scatter_points': tiktok_scatter,
             'scatter_data_json': json.dumps(tiktok_scatter, ensure_ascii=False),
             'top_posts_json': json.dumps(top_posts_export, ensure_ascii=False),
             'start_date': start_date,
@@ -1585,151 +1460,46 @@ def pageview(request, page_id):
             'bar_day_values': json.dumps(bar_day_values),
             'bar_day_colors': json.dumps(bar_day_colors),
             'bubble_data': json.dumps(best_times_bubble),
-            'posts_by_day_json': json.dumps(posts_by_day_json),
-            'posts_grouped_json': json.dumps(posts_grouped_by_time),
             'top_hashtags': top_hashtags,
             'top_hashtags_json': top_hashtags_json,
         })
 
     if page.platform == "facebook":
-        facebook_posts = FacebookPost.objects.filter(page=page).order_by('-post_timestamp_dt')
-        posts_by_day_json = defaultdict(list)
-        posts_grouped_by_time = defaultdict(list)
-        heatmap_counter = {}  # ✅ สำหรับรวมข้อมูล bubble chart
-        best_times_bubble = []  # ✅ สำหรับแสดงผล chart
-        hour_bins = list(range(0, 24, 2))  # 0,2,4,...22
-
-        for post in facebook_posts:
-            if not post.post_timestamp_dt:
-                continue
-
-            weekday_index = post.post_timestamp_dt.weekday()
-            hour = post.post_timestamp_dt.hour
-            hour_slot = (hour // 2) * 2  # เช่น 13 => 12
-            key = f"{weekday_index}_{hour_slot}"
-
-            # ✅ แปลง reactions
-            reactions = post.reactions or {}
-            if isinstance(reactions, str):
-                try:
-                    reactions = json.loads(reactions)
-                except json.JSONDecodeError:
-                    reactions = {}
-
-            # ✅ คำนวณ metrics
-            post.like_count = reactions.get("ถูกใจ", 0)
-            post.comment_count = post.comment_count or 0
-            post.share_count = post.share_count or 0
-            post.total_engagement = sum(reactions.values()) + post.comment_count + post.share_count
-
-            post.reach = getattr(post, 'reach_per_post', None)
-            post.impressions = getattr(post, 'impressions', None)
-
-            if post.reach and isinstance(post.reach, (int, float)) and post.reach > 0:
-                post.interaction_rate = f"{post.total_engagement / post.reach:.4%}"
-            else:
-                post.interaction_rate = "0%"
-                post.reach = "-"
-
-            if post.impressions and isinstance(post.impressions, (int, float)) and post.impressions > 0:
-                post.impression_per_view = f"{post.total_engagement / post.impressions:.4f}"
-            else:
-                post.impression_per_view = "-"
-
-            post.negative_sentiment_share = "0%"
-
-            # ✅ เพิ่มข้อมูลเข้า posts_by_day_json
-            posts_by_day_json[str(weekday_index)].append({
-                "post_id": post.post_id,
-                "post_imgs": post.post_imgs,
-                "post_content": post.post_content,
-                "post_timestamp": post.post_timestamp_text,
-                # Always include page details for popup rendering
-                "profile_pic": post.page.profile_pic if post.page else '',
-                "page_name": post.page.page_name if post.page else '',
-                "platform": "facebook",
-                "comment_count": post.comment_count,
-                "share_count": post.share_count,
-                "total_engagement": post.total_engagement,
-                "reactions": reactions,
-            })
+        facebook_posts_qs = FacebookPost.objects.filter(page=page).select_related('page')
+        # ตารางโพสต์แสดงทีละหน้าแบบ keyset (post_timestamp_dt, id)
+        posts_page = keyset_paginate(facebook_posts_qs, request.GET.get('after'))
+        facebook_posts = [_facebook_post_row(post) for post in posts_page]
 
-            # ✅ เพิ่มข้อมูลเข้า posts_grouped_by_time สำหรับ popup bubble chart
-            posts_grouped_by_time[key].append({
-                "post_id": post.post_id,
-                "post_content": post.post_content,
-                "post_imgs": post.post_imgs,
-                "post_timestamp": post.post_timestamp_text,
-                "reactions": reactions,
-                "comment_count": post.comment_count,
-                "share_count": post.share_count,
-                "total_engagement": post.total_engagement,
-                # Ensure platform and page details at the top level for popup rendering
-                "platform": "facebook",
-                "page_name": post.page.page_name if post.page else '',
-                "profile_pic": post.page.profile_pic if post.page else '',
-            })
-
-            # ✅ เพิ่มข้อมูลเข้า scatter chart
+        # ✅ scatter chart: เฉพาะช่วงล่าสุด ไม่ส่งโพสต์ทั้งประวัติไปที่ browser
+        for post in _scatter_posts(facebook_posts_qs):
             scatter_data.append({
-                "x": post.post_timestamp_dt.strftime("%Y-%m-%d"),
+                "x": post.post_timestamp_dt.strftime("%Y-%m-%d %H:%M"),
                 "y": post.total_engagement,
                 "content": (post.post_content[:30] + '...') if post.post_content else "",
                 "page_name": page.page_name,
+                "timestamp": post.post_timestamp_text,
                 "timestamp_text": post.post_timestamp_text,
-                "img": post.post_imgs[0] if isinstance(post.post_imgs, list) and len(post.post_imgs) > 0 else None,
+                "img": thumb_url(post.post_imgs[0], 'post') if isinstance(post.post_imgs, list) and len(post.post_imgs) > 0 else None,
                 # ตรวจสอบว่า post_imgs เป็น list
+                "link": f"https://www.facebook.com/{post.post_id}",
             })
 
-            # ✅ รวมข้อมูล bubble chart
-            if key not in heatmap_counter:
-                heatmap_counter[key] = {
-                    "count": 0,
-                    "likes": 0,
-                    "comments": 0,
-                    "shares": 0,
-                }
-
-            heatmap_counter[key]["count"] += 1
-            heatmap_counter[key]["likes"] += reactions.get("ถูกใจ", 0)
-            heatmap_counter[key]["comments"] += post.comment_count
-            heatmap_counter[key]["shares"] += post.share_count
-
-        # ✅ ฟังก์ชันกำหนดสีแยกตามจำนวนโพสต์
-        def get_color_by_count(count):
-            color_map = {
-                1: "#cdb4db",
-                2: "#c5f6f7",
-                3: "#f9c6c9",
-                4: "#ffd6a5",
-                5: "#FF6962",
-            }
-            return color_map.get(count, "#9E9E9E")
-
-        # ✅ แปลง heatmap_counter => best_times_bubble
-        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        day_labels = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-        for key, val in heatmap_counter.items():
-            weekday, hour = map(int, key.split("_"))
-            label = f"{day_order[weekday]} {hour:02d}:00 - {hour + 2:02d}:00"
-            best_times_bubble.append({
-                "x": weekday,
-                "y": hour,
-                "r": max(4, min(20, val["count"] * 3)),
-                "count": val["count"],
-                "likes": val["likes"],
-                "comments": val["comments"],
-                "shares": val["shares"],
-                "label": label,
-                "key": key,
-                "color": get_color_by_count(val["count"]),
-            })
+        # ✅ นับโพสต์/ปฏิสัมพันธ์ตามวันและช่วง 2 ชั่วโมงด้วย GROUP BY ใน DB
+        # โพสต์ในแต่ละช่อง popup โหลดเองทีหลังจาก pageview_bucket_posts
+        heatmap_counter = _post_time_buckets(
+            facebook_posts_qs,
+            likes=Cast(KT('reactions__ถูกใจ'), FloatField()), comments=F('comment_count'),
+            shares=F('share_count'), engagement=F('total_engagement'),
+        )
+        weekday_counter = Counter()  # ✅ นับจำนวนโพสต์ตามวันในสัปดาห์
+        for (weekday_index, _), val in heatmap_counter.items():
+            weekday_counter[calendar.day_name[weekday_index]] += val["count"]
 
-        facebook_posts_top10 = sorted(facebook_posts, key=lambda p: p.total_engagement, reverse=True)[:10]
-        facebook_posts_flop10 = sorted(facebook_posts, key=lambda p: p.total_engagement)[:10]
+        # ✅ Top/Flop 10 ด้วย ORDER BY บนคอลัมน์ total_engagement (มี index page,-total_engagement)
+        facebook_posts_top10 = [_facebook_post_row(p) for p in facebook_posts_qs.order_by('-total_engagement', '-id')[:10]]
+        facebook_posts_flop10 = [_facebook_post_row(p) for p in facebook_posts_qs.order_by('total_engagement', 'id')[:10]]
         # ===== หลังจากสร้าง facebook_posts สำเร็จแล้ว
-        top_hashtags_raw = extract_top_hashtags(facebook_posts)  # ดึง (tag, count)
+        top_hashtags_raw = top_hashtags_for(page_ids=[page.id])  # ดึง (tag, count) จากตาราง PostHashtag
         top_count_max = top_hashtags_raw[0][1] if top_hashtags_raw else 1
 
         # เตรียมข้อมูลสำหรับ render
@@ -1751,13 +1521,6 @@ def pageview(request, page_id):
             for f in follower_qs if f.page_followers_count
         ]
 
-        # ✅ เตรียม Counter สำหรับนับจำนวนโพสต์ตามวันในสัปดาห์
-        weekday_counter = Counter()
-        for post in facebook_posts:
-            if post.post_timestamp_dt:
-                weekday_name = post.post_timestamp_dt.strftime('%A')
-                weekday_counter[weekday_name] += 1
-
         # ✅ เตรียมข้อมูล posts by day chart
         posts_by_day_data = [{"day": day, "count": weekday_counter.get(day, 0)} for day in calendar.day_name]
         bar_day_labels = list(calendar.day_name)  # ["Monday", "Tuesday", ..., "Sunday"]
@@ -1786,45 +1549,6 @@ def pageview(request, page_id):
         lighten_factors_fb = [0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2]
         bar_day_colors = [lighten_color_fb(base_color_fb, lighten_factors_fb[i % len(lighten_factors_fb)]) for i, _ in enumerate(bar_day_labels)]
 
-        # ✅ เตรียมข้อมูลสำหรับ Bubble Chart Best Times to Post
-        best_times_data = []
-        hour_bins = list(range(0, 24, 2))  # bin ทุก 2 ชั่วโมง: 0,2,4,...22
-        heatmap_counter = {}
-
-        for post in facebook_posts:
-            if post.post_timestamp_dt:
-                weekday = post.post_timestamp_dt.strftime('%A')  # Monday - Sunday
-                hour = post.post_timestamp_dt.hour
-                time_bin = hour_bins[hour // 2]  # ex: 9 => 8
-                key = (weekday, time_bin)
-
-                # ดึง reaction แบบแยกประเภท
-                reactions = post.reactions or {}
-                if isinstance(reactions, str):
-                    try:
-                        reactions = json.loads(reactions)
-                    except json.JSONDecodeError:
-                        reactions = {}
-
-                likes = reactions.get("ถูกใจ", 0)
-                comments = post.comment_count or 0
-                shares = post.share_count or 0
-
-                if key not in heatmap_counter:
-                    heatmap_counter[key] = {
-                        "count": 0,
-                        "likes": 0,
-                        "comments": 0,
-                        "shares": 0,
-                        "engagement": 0,
-                    }
-
-                heatmap_counter[key]["count"] += 1
-                heatmap_counter[key]["likes"] += likes
-                heatmap_counter[key]["comments"] += comments
-                heatmap_counter[key]["shares"] += shares
-                heatmap_counter[key]["engagement"] += likes + comments + shares
-
         # ✅ แปลงข้อมูลให้พร้อมใช้ใน Chart.js
         day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         best_times_bubble = []
@@ -1841,12 +1565,13 @@ def pageview(request, page_id):
             }
             return color_map.get(count, "#9E9E9E")  # สีเทาสำหรับ fallback
 
-        for (day, hour), val in heatmap_counter.items():
-            key_str = f"{day_order.index(day)}_{hour}"  # ✅ ให้ตรงกับ key ที่ใช้ใน posts_grouped_by_time
+        for (weekday_index, hour), val in heatmap_counter.items():
+            day = day_order[weekday_index]
+            key_str = f"{weekday_index}_{hour}"  # ✅ day_slot ที่ popup ส่งไปถาม pageview_bucket_posts
 
             tooltip_label = f"{day} {hour:02d}:00 - {hour + 2:02d}:00"
             bubble = {
-                "x": day_order.index(day),
+                "x": weekday_index,
                 "y": hour,
                 "r": max(4, min(20, val["count"] * 3)),
                 "count": val["count"],
@@ -1905,9 +1630,11 @@ def pageview(request, page_id):
     return render(request, 'PageInfo/pageview.html', {
         'page': page,
         'facebook_posts': facebook_posts,
+        'posts_page': posts_page,
         'facebook_posts_top10': facebook_posts_top10,
         'facebook_posts_flop': facebook_posts_flop10,
         'scatter_data': scatter_data,
+        'scatter_points': scatter_data,
         'scatter_data_json': scatter_data_json,
         'top_posts_json': json.dumps(top_posts_export, ensure_ascii=False),
         'follower_data': follower_data,  # ✅ ส่งไปยังเทมเพลตด้วย
@@ -1920,8 +1647,24 @@ def pageview(request, page_id):
         'bar_day_colors': json.dumps(bar_day_colors),
         'top_hashtags': top_hashtags,
         'top_hashtags_json': top_hashtags_json_fb,
-        'posts_by_day_json': json.dumps(posts_by_day_json),
-        'posts_grouped_json': json.dumps(posts_grouped_by_time),
     })
 
 
+def thumbnail(request, token):
+    """รูปย่อจาก cache ในเครื่อง (ดู PageInfo/thumbnails.py) ลิงก์ถูก sign ไว้ จึงไม่ต้อง login"""
+    try:
+        url, size = unsign_thumbnail(token)
+    except (signing.BadSignature, ValueError):
+        raise Http404
+    path = cached_thumbnail(url, size)
+    try:
+        response = FileResponse(open(path, 'rb'), content_type='image/webp') if path else None
+    except FileNotFoundError:  # ถูก evict ไประหว่างนั้น
+        response = None
+    if response is None:
+        # ✅ โหลดไม่ได้ (URL หมดอายุ ฯลฯ): ส่งไปที่รูปต้นฉบับ แต่ไม่ให้ browser จำนาน
+        response = HttpResponseRedirect(url)
+        patch_cache_control(response, private=True, max_age=3600)
+        return response
+    patch_cache_control(response, public=True, max_age=thumbnail_cache_seconds(), immutable=True)
+    return response
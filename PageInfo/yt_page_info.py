@@ -1,11 +1,11 @@
-import requests
 import re
 from bs4 import BeautifulSoup
 
+from .http_client import get_client, run_sync
 
-def get_channel_name(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+
+def get_channel_name(html):
+    soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, 'html.parser')
 
     # 🔍 ดึงชื่อเพจจาก <meta property="og:title">
     meta_tag = soup.find('meta', property='og:title')
@@ -17,9 +17,8 @@ def get_channel_name(url):
     return h1.get_text(strip=True) if h1 else None
 
 
-def get_profile_pic(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+def get_profile_pic(html):
+    soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, 'html.parser')
 
     # 🔍 ดึง URL รูปโปรไฟล์จาก <meta property="og:image">
     meta_tag = soup.find('meta', property='og:image')
@@ -28,11 +27,9 @@ def get_profile_pic(url):
     return None
 
 
-def get_continuationCommand_token(url):
-    response = requests.get(url)
-    response_text = response.text
+def get_continuationCommand_token(html):
     pattern = r'"continuationCommand"\s*:\s*\{[^{}]*?"token"\s*:\s*"([^"]*)"'
-    match = re.search(pattern, response_text)
+    match = re.search(pattern, html)
     return match.group(1) if match else None
 
 
@@ -50,10 +47,24 @@ def parse_number(text):
 
 
 def get_youtube_info(url):
-    page_name = get_channel_name(url)  # ✅ ดึงชื่อเพจ
-    profile_pic = get_profile_pic(url)  # ✅ ดึงโปรไฟล์เพจ
+    """sync wrapper ของ fetch_youtube_info"""
+    return run_sync(fetch_youtube_info(url))
+
 
-    token = get_continuationCommand_token(url)
+async def fetch_youtube_info(url):
+    client = get_client()
+    # ✅ โหลดหน้า channel ครั้งเดียว แล้วใช้ HTML เดิมหา ชื่อเพจ / รูปโปรไฟล์ / continuation token
+    try:
+        response = await client.get(url)
+    except Exception as e:
+        print(f"❌ Error fetching YouTube page: {e}")
+        return None
+    html = response.text
+    soup = BeautifulSoup(html, 'html.parser')
+    page_name = get_channel_name(soup)  # ✅ ดึงชื่อเพจ
+    profile_pic = get_profile_pic(soup)  # ✅ ดึงโปรไฟล์เพจ
+
+    token = get_continuationCommand_token(html)
     if not token:
         print("❌ Token not found.")
         return None
@@ -68,8 +79,12 @@ def get_youtube_info(url):
         'context': {'client': {'clientName': 'WEB', 'clientVersion': '2.20250530.01.00'}},
         'continuation': token,
     }
-    response = requests.post('https://www.youtube.com/youtubei/v1/browse', headers=headers, json=json_data)
-    data = response.json()
+    try:
+        response = await client.post('https://www.youtube.com/youtubei/v1/browse', headers=headers, json=json_data)
+        data = response.json()
+    except Exception as e:
+        print(f"❌ Error fetching YouTube about data: {e}")
+        return None
 
     try:
         about = data['onResponseReceivedEndpoints'][0]['appendContinuationItemsAction']['continuationItems'][0][